@@ -0,0 +1,237 @@
+"""
+Sinsis Diff 명령행 도구 (화면 없이 A, B 폴더 비교)
+
+    python -m core.diff <A 폴더> <B 폴더> [--output 경로] [--except-ext .txt,.git/] [--format jsonl|csv]
+    python sinsis.py --cli <A 폴더> <B 폴더> ...
+
+GUI 와 같은 비교 엔진(core.gui.compare)과 작업자 설정을 사용하며, 비교 결과 행을 JSON Lines 또는 CSV 로 기록합니다.
+PyQt5 없이 동작하므로 cron, CI 처럼 화면이 없는 서버에서 사용할 수 있습니다.
+종료 코드: 0 (차이 없음), 1 (차이 있음), 2 (오류)
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+
+from core.gui import hasher, copier, archiver
+from core.gui.compare import FolderDiff
+from core.gui.helpers import database_init, get_worker_count
+from core.gui.snapshot import CompareSnapshot
+
+REPORT_FORMATS = ('jsonl', 'csv')
+# 기본 캐시 DB: 실행 위치와 상관없이 GUI 와 같은 app/local.db 를 사용합니다.
+DEFAULT_CACHE_DB = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), 'app', 'local.db')
+# 결과 파일에 기록할 항목 (한쪽에만 있는 파일의 반대쪽 값은 비워 둡니다.)
+REPORT_FIELDS = ('status', 'status_name', 'file_a_path', 'file_b_path', 'file_a_byte', 'file_b_byte',
+                 'file_a_time', 'file_b_time')
+
+
+def get_report_row(rom):
+    return {
+        'status': rom.status,
+        'status_name': rom.status_name,
+        'file_a_path': rom.file_a_path if rom.in_a else None,
+        'file_b_path': rom.file_b_path if rom.in_b else None,
+        'file_a_byte': rom.file_a_byte if rom.in_a else None,
+        'file_b_byte': rom.file_b_byte if rom.in_b else None,
+        'file_a_time': rom.file_a_time,
+        'file_b_time': rom.file_b_time,
+    }
+
+
+class ReportWriter:
+    """비교 결과 행을 발견되는 대로 JSON Lines 또는 CSV 로 기록하는 클래스"""
+
+    def __init__(self, file, report_format='jsonl'):
+        self.file = file
+        self.report_format = report_format
+        self.csv_writer = None
+        if report_format == 'csv':
+            self.csv_writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, rom):
+        row = get_report_row(rom)
+        if self.csv_writer:
+            self.csv_writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def get_report_format(args):
+    if args.format:
+        return args.format
+    # 결과 파일 확장자가 .csv 이면 CSV 로 기록합니다.
+    if args.report and args.report.lower().endswith('.csv'):
+        return 'csv'
+    return 'jsonl'
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m core.diff', description='Sinsis Diff: A, B 폴더 비교 (명령행)')
+    parser.add_argument('folder_a', help='기준 A 폴더')
+    parser.add_argument('folder_b', help='업데이트 B 폴더')
+    parser.add_argument('-o', '--output',
+                        help='업데이트 저장 경로 (folder: output 폴더, zip / tar.zst: 압축 파일 경로)')
+    parser.add_argument('-x', '--except-ext', default='',
+                        help='제외 규칙 (,콤마로 입력: .txt, *.bak, .git/, re:패턴, size>1GB, age>30d)')
+    parser.add_argument('-r', '--report', default='-',
+                        help='비교 결과를 기록할 파일 (기본: 표준 출력)')
+    parser.add_argument('-f', '--format', choices=REPORT_FORMATS,
+                        help='비교 결과 형식 (기본: jsonl, 결과 파일이 .csv 이면 csv)')
+    parser.add_argument('--hash-workers', default='',
+                        help='해시 비교 작업자 수 (0 또는 빈 값은 자동)')
+    parser.add_argument('--hash-executor', choices=('thread', 'process'), default='thread',
+                        help='해시 비교 작업자 종류')
+    parser.add_argument('--compare-mode', choices=hasher.COMPARE_MODES, default='auto',
+                        help='내용 비교 방식')
+    parser.add_argument('--hash-backend', choices=('auto', *hasher.HASH_BACKENDS), default='auto',
+                        help='해시 방식 (auto: 가장 빠른 해시를 측정하여 사용, '
+                             'crc32 / adler32 는 변경 확인에만 쓰고 이동 감지 / 중복 분석 / 검증은 더 긴 해시로 합니다.)')
+    parser.add_argument('--walk-workers', default='',
+                        help='폴더 조회 동시 작업 수 (기본 8)')
+    parser.add_argument('--no-detect-moves', action='store_true',
+                        help='이동 / 이름 변경 감지를 사용하지 않습니다.')
+    parser.add_argument('--dedup', action='store_true',
+                        help='중복 분석 후 업데이트 저장시 같은 내용은 한번만 기록합니다.')
+    parser.add_argument('--output-mode', choices=copier.OUTPUT_MODES, default='copy',
+                        help='output 폴더 생성 방식')
+    parser.add_argument('--output-format', choices=archiver.OUTPUT_FORMATS, default='folder',
+                        help='업데이트 저장 형식')
+    parser.add_argument('--compress-level', default=None,
+                        help='압축 레벨 (빈 값은 형식별 기본값)')
+    parser.add_argument('--verify', action='store_true',
+                        help='스캔 때 저장 대상 파일의 해시를 캐시에 채우고, 복사하면서 계산한 원본 해시와 비교하여 검증합니다.')
+    parser.add_argument('--verify-readback', action='store_true',
+                        help='--verify 와 함께 기록한 파일을 다시 읽어서도 검증합니다. (읽기가 한번 더 필요합니다.)')
+    parser.add_argument('--delta', action='store_true',
+                        help='Hash 불일치 파일은 바뀐 블록만 패치(.sdpatch)로 저장합니다.')
+    parser.add_argument('--cache-db', default=DEFAULT_CACHE_DB,
+                        help='해시 캐시 / 비교 스냅샷 DB 경로 (기본: 프로그램 폴더의 app/local.db, GUI 와 캐시를 공유합니다.)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='해시 캐시와 비교 스냅샷을 사용하지 않습니다.')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='진행 로그 출력 (-vv: 디버그)')
+    return parser
+
+
+def run(args):
+    # 해시 캐시 / 비교 스냅샷의 키가 실행 위치에 따라 달라지지 않도록 GUI 와 같이 절대 경로를 사용합니다.
+    folder_a = os.path.abspath(args.folder_a)
+    folder_b = os.path.abspath(args.folder_b)
+    for folder in (folder_a, folder_b):
+        if not os.path.isdir(folder):
+            raise ValueError(f'폴더를 찾을 수 없습니다: {folder}')
+    if args.output and not archiver.is_format_available(args.output_format):
+        raise ValueError(
+            f'{args.output_format} 형식으로 저장하려면 zstandard 패키지가 필요합니다.')
+
+    hash_workers = hasher.get_hash_workers(args.hash_workers)
+    walk_workers = get_worker_count(args.walk_workers, 8)
+    hash_cache = compare_snapshot = None
+    if not args.no_cache:
+        database_init(args.cache_db)
+        hash_cache = hasher.HashCache(args.cache_db)
+        compare_snapshot = CompareSnapshot(
+            folder_a, folder_b, args.cache_db)
+    hash_algorithm = hasher.select_hash_backend(
+        args.hash_backend, hash_cache.recorded_algorithm() if hash_cache is not None else None)
+
+    # 검증은 output 폴더에 파일을 복사할 때만 합니다.
+    verify = bool(args.output) and args.output_format == 'folder' and args.output_mode == 'copy' and (
+        args.verify or args.verify_readback)
+    if verify and hash_cache is None and not args.verify_readback:
+        logging.warning('해시 캐시 없이는 스캔 때의 해시가 없어 --verify 로 확인할 수 없습니다. (--verify-readback 사용)')
+
+    folder_diff = FolderDiff()
+    detect_moves = not args.no_detect_moves
+    roms_list = []
+    # 이동 감지시 B 행은 이동(M) 으로 바뀔 수 있으므로 스캔이 끝난 뒤 기록합니다.
+    b_rows = []
+    report_file = sys.stdout if args.report == '-' else open(
+        args.report, 'w', encoding='utf-8', newline='')
+    try:
+        writer = ReportWriter(report_file, get_report_format(args))
+        for batch in folder_diff.iter_compare_folders(
+                folder_a, folder_b, args.except_ext, hash_compare=True,
+                hash_workers=hash_workers, hash_executor=args.hash_executor, hash_cache=hash_cache,
+                compare_mode=args.compare_mode, walk_workers=walk_workers,
+                compare_snapshot=compare_snapshot, detect_moves=detect_moves,
+                hash_algorithm=hash_algorithm, cache_digests=verify):
+            for rom in batch:
+                if detect_moves and rom.status == 'B':
+                    b_rows.append(rom)
+                    continue
+                writer.write(rom)
+                roms_list.append(rom)
+            logging.debug(
+                f'검사 파일 {folder_diff.files_examined} / 비교 대상 파일 {len(roms_list) + len(b_rows)}')
+        replaced_ids = {id(rom) for rom in folder_diff.replaced_rows}
+        for rom in b_rows:
+            if id(rom) not in replaced_ids:
+                writer.write(rom)
+                roms_list.append(rom)
+    finally:
+        if report_file is not sys.stdout:
+            report_file.close()
+        else:
+            report_file.flush()
+    logging.info(f'단계별 비교 결과\n{folder_diff.compare_stats.summary()}')
+
+    duplicate_clusters = None
+    if args.dedup:
+        duplicate_clusters = folder_diff.find_duplicate_clusters(
+            hash_workers, hash_cache)
+    if hash_cache is not None:
+        hash_cache.flush([folder_a, folder_b])
+        compare_snapshot.save()
+
+    if args.output:
+        save_output(args, roms_list, folder_a, folder_b,
+                    hash_cache, duplicate_clusters, hash_algorithm)
+    return 1 if roms_list else 0
+
+
+def save_output(args, roms_list, folder_a, folder_b, hash_cache=None, duplicate_clusters=None,
+                hash_algorithm='blake2'):
+    """비교 결과를 GUI 의 업데이트 저장과 같은 방식으로 output 폴더 또는 압축 파일에 기록하는 함수"""
+    output_path = os.path.normpath(args.output)
+    moved_files = copier.get_moved_files(roms_list, folder_a, folder_b)
+    if args.output_format == 'folder':
+        jobs = copier.plan_copy_jobs(
+            roms_list, output_path, folder_a, folder_b)
+        verify = args.verify or args.verify_readback
+        copy_stats = copier.save_update_folder(
+            jobs, output_path, moved_files, args.output_mode, verify, hash_cache, args.delta,
+            duplicate_clusters, hash_algorithm=hash_algorithm, verify_readback=args.verify_readback)
+        if verify and hash_cache is not None:
+            hash_cache.flush()
+    else:
+        jobs = copier.plan_copy_jobs(roms_list, '', folder_a, folder_b)
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        copy_stats = archiver.save_update_archive(
+            jobs, output_path, moved_files, args.output_format, args.compress_level, duplicate_clusters)
+    print(f'{output_path}: {copy_stats.summary()}', file=sys.stderr)
+    if copy_stats.failed or copy_stats.mismatched:
+        raise OSError(
+            f'복사 실패 {len(copy_stats.failed)} 건, 검증 불일치 {len(copy_stats.mismatched)} 건')
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, format='%(message)s',
+                        level=(logging.WARNING, logging.INFO, logging.DEBUG)[min(args.verbose, 2)])
+    try:
+        return run(args)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
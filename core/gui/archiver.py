@@ -0,0 +1,255 @@
+import io
+import logging
+import os
+import tarfile
+import time
+import zipfile
+from core.gui.copier import (CopyStats, PROGRESS_INTERVAL, MOVE_MANIFEST, format_move_manifest,
+                             split_duplicate_jobs)
+
+try:
+    import zstandard
+except ImportError:  # tar.zst 내보내기는 zstandard 패키지가 있을 때만 사용할 수 있습니다.
+    zstandard = None
+
+# 업데이트 저장 형식: folder(output 폴더), zip, tar.zst
+OUTPUT_FORMATS = ('folder', 'zip', 'tar.zst')
+# 형식별 기본 / 최소 / 최대 압축 레벨
+COMPRESS_LEVELS = {'zip': (6, 0, 9), 'tar.zst': (3, 1, 22)}
+# 이미 압축된 형식은 다시 압축하지 않습니다.
+# (zip 은 그대로 저장, tar.zst 는 해당 항목 구간을 STORED_ZSTD_LEVEL 의 별도 zstd 프레임으로 기록)
+STORED_EXTENSIONS = frozenset(('.zip', '.7z', '.rar', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.lz4',
+                               '.chd', '.cso', '.zso', '.pbp', '.rvz', '.wia', '.cia', '.xci',
+                               '.png', '.jpg', '.jpeg', '.gif', '.webp', '.mp3', '.ogg', '.m4a',
+                               '.mp4', '.mkv', '.avi', '.webm'))
+# 압축되지 않는 데이터를 통과시키는 zstd 레벨 (높은 레벨은 압축되지 않는 데이터에도 매우 느립니다.)
+STORED_ZSTD_LEVEL = 1
+
+
+class ArchiveAborted(OSError):
+    """압축 파일 기록 도중 오류로 저장을 중단했을 때 발생합니다. (기록하던 압축 파일은 지웁니다.)"""
+
+
+def is_format_available(output_format):
+    if output_format == 'tar.zst':
+        return zstandard is not None
+    return output_format in OUTPUT_FORMATS
+
+
+def get_compress_level(output_format, value):
+    """설정값(문자열)을 형식에 맞는 압축 레벨로 변환하는 함수, 빈 값이나 잘못된 값이면 기본값"""
+    default, minimum, maximum = COMPRESS_LEVELS[output_format]
+    try:
+        level = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(level, minimum), maximum)
+
+
+def get_archive_path(directory, name, output_format):
+    """이미 있는 파일과 겹치지 않는 '{name} (n).{형식}' 경로를 반환하는 함수"""
+    archive_path = os.path.normpath(
+        os.path.join(directory, f'{name}.{output_format}'))
+    i = 1
+    while os.path.exists(archive_path):
+        archive_path = os.path.normpath(os.path.join(
+            directory, f'{name} ({i}).{output_format}'))
+        i += 1
+    return archive_path
+
+
+def write_archive(jobs, archive_path, output_format='zip', compress_level=None, progress=None,
+                  progress_interval=PROGRESS_INTERVAL, extra_files=None, duplicates=()):
+    """
+    복사 작업 목록(CopyJob, target_path 는 압축 파일 안의 상대 경로)을 압축 파일 하나로 바로 기록합니다.
+    output 폴더에 복사한 뒤 다시 압축하지 않으므로 원본을 한번만 읽습니다.
+    extra_files {압축 파일 안의 경로: bytes} 는 이동 목록처럼 파일 없이 바로 기록할 내용입니다.
+    duplicates [(중복 작업, 같은 내용의 작업)] 는 tar 에서는 링크 항목으로만 기록합니다. (zip 은 파일을 다시 기록)
+    progress 가 주어지면 일정 간격으로 progress(CopyStats) 를 호출하고, CopyStats 를 반환합니다.
+    열 수 없는 원본은 아무것도 기록하기 전에 건너뛰지만, 기록 도중 오류가 나면 항목이 깨진 채 남지 않도록
+    기록하던 압축 파일을 지우고 ArchiveAborted 를 발생시킵니다.
+    """
+    if not is_format_available(output_format):
+        raise ValueError(f'사용할 수 없는 압축 형식입니다: {output_format}')
+    duplicate_of = {id(job): primary_job for job, primary_job in duplicates}
+    jobs = list(jobs) + [job for job, _ in duplicates]
+    stats = CopyStats(len(jobs), sum(job.size for job in jobs))
+    added = set()  # 압축 파일에 기록된 작업 (링크 대상 확인용)
+    last_progress = time.monotonic()
+
+    job = None
+    try:
+        with ArchiveWriter(archive_path, output_format, compress_level) as archive:
+            for job in jobs:
+                if progress and time.monotonic() - last_progress >= progress_interval:
+                    last_progress = time.monotonic()
+                    progress(stats)
+                primary_job = duplicate_of.get(id(job))
+                if primary_job is not None and id(primary_job) in added and archive.can_link:
+                    archive.add_link(job.target_path, primary_job.target_path)
+                    stats.deduplicated_files += 1
+                    stats.deduplicated_bytes += job.size
+                else:
+                    try:
+                        # 원본을 먼저 열어 두고, 열 수 없는 파일은 압축 파일에 기록하기 전에 건너뜁니다.
+                        source_file = open(job.source_path, 'rb')
+                    except OSError as e:
+                        logging.warning(
+                            f'압축 파일 추가 실패: {job.source_path} ({e})')
+                        stats.failed.append((job.source_path, str(e)))
+                        continue
+                    with source_file:
+                        archive.add(job.source_path,
+                                    job.target_path, source_file)
+                    stats.copied_bytes += job.size
+                added.add(id(job))
+                stats.copied_files += 1
+                stats.backends[output_format] = stats.backends.get(
+                    output_format, 0) + 1
+            job = None
+            for arcname, data in (extra_files or {}).items():
+                archive.add_data(arcname, data)
+    except OSError as e:
+        remove_partial_archive(archive_path)
+        source = f': {job.source_path}' if job is not None else ''
+        message = f'압축 파일 기록 실패로 저장을 중단했습니다{source} ({e})'
+        logging.error(message)
+        raise ArchiveAborted(message) from e
+
+    stats.elapsed = time.monotonic() - stats.started
+    if progress:
+        progress(stats)
+    logging.info(
+        f'{archive_path} ({output_format}, 레벨 {archive.compress_level}) {stats.summary()}')
+    return stats
+
+
+def remove_partial_archive(archive_path):
+    try:
+        os.remove(archive_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.warning(f'기록하던 압축 파일을 지우지 못했습니다: {archive_path} ({e})')
+
+
+def save_update_archive(jobs, archive_path, moved_files=(), output_format='zip', compress_level=None,
+                        duplicate_clusters=None, progress=None):
+    """업데이트 대상 작업과 이동 목록을 압축 파일 하나로 기록하고 CopyStats 를 반환하는 함수 (GUI, 명령행 공통)"""
+    duplicates = ()
+    if duplicate_clusters:
+        jobs, duplicates = split_duplicate_jobs(jobs, duplicate_clusters)
+    extra_files = {MOVE_MANIFEST: format_move_manifest(
+        moved_files).encode('utf-8')} if moved_files else None
+    return write_archive(jobs, archive_path, output_format, compress_level, progress,
+                         extra_files=extra_files, duplicates=duplicates)
+
+
+def is_stored_file(source_path):
+    return os.path.splitext(source_path)[1].lower() in STORED_EXTENSIONS
+
+
+class ZstdFrameWriter:
+    """
+    tar 스트림을 zstd 프레임 단위로 압축해 기록하는 파일 객체, set_level 로 이후 데이터의 압축 레벨을 바꿉니다.
+    레벨이 바뀌면 이전 프레임을 닫고 새 프레임을 시작합니다. (이어진 프레임은 하나의 스트림으로 풀립니다.)
+    """
+
+    def __init__(self, file, level):
+        self.file = file
+        self.level = level
+        self.compressors = {}
+        self.writer = None
+        self.writer_level = None
+
+    def set_level(self, level):
+        self.level = level
+
+    def write(self, data):
+        if self.writer is None or self.writer_level != self.level:
+            self.close()
+            compressor = self.compressors.get(self.level)
+            if compressor is None:
+                compressor = zstandard.ZstdCompressor(
+                    level=self.level, threads=-1)
+                self.compressors[self.level] = compressor
+            self.writer = compressor.stream_writer(self.file, closefd=False)
+            self.writer_level = self.level
+        return self.writer.write(data)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class ArchiveWriter:
+    """zip 또는 tar.zst 압축 파일에 파일을 하나씩 추가하는 클래스"""
+
+    def __init__(self, archive_path, output_format='zip', compress_level=None):
+        self.archive_path = archive_path
+        self.output_format = output_format
+        self.compress_level = get_compress_level(output_format, compress_level)
+        self.file = None
+        self.writer = None
+        self.archive = None
+
+    def __enter__(self):
+        if self.output_format == 'zip':
+            self.archive = zipfile.ZipFile(self.archive_path, 'w', compression=zipfile.ZIP_DEFLATED,
+                                           compresslevel=self.compress_level, allowZip64=True)
+        else:
+            # tar.zst: tar 스트림 전체를 zstd 로 압축하고, 이미 압축된 파일 구간만 낮은 레벨의 프레임으로 기록합니다.
+            self.file = open(self.archive_path, 'wb')
+            self.writer = ZstdFrameWriter(self.file, self.compress_level)
+            self.archive = tarfile.open(fileobj=self.writer, mode='w|')
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, source_path, arcname, source_file=None):
+        """파일 하나를 추가합니다. tar 는 source_file 이 주어지면 이미 연 파일에서 읽습니다."""
+        arcname = arcname.replace(os.sep, '/')
+        stored = is_stored_file(source_path)
+        if self.output_format == 'zip':
+            self.archive.write(source_path, arcname,
+                               compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+            return
+        self.writer.set_level(
+            min(STORED_ZSTD_LEVEL, self.compress_level) if stored else self.compress_level)
+        if source_file is not None:
+            info = self.archive.gettarinfo(arcname=arcname, fileobj=source_file)
+            self.archive.addfile(info, source_file)
+        else:
+            self.archive.add(source_path, arcname, recursive=False)
+
+    @property
+    def can_link(self):
+        """zip 은 링크 항목이 없으므로 중복 파일도 다시 기록합니다."""
+        return self.output_format != 'zip'
+
+    def add_link(self, arcname, link_arcname):
+        """이미 기록한 link_arcname 과 내용이 같은 파일을 하드 링크 항목으로 추가합니다. (tar)"""
+        info = tarfile.TarInfo(arcname.replace(os.sep, '/'))
+        info.type = tarfile.LNKTYPE
+        info.linkname = link_arcname.replace(os.sep, '/')
+        info.mtime = time.time()
+        self.archive.addfile(info)
+
+    def add_data(self, arcname, data):
+        arcname = arcname.replace(os.sep, '/')
+        if self.output_format == 'zip':
+            self.archive.writestr(arcname, data)
+        else:
+            self.writer.set_level(self.compress_level)
+            info = tarfile.TarInfo(arcname)
+            info.size = len(data)
+            info.mtime = time.time()
+            self.archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        for resource in (self.archive, self.writer, self.file):
+            if resource is not None:
+                resource.close()
+        self.archive = self.writer = self.file = None
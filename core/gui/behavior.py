@@ -8,9 +8,12 @@ import shutil
 from PyQt5.QtCore import Qt, QThreadPool, QSize, QTimer
 from PyQt5.QtGui import QColor
 from core.gui.worker import RomScannerWorker
+from core.gui import hasher, copier, archiver
+from core.gui.snapshot import TreeSnapshot, CompareSnapshot
+from core.gui.compare import FolderDiff
 from .helpers import *
-from PyQt5.QtWidgets import QFileDialog
-from PyQt5.QtGui import QStandardItem, QImage, QIcon, QPixmap, QFont
+from PyQt5.QtWidgets import QFileDialog, QMessageBox
+from PyQt5.QtGui import QImage, QIcon, QPixmap, QFont
 
 
 class GuiBehavior:
@@ -21,42 +24,35 @@ class GuiBehavior:
         self.gui = gui
         self.settings = None
         self.all_roms_list = []
-        self.page = 1  # 현재 페이지 번호
-        self.page_size = 1000  # 한 페이지에 표시할 아이템 수
-        self.current_roms_list = []  # 현재 페이지의 롬 목록
-        self.remove_roms_list = []  # 삭제할 롬 목록
+        self.roms_index = {}  # file_path -> 비교 결과 행 (정렬과 무관하게 유지)
+        self.remove_roms_list = set()  # 삭제할 롬 목록
         self.except_roms_list = []  # 삭제할 롬 목록
         self.msg_box = None
         self.current_file_a_path = None
         self.current_file_b_path = None
         self.current_status = None
+        self.hash_cache = None  # 파일 해시 캐시 (첫 비교시 로드)
+        self.folder_diff = FolderDiff()  # 폴더 비교 엔진 (진행 상황, 단계별 통계, 폴더 색인)
+        self.tree_snapshots = {}  # 폴더별 조회 결과 스냅샷
+        self.compare_snapshot = None  # 파일 쌍의 내용 비교 결과 스냅샷
+        self.copy_stats = None  # 마지막 업데이트 저장의 복사 결과
+        self.duplicate_clusters = None  # 마지막 중복 분석 결과 (업데이트 저장시 같은 내용은 한번만 기록)
 
-    def get_current_page_roms(self):
-        # 현재 페이지에 해당하는 롬 목록을 반환
-        start_idx = (self.page - 1) * self.page_size
-        end_idx = start_idx + self.page_size
+    @property
+    def compare_stats(self):
+        return self.folder_diff.compare_stats
 
-        return self.all_roms_list[start_idx:end_idx]
+    @property
+    def files_examined(self):
+        return self.folder_diff.files_examined
 
-    def next_page(self):
-        # 스캔 시작 버튼을 누를 때 로딩 오버레이를 표시합니다.
-        worker = RomScannerWorker(self, action='next')
-        worker.signals.showLoading.connect(self.gui.show_loading_overlay)
-        worker.signals.hideLoading.connect(self.gui.hide_loading_overlay)
-        worker.signals.changePage.connect(self.change_page_refresh)
-        self.worker_thread.start(worker)
-
-    def prev_page(self):
-        # 스캔 시작 버튼을 누를 때 로딩 오버레이를 표시합니다.
-        worker = RomScannerWorker(self, action='prev')
-        worker.signals.showLoading.connect(self.gui.show_loading_overlay)
-        worker.signals.hideLoading.connect(self.gui.hide_loading_overlay)
-        worker.signals.changePage.connect(self.change_page_refresh)
-        self.worker_thread.start(worker)
+    @property
+    def bytes_hashed(self):
+        return self.folder_diff.bytes_hashed
 
-    def get_total_pages(self):
-        # 전체 페이지 수 계산
-        return math.ceil(len(self.all_roms_list) / self.page_size)
+    @property
+    def scan_indexes(self):
+        return self.folder_diff.scan_indexes
 
     def handle_init(self):
         '''
@@ -92,46 +88,166 @@ class GuiBehavior:
         else:
             settings.append(None)
 
+        hash_workers = get_settings('hash_workers')
+        if hash_workers:
+            self.gui.hash_workers_input.setText(hash_workers)
+            settings.append(hash_workers)
+        else:
+            settings.append(None)
+
+        hash_executor = get_settings('hash_executor')
+        if hash_executor:
+            self.gui.hash_executor_combo.setCurrentIndex(
+                max(self.gui.hash_executor_combo.findData(hash_executor), 0))
+            settings.append(hash_executor)
+        else:
+            settings.append(None)
+
+        compare_mode = get_settings('compare_mode')
+        if compare_mode:
+            self.gui.compare_mode_combo.setCurrentIndex(
+                max(self.gui.compare_mode_combo.findData(compare_mode), 0))
+            settings.append(compare_mode)
+        else:
+            settings.append(None)
+
+        walk_workers = get_settings('walk_workers')
+        if walk_workers:
+            self.gui.walk_workers_input.setText(walk_workers)
+            settings.append(walk_workers)
+        else:
+            settings.append(None)
+
+        output_mode = get_settings('output_mode')
+        if output_mode:
+            self.gui.output_mode_combo.setCurrentIndex(
+                max(self.gui.output_mode_combo.findData(output_mode), 0))
+            settings.append(output_mode)
+        else:
+            settings.append(None)
+
+        verify_copy = get_settings('verify_copy')
+        self.gui.verify_copy_check.setChecked(verify_copy == '1')
+        settings.append(verify_copy)
+
+        verify_readback = get_settings('verify_readback')
+        self.gui.verify_readback_check.setChecked(verify_readback == '1')
+        settings.append(verify_readback)
+
+        delta_mode = get_settings('delta_mode')
+        self.gui.delta_mode_check.setChecked(delta_mode == '1')
+        settings.append(delta_mode)
+
+        output_format = get_settings('output_format')
+        if output_format:
+            self.gui.output_format_combo.setCurrentIndex(
+                max(self.gui.output_format_combo.findData(output_format), 0))
+        settings.append(output_format)
+
+        compress_level = get_settings('compress_level')
+        if compress_level:
+            self.gui.compress_level_input.setText(compress_level)
+        settings.append(compress_level)
+
+        detect_moves = get_settings('detect_moves')
+        self.gui.detect_moves_check.setChecked(detect_moves != '0')
+        settings.append(detect_moves)
+
+        hash_backend = get_settings('hash_backend')
+        if hash_backend:
+            self.gui.hash_backend_combo.setCurrentIndex(
+                max(self.gui.hash_backend_combo.findData(hash_backend), 0))
+        settings.append(hash_backend)
+
         self.settings = settings
 
     def get_files_list(self, action):
+        self.all_roms_list = [
+            rom for batch in self.iter_files_list(action) for rom in batch]
+        self.remove_replaced_roms(self.folder_diff.replaced_rows)
+        self.roms_index = {}
+        self.index_roms(self.all_roms_list)
+
+    def index_roms(self, roms_list):
+        """file_path 로 행을 바로 찾을 수 있도록 색인에 추가합니다."""
+        for rom in roms_list:
+            self.roms_index[rom['file_path']] = rom
+
+    def iter_files_list(self, action):
+        """폴더 비교 결과를 묶음(list) 단위로 돌려주는 제너레이터"""
         logging.debug('폴더 비교 작업 시작')
         # 롬 폴더 경로 (이미 알고 있는 경로로 설정하세요)
         target_file_folder1 = get_settings('directory1')
         target_file_folder2 = get_settings('directory2')
         target_file_folder3 = get_settings('directory3')
         excluded_extensions = get_settings('except_ext')
-
-        diff_list = self.compare_folders_recursively(
-            target_file_folder1, target_file_folder2, excluded_extensions, hash_compare=True)
-
-        if not diff_list:
+        hash_workers = hasher.get_hash_workers(get_settings('hash_workers'))
+        hash_executor = get_settings('hash_executor') or 'thread'
+        compare_mode = get_settings('compare_mode') or 'auto'
+        walk_workers = get_worker_count(get_settings('walk_workers'), 8)
+        detect_moves = get_settings('detect_moves') != '0'
+        # 복사 검증을 사용하면 저장할 파일의 해시를 스캔 때 캐시에 채워 둡니다.
+        verify_copy = get_settings('verify_copy') == '1' and (get_settings('output_format') or 'folder') == 'folder' \
+            and (get_settings('output_mode') or 'copy') == 'copy'
+
+        if self.hash_cache is None:
+            self.hash_cache = hasher.HashCache()
+        # 자동 선택이면 캐시에 기록된 백엔드를 유지해 캐시된 해시를 계속 사용합니다.
+        hash_algorithm = hasher.select_hash_backend(
+            get_settings('hash_backend'), self.hash_cache.recorded_algorithm())
+        # 폴더 내용이 바뀌었을 수 있으므로 이전 중복 분석 결과는 사용하지 않습니다.
+        self.duplicate_clusters = None
+
+        # 업데이트 저장 이후의 재조회(rescan)는 수정시각이 바뀐 폴더만 다시 읽습니다.
+        incremental = action == 'rescan'
+        snapshots = [self.get_tree_snapshot(target_file_folder1, excluded_extensions),
+                     self.get_tree_snapshot(target_file_folder2, excluded_extensions)]
+        if self.compare_snapshot is None or (self.compare_snapshot.folder_a, self.compare_snapshot.folder_b) != (
+                os.path.normpath(target_file_folder1), os.path.normpath(target_file_folder2)):
+            self.compare_snapshot = CompareSnapshot(
+                target_file_folder1, target_file_folder2)
+
+        diff_count = 0
+        for batch in self.iter_compare_folders(
+                target_file_folder1, target_file_folder2, excluded_extensions, hash_compare=True,
+                hash_workers=hash_workers, hash_executor=hash_executor, hash_cache=self.hash_cache,
+                compare_mode=compare_mode, walk_workers=walk_workers, snapshots=snapshots,
+                compare_snapshot=self.compare_snapshot, incremental=incremental, detect_moves=detect_moves,
+                hash_algorithm=hash_algorithm, cache_digests=verify_copy):
+            diff_count += len(batch)
+            yield batch
+
+        self.hash_cache.flush([target_file_folder1, target_file_folder2])
+        for snapshot in snapshots:
+            snapshot.save()
+        self.compare_snapshot.save()
+        logging.info(f'단계별 비교 결과\n{self.compare_stats.summary()}')
+
+        if not diff_count:
             alert('설정하신 폴더의 경로의 파일이 모두 동일합니다.')
 
-        self.all_roms_list = diff_list
+    def get_tree_snapshot(self, folder, excluded_extensions):
+        """폴더의 조회 결과 스냅샷을 가져오는 함수, 제외 확장자 설정이 바뀌면 새로 만듭니다."""
+        folder = os.path.normpath(folder)
+        snapshot = self.tree_snapshots.get(folder)
+        if snapshot is None or snapshot.except_ext != (excluded_extensions or ''):
+            snapshot = TreeSnapshot(folder, excluded_extensions)
+            self.tree_snapshots[folder] = snapshot
+        return snapshot
+
+    def mark_dirty(self, file_path):
+        """방금 복사한 파일의 폴더를 다음 재조회에서 다시 읽도록 표시하는 함수"""
+        for snapshot in self.tree_snapshots.values():
+            snapshot.mark_dirty(file_path)
 
     def calculate_file_hash(self, file_path, hash_algorithm='md5'):
         """파일의 해시 값을 계산하는 함수"""
-        if hash_algorithm == 'md5':
-            hash_obj = hashlib.md5()
-        elif hash_algorithm == 'sha256':
-            hash_obj = hashlib.sha256()
-        elif hash_algorithm == 'sha3':
-            hash_obj = hashlib.sha3_256()
-        elif hash_algorithm == 'blake2':
-            # BLAKE2b using cryptography library
-            hash_obj = hashlib.blake2b()
-        else:
-            raise ValueError("Unsupported hash algorithm")
+        return hasher.calculate_file_hash(file_path, hash_algorithm)
 
-        # 파일 버퍼 사이즈 1MB 지정
-        with open(file_path, 'rb', buffering=1048576) as file:
-            while True:
-                data = file.read(64*1024*1024)  # 64 KB 씩 데이터를 읽습니다.
-                if not data:
-                    break
-                hash_obj.update(data)
-        return hash_obj.hexdigest()
+    def direct_compare_files(self, file_a_path, file_b_path):
+        """두 파일을 청크 단위로 직접 비교하여 내용 일치 여부를 반환하는 함수"""
+        is_same, _ = hasher.direct_compare_files(file_a_path, file_b_path)
+        return is_same
 
     def should_skip_hash_compare(self, file_a_path, file_b_path):
         # Get the file sizes of file A and file B
@@ -141,310 +257,93 @@ class GuiBehavior:
         # Check if the file sizes are the same
         return file_a_size == file_b_size
 
-    def compare_folders_recursively(self, folder_a, folder_b, excluded_extensions=None, hash_compare=False):
-        if excluded_extensions is None:
-            excluded_extensions = []
-
+    def compare_folders_recursively(self, folder_a, folder_b, excluded_extensions=None, hash_compare=False,
+                                    **kwargs):
         diff_list = []
-
-        for root, dirs, files in os.walk(folder_a):
-
-            for file_a in files:
-                file_a_path = os.path.normpath(os.path.join(root, file_a))
-
-                relative_path = os.path.normpath(
-                    os.path.relpath(file_a_path, folder_a))
-
-                if any(relative_path.endswith(ext) for ext in excluded_extensions):
-                    continue
-
-                file_b_path = os.path.normpath(
-                    os.path.join(folder_b, relative_path))
-
-                if not os.path.exists(file_b_path):
-                    # diff_list.append(
-                    #     self.get_row_item(file_a_path, file_b_path, "A"))
-                    logging.debug(f'파일 A에만 존재: {file_a_path}')
-                    continue
-                elif os.path.exists(file_a_path) and os.path.exists(file_b_path) and self.compare_modification_dates(file_a_path, file_b_path) and self.compare_file_sizes(file_a_path, file_b_path):
-                    logging.debug(f'수정일자 동일: {file_a_path}')
-                    continue
-                elif os.path.exists(file_b_path) and hash_compare:
-                    hash_algorithm = 'blake2'
-                    hash_a = self.calculate_file_hash(
-                        file_a_path, hash_algorithm)
-                    hash_b = self.calculate_file_hash(
-                        file_b_path, hash_algorithm)
-
-                    if hash_a != hash_b:
-                        diff_list.append(
-                            self.get_row_item(file_a_path, file_b_path, "C"))
-                        logging.debug(f'파일 내용이 다름: {file_a_path}')
-
-        for root, dirs, files in os.walk(folder_b):
-            for file_b in files:
-                file_b_path = os.path.normpath(os.path.join(root, file_b))
-                relative_path = os.path.normpath(
-                    os.path.relpath(file_b_path, folder_b))
-
-                if any(relative_path.endswith(ext) for ext in excluded_extensions):
-                    continue
-
-                file_a_path = os.path.normpath(os.path.normpath(
-                    os.path.join(folder_a, relative_path)))
-
-                if not os.path.exists(file_a_path):
-                    diff_list.append(self.get_row_item(
-                        file_a_path, file_b_path, "B"))
-                    logging.debug(f'파일 B에만 존재: {file_b_path}')
-
+        for batch in self.iter_compare_folders(folder_a, folder_b, excluded_extensions, hash_compare, **kwargs):
+            diff_list.extend(batch)
         return diff_list
 
-    def get_row_item(self, file_a_path, file_b_path, type):
-        item = {}
-        # logging.debug(
-        #     f'<<<{file_a_path}>>> \n<<<{file_b_path}>>>')
-
-        if type == "C":
-            if file_a_path:
-                file_a_byte = os.path.getsize(file_a_path)
-                file_a_size = convert_size(file_a_byte)
-                file_a_name = get_file_name_without_extension(file_a_path)
-                file_a_time = os.path.getmtime(file_a_path)
-                platform_a_name = get_platform_name(file_a_path)
-            if file_b_path:
-                file_b_byte = os.path.getsize(file_b_path)
-                file_b_size = convert_size(file_b_byte)
-                file_b_name = get_file_name_without_extension(file_b_path)
-                file_b_time = os.path.getmtime(file_b_path)
-                platform_b_name = get_platform_name(file_b_path)
+    def iter_compare_folders(self, folder_a, folder_b, excluded_extensions=None, hash_compare=False, **kwargs):
+        """A, B 폴더 비교 결과 행을 묶음(list) 단위로 돌려주는 제너레이터 (compare.FolderDiff 참고)"""
+        return self.folder_diff.iter_compare_folders(folder_a, folder_b, excluded_extensions, hash_compare, **kwargs)
+
+    def analyze_duplicates(self):
+        """마지막 스캔의 A, B 폴더 전체에서 내용이 같은 파일 묶음을 찾아 self.duplicate_clusters 에 저장하는 함수"""
+        if self.hash_cache is None:
+            self.hash_cache = hasher.HashCache()
+        hash_workers = hasher.get_hash_workers(get_settings('hash_workers'))
+        self.duplicate_clusters = self.folder_diff.find_duplicate_clusters(
+            hash_workers, self.hash_cache)
+        folder_a, _, folder_b, _ = self.scan_indexes
+        self.hash_cache.flush([folder_a, folder_b])
+        return self.duplicate_clusters
+
+    def set_analyze_duplicates(self):
+        if self.scan_indexes is None:
+            alert('먼저 파일 비교를 실행해야 합니다.')
+            return
 
-        else:
-            if type == "A":
-                file_a_byte = os.path.getsize(file_a_path)
-                file_a_size = convert_size(file_a_byte)
-                file_a_name = get_file_name_without_extension(file_a_path)
-                platform_a_name = get_platform_name(file_a_path)
-                file_a_time = os.path.getmtime(file_a_path)
-                file_b_byte = 0
-                file_b_size = None
-                file_b_name = None
-                platform_b_name = None
-                file_b_time = None
-                logging.debug(file_a_size)
-            else:
-                file_a_byte = 0
-                file_a_size = None
-                file_a_name = None
-                platform_a_name = None
-                file_a_time = None
-                file_b_byte = os.path.getsize(file_b_path)
-                file_b_size = convert_size(file_b_byte)
-                file_b_name = get_file_name_without_extension(file_b_path)
-                platform_b_name = get_platform_name(file_b_path)
-                file_b_time = os.path.getmtime(file_b_path)
-                logging.debug(file_b_size)
-
-        item = {"file_a_path": file_a_path, "file_a_size": file_a_size, "file_a_byte": file_a_byte,
-                "file_a_name": file_a_name, "status": type, "file_a_platform_name": platform_a_name,
-                "file_b_path": file_b_path, "file_b_size": file_b_size, "file_b_byte": file_b_byte,
-                "file_b_name": file_b_name, "file_b_platform_name": platform_b_name,
-                "status_name": "Hash 불일치" if type == "C" else ("A에만 존재" if type == "A" else "추가 파일"),
-                "file_a_time": file_a_time, "file_b_time": file_b_time,
-                "file_path": file_a_path if file_a_path else file_b_path,
-                "platform_name": platform_a_name if platform_a_name else platform_b_name
-                }
-        return item
-
-    def change_page_refresh(self):
-        self.populate_table_with_roms()
+        worker = RomScannerWorker(self, action='dedup')
+        worker.signals.showLoading.connect(self.gui.show_loading_overlay)
+        worker.signals.hideLoading.connect(self.gui.hide_loading_overlay)
+        worker.signals.duplicatesReady.connect(self.show_duplicate_clusters)
+        self.worker_thread.start(worker)
 
-        # 스크롤바 초기화
-        self.gui.table.verticalScrollBar().setValue(0)
+    def show_duplicate_clusters(self, clusters, max_clusters=200):
+        """중복 묶음을 낭비된 용량이 큰 순서로 보여주는 함수"""
+        if not clusters:
+            alert('내용이 같은 파일이 없습니다.')
+            return
 
-    def populate_table_with_roms(self):
-        roms_list = self.get_current_page_roms()
-        # 테이블을 비우고 진행
-        logging.debug(f'테이블 클리어')
-
-        self.gui.table_model.removeRows(0, self.gui.table_model.rowCount())
-
-        italic_font = QFont(self.gui.font)
-        italic_font.setItalic(True)
-
-        for row, rom in enumerate(roms_list):
-            # 행 높이 수정, 아이콘 사이즈 수정
-            # self.gui.table.setRowHeight(row, 58)
-            # self.gui.table.setIconSize(QSize(50, 58))
-
-            # logging.debug(rom)
-            platform_a_name = rom.get('file_a_platform_name', None)
-            platform_b_name = rom.get('file_b_platform_name', None)
-            platform_name = rom.get('platform_name', None)
-            platform_a_icon = rom.get('file_a_platform_icon', None)
-            platform_a_icon = rom.get('file_b_platform_icon', None)
-            file_a_path = rom.get('file_a_path', None)
-            file_b_path = rom.get('file_b_path', None)
-            file_a_name = rom.get('file_a_name', None)
-            file_b_name = rom.get('file_b_name', None)
-            file_a_size = rom.get('file_a_size', None)
-            file_b_size = rom.get('file_b_size', None)
-            file_path = rom.get('file_path', None)
-            thumbnail_a = None
-
-            status = rom.get('status', None)
-            status_name = rom.get('status_name', None)
-
-            # 상태명 컬럼
-            status_name_item = QStandardItem(status_name)
-            status_name_item.setFlags(status_name_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            status_name_item.setTextAlignment(Qt.AlignVCenter | Qt.AlignCenter)
-            self.gui.table_model.setItem(row, 0, status_name_item)
-
-            # 플랫폼(상위폴더) 설정
-            platform_name_item = QStandardItem()
-            platform_name_item.setText(platform_name)
-            # 텍스트 좌측 정렬
-            platform_name_item.setTextAlignment(
-                Qt.AlignVCenter | Qt.AlignCenter)
-
-            platform_name_item.setFlags(platform_name_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            self.gui.table_model.setItem(row, 1, platform_name_item)
-
-            # 파일 경로 A 설정
-            file_a_path_item = QStandardItem()
-            file_a_path_item.setTextAlignment(
-                Qt.AlignLeft | Qt.AlignVCenter)  # 텍스트를 왼쪽 정렬
-            file_a_path_item.setData(
-                Qt.ElideRight, Qt.DisplayRole)  # 텍스트 오버플로우 설정
-            file_a_path_item.setSizeHint(
-                QSize(file_a_path_item.sizeHint().width(), 2))
-            file_a_path_item.setText(None if status == "B" else file_a_path)
-            file_a_path_item.setFlags(file_a_path_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsEnabled)
-            self.gui.table_model.setItem(row, 2, file_a_path_item)
-            self.gui.table.setColumnHidden(2, True)
-
-            # 원본 파일명 설정
-            file_a_name_item = QStandardItem(file_a_name)
-            file_a_name_item.setFlags(file_a_name_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            self.gui.table_model.setItem(row, 3, file_a_name_item)
-            self.gui.table.setColumnHidden(3, True)
-
-            # 파일 수정 일시
-            file_a_time_item = QStandardItem(
-                self.get_file_mod_time(file_a_path))
-            file_a_time_item.setFlags(file_a_time_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsEnabled)
-            file_a_time_item.setTextAlignment(
-                Qt.AlignVCenter | Qt.AlignCenter)
-            self.gui.table_model.setItem(row, 4, file_a_time_item)
-            self.gui.table.setColumnHidden(4, True)
-
-            # 파일 용량
-            file_a_size_item = QStandardItem(file_a_size)
-            file_a_size_item.setFlags(file_a_size_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsEnabled)
-            file_a_size_item.setTextAlignment(
-                Qt.AlignVCenter | Qt.AlignRight)
-            self.gui.table_model.setItem(row, 5, file_a_size_item)
-            self.gui.table.setColumnHidden(5, True)
-
-            # 단건 작업 버튼
-            work_icon = None
-            if status:
-                icon_path = absp(f'res/icon/{status}.svg')
-                icon = QIcon(icon_path)
-                size = QSize(32, 32)
-                pixmap = icon.pixmap(size)
-                work_icon = QIcon(pixmap)
-            file_work_item = QStandardItem()
-            file_work_item.setIcon(work_icon)
-            file_work_item.setFlags(file_work_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            file_work_item.setTextAlignment(
-                Qt.AlignVCenter | Qt.AlignCenter)
-            self.gui.table_model.setItem(row, 6, file_work_item)
-
-            # 파일 경로 B 설정
-            file_b_path_item = QStandardItem()
-            file_b_path_item.setTextAlignment(
-                Qt.AlignLeft | Qt.AlignVCenter)  # 텍스트를 왼쪽 정렬
-            file_b_path_item.setData(
-                Qt.ElideRight, Qt.DisplayRole)  # 텍스트 오버플로우 설정
-            file_b_path_item.setSizeHint(
-                QSize(file_b_path_item.sizeHint().width(), 6))
-            file_b_path_item.setText(None if status == "A" else file_b_path)
-            file_b_path_item.setFlags(file_b_path_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsEnabled)
-            self.gui.table_model.setItem(row, 7, file_b_path_item)
-
-            # 파일 수정 일시
-            file_b_time_item = QStandardItem(
-                self.get_file_mod_time(file_b_path))
-            file_b_time_item.setFlags(file_b_time_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsEnabled)
-            self.gui.table_model.setItem(row, 8, file_b_time_item)
-            file_b_time_item.setTextAlignment(
-                Qt.AlignVCenter | Qt.AlignCenter)
-
-            # 파일 용량
-            file_b_size_item = QStandardItem(file_b_size)
-            file_b_size_item.setFlags(file_b_size_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsEnabled)
-            file_b_size_item.setTextAlignment(
-                Qt.AlignVCenter | Qt.AlignRight)
-            self.gui.table_model.setItem(row, 9, file_b_size_item)
-
-            # 추가 파일명 설정
-            file_b_name_item = QStandardItem(file_b_name)
-            file_b_name_item.setFlags(file_b_name_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            self.gui.table_model.setItem(row, 10, file_b_name_item)
-
-            # 상태 컬럼
-            status_item = QStandardItem(status)
-            status_item.setFlags(status_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            status_item.setTextAlignment(Qt.AlignVCenter | Qt.AlignCenter)
-            self.gui.table_model.setItem(row, 11, status_item)
-            self.gui.table.setColumnHidden(11, True)
-
-            # 상태 컬럼
-            file_path_item = QStandardItem(file_path)
-            file_path_item.setFlags(file_path_item.flags(
-            ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            file_path_item.setTextAlignment(Qt.AlignVCenter | Qt.AlignCenter)
-            self.gui.table_model.setItem(row, 12, file_path_item)
-            self.gui.table.setColumnHidden(12, True)
-
-            # 행 높이 수정, 아이콘 사이즈 수정
-            # self.gui.table.setRowHeight(row, 58)
-            # self.gui.table.setIconSize(QSize(50, 58))
-
-        # 페이지 정보 업데이트 (예: "페이지 1 / 3")
-        max_page = self.get_total_pages()
-        if self.get_total_pages() > 0:
-            self.gui.main.page_label.setText(
-                f"페이지 {self.page} / {max_page}")
-
-        # 페이지 버튼 활성 비활성
-        if self.page == 1:
-            self.gui.main.page_prev_btn.setDisabled(True)
-            self.gui.main.page_next_btn.setDisabled(False)
-        elif self.page == max_page:
-            self.gui.main.page_prev_btn.setDisabled(False)
-            self.gui.main.page_next_btn.setDisabled(True)
-        else:
-            self.gui.main.page_prev_btn.setDisabled(False)
-            self.gui.main.page_next_btn.setDisabled(False)
+        wasted_bytes = sum(cluster.wasted_bytes for cluster in clusters)
+        lines = []
+        for cluster in clusters[:max_clusters]:
+            lines.append(
+                f'[{len(cluster.paths)} 건, 파일당 {convert_size(cluster.size)}, 낭비 {convert_size(cluster.wasted_bytes)}]')
+            lines.extend(f'  {file_path}' for file_path in cluster.paths)
+        if len(clusters) > max_clusters:
+            lines.append(f'... 외 {len(clusters) - max_clusters} 개 묶음')
+
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Information)
+        msg.setWindowTitle('중복 분석')
+        msg.setText(f'내용이 같은 파일 묶음 {len(clusters)} 개, 낭비된 용량 {convert_size(wasted_bytes)}\n'
+                    f'업데이트 저장시 같은 내용의 파일은 한번만 기록합니다.')
+        msg.setDetailedText('\n'.join(lines))
+        msg.exec_()
 
-        logging.debug(f'업데이트 타이틀!')
+    def populate_table_with_roms(self):
+        # 목록 전체가 바뀌었으므로 테이블을 다시 그립니다.
+        self.gui.table_model.refresh()
         self.gui.update_titlebar()
 
+    def append_roms_batch(self, roms_list):
+        """스캔 도중 전달된 결과 묶음을 목록 끝에 추가합니다."""
+        self.index_roms(roms_list)
+        self.gui.table_model.append_roms(roms_list)
+
+    def remove_replaced_roms(self, replaced_rows):
+        """스캔 도중 B 로 보여준 뒤 이동(M) 으로 확인된 행을 목록에서 뺍니다. (M 행은 따로 추가됩니다.)"""
+        replaced_ids = {id(rom) for rom in replaced_rows}
+        if not replaced_ids:
+            return
+        self.gui.table_model.beginResetModel()
+        self.all_roms_list[:] = [
+            rom for rom in self.all_roms_list if id(rom) not in replaced_ids]
+        self.gui.table_model.endResetModel()
+        for rom in replaced_rows:
+            if self.roms_index.get(rom['file_path']) is rom:
+                del self.roms_index[rom['file_path']]
+
+    def reset_roms_list(self):
+        """새 스캔을 시작하기 전에 목록과 테이블을 비웁니다."""
+        self.gui.table_model.beginResetModel()
+        self.all_roms_list = []
+        self.roms_index = {}
+        self.remove_roms_list = set()
+        self.gui.table_model.endResetModel()
+
     def set_save_output(self):
         # 롬 폴더 경로
         directory1 = get_settings('directory1')
@@ -469,17 +368,74 @@ class GuiBehavior:
         worker.signals.hideLoading.connect(self.gui.hide_loading_overlay)
         worker.signals.resourcesCopyCompleted.connect(
             self.set_save_output_file)
+        worker.signals.saveFailed.connect(self.show_save_failed_alert)
+        worker.signals.copyProgress.connect(self.gui.update_copy_progress)
         self.worker_thread.start(worker)
 
+    def save_output_files(self, output_folder, progress=None):
+        """
+        현재 목록의 A, B, C 파일을 output 폴더로 일괄 복사하고 CopyStats 를 반환하는 함수.
+        이동 / 이름 변경(M) 파일은 복사하지 않고 moved_files.txt 에 경로만 기록합니다.
+        """
+        # 설정은 복사 시작 전에 한번만 읽습니다.
+        folder_a = os.path.normpath(get_settings('directory1'))
+        folder_b = os.path.normpath(get_settings('directory2'))
+        output_mode = get_settings('output_mode') or 'copy'
+        verify_copy = get_settings('verify_copy') == '1'
+        verify_readback = get_settings('verify_readback') == '1'
+        use_delta = get_settings('delta_mode') == '1'
+        jobs = copier.plan_copy_jobs(
+            self.all_roms_list, output_folder, folder_a, folder_b)
+        moved_files = copier.get_moved_files(
+            self.all_roms_list, folder_a, folder_b)
+        logging.debug(
+            f'output 폴더 복사 대상: {len(jobs)} 건 -> {output_folder} ({output_mode})')
+
+        if verify_copy and self.hash_cache is None:
+            self.hash_cache = hasher.HashCache()
+        self.copy_stats = copier.save_update_folder(
+            jobs, output_folder, moved_files, output_mode, verify_copy, self.hash_cache, use_delta,
+            self.duplicate_clusters, progress, self.folder_diff.hash_algorithm,
+            verify_readback=verify_copy and verify_readback)
+        if verify_copy:
+            # 복사하면서 계산한 해시를 다음 스캔에서 재사용합니다.
+            self.hash_cache.flush()
+        return self.copy_stats
+
+    def save_output_archive(self, directory, output_format, progress=None):
+        """
+        현재 목록의 A, B, C 파일을 output 폴더 대신 압축 파일 하나로 기록하는 함수.
+        작업 스레드에서 실행되므로 알림창을 직접 띄우지 않고 (CopyStats, 오류 메시지) 를 반환합니다.
+        """
+        self.copy_stats = None
+        if not archiver.is_format_available(output_format):
+            return None, f'{output_format} 형식으로 저장하려면 zstandard 패키지가 필요합니다.'
+
+        folder_a = os.path.normpath(get_settings('directory1'))
+        folder_b = os.path.normpath(get_settings('directory2'))
+        # target_path 가 압축 파일 안의 상대 경로가 되도록 빈 output 폴더로 작업을 만듭니다.
+        jobs = copier.plan_copy_jobs(
+            self.all_roms_list, '', folder_a, folder_b)
+        moved_files = copier.get_moved_files(
+            self.all_roms_list, folder_a, folder_b)
+        os.makedirs(directory, exist_ok=True)
+        archive_path = archiver.get_archive_path(
+            directory, 'output', output_format)
+        logging.debug(f'압축 파일 저장 대상: {len(jobs)} 건 -> {archive_path}')
+
+        try:
+            self.copy_stats = archiver.save_update_archive(
+                jobs, archive_path, moved_files, output_format, get_settings('compress_level'),
+                self.duplicate_clusters, progress)
+        except archiver.ArchiveAborted as e:
+            return None, str(e)
+        return self.copy_stats, None
+
     # 최종 파일 복사
     def set_save_output_file(self, work_cnt):
         self.show_save_completed_alert(work_cnt)
-        # 일단 재조회
-        worker = RomScannerWorker(self, action='scan')
-        worker.signals.showLoading.connect(self.gui.show_loading_overlay)
-        worker.signals.hideLoading.connect(self.gui.hide_loading_overlay)
-        worker.signals.romsListReady.connect(self.populate_table_with_roms)
-        self.worker_thread.start(worker)
+        # 바뀐 폴더만 다시 읽는 재조회
+        self.start_scan_worker('rescan')
 
     def set_except(self):
         # 현재 선택된 행(ROMs)의 인덱스를 가져옵니다.
@@ -509,10 +465,18 @@ class GuiBehavior:
                 '현재 설정된 폴더를 찾을 수 없습니다.\n먼저 설정에서 비교할 폴더 위치를 지정해주세요.')
             return
 
+        self.start_scan_worker('scan')
+
+    def start_scan_worker(self, action):
         # 스캔 시작 버튼을 누를 때 로딩 오버레이를 표시합니다.
-        worker = RomScannerWorker(self, action='scan')
+        worker = RomScannerWorker(self, action=action)
         worker.signals.showLoading.connect(self.gui.show_loading_overlay)
         worker.signals.hideLoading.connect(self.gui.hide_loading_overlay)
+        # 스캔 도중 결과가 도착하는 대로 테이블을 채웁니다.
+        worker.signals.romsListReset.connect(self.reset_roms_list)
+        worker.signals.romsBatchReady.connect(self.append_roms_batch)
+        worker.signals.romsReplaced.connect(self.remove_replaced_roms)
+        worker.signals.scanProgress.connect(self.gui.update_scan_progress)
         worker.signals.romsListReady.connect(self.populate_table_with_roms)
         self.worker_thread.start(worker)
 
@@ -520,9 +484,27 @@ class GuiBehavior:
         if work_cnt == 0:
             alert('작업된 파일이 없습니다.')
         else:
-            alert(f'output 폴더에 대상파일 {work_cnt} 건이 모두 복사되었습니다.')
+            failed = len(self.copy_stats.failed) if self.copy_stats else 0
+            mismatched = len(
+                self.copy_stats.mismatched) if self.copy_stats else 0
+            if failed or mismatched:
+                message = f'output 폴더에 대상파일 {work_cnt} 건이 복사되었습니다.'
+                if failed:
+                    message += f'\n복사하지 못한 파일 {failed} 건은 로그를 확인해주세요.'
+                if mismatched:
+                    message += f'\n검증에 실패한 파일 {mismatched} 건은 로그를 확인해주세요.'
+                alert(message)
+            elif self.copy_stats and (self.copy_stats.verified or self.copy_stats.unverified):
+                alert(f'output 폴더에 대상파일 {work_cnt} 건이 모두 복사되었습니다.\n'
+                      f'검증: 일치 {self.copy_stats.verified} 건 (스캔 해시와 일치 {self.copy_stats.scan_verified} 건), '
+                      f'확인 불가 {self.copy_stats.unverified} 건')
+            else:
+                alert(f'output 폴더에 대상파일 {work_cnt} 건이 모두 복사되었습니다.')
             # self.set_scan_file()
 
+    def show_save_failed_alert(self, message):
+        alert(message)
+
     def confirm_update_save(self):
         message = "현재 목록의 A 폴더와 B 폴더의 차이가 있는 파일들을 \nB 폴더의 파일 기준으로 새로운 output 폴더에 복사합니다."
         reply = QMessageBox.question(None, '업데이트 outout 파일 저장', message,
@@ -553,63 +535,28 @@ class GuiBehavior:
         return msg_box.exec_() == QMessageBox.Yes
 
     def remove_rows_from_table(self, rows, action):
-        for row in sorted(rows, reverse=True):  # 높은 인덱스부터 작업
-            # 해당 행의 데이터 가져오기
-            item_list = []
-            for column in range(self.gui.table_model.columnCount()):
-                item = self.gui.table_model.item(row, column)
-
-                if column == 0:
-                    new_text = '작업 제외'
-                    font_color = QColor(255, 102, 102) if action == 'remove' else QColor(
-                        255, 153, 0)
-                    item.setText(new_text)
-                    item.setForeground(font_color)
-
-                    icon_path = absp('res/icon/alert-triangle.svg')
-                    icon = QIcon(icon_path)
-                    size = QSize(32, 32)
-                    pixmap = icon.pixmap(size)
-                    work_icon = QIcon(pixmap)
-                    file_work_item = QStandardItem()
-                    file_work_item.setIcon(work_icon)
-                    file_work_item.setFlags(file_work_item.flags(
-                    ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                    file_work_item.setTextAlignment(
-                        Qt.AlignVCenter | Qt.AlignCenter)
-                    self.gui.table_model.setItem(row, 6, file_work_item)
-
-                if item:
-                    item_list.append(item.text())
-                else:
-                    item_list.append(None)
-
-            # A또는 B의 파일경로를 사실상 키로 사용해도 무관
-            file_path = item_list[7]
+        for row in rows:
+            rom = self.gui.table_model.rom(row)
+            # 작업 제외 상태로 표시 (상태명, 아이콘은 모델에서 그립니다.)
+            rom['work_state'] = action
 
             if action == 'except':
-                # 플랫폼 이름과 원본 파일명 가져오기
-                self.remove_roms_list.append(item_list[7])  # 11은 파일 경로
-
-            self.update_row_from_all_roms_list(file_path, action)
+                self.remove_roms_list.add(rom['file_b_path'])
 
-            # self.all_roms_list에서 해당 행 삭제
-            # self.remove_row_from_all_roms_list(
-            #     platform_name, original_filename)
+            # A또는 B의 파일경로를 사실상 키로 사용해도 무관
+            self.update_row_from_all_roms_list(rom['file_path'], action)
 
-            # 행 삭제
-            # self.gui.table_model.removeRow(row)
+        self.gui.table_model.refresh_rows(rows)
 
     def update_row_from_all_roms_list(self, file_path, action):
-        work_flag = False
-        for index, rom in enumerate(self.all_roms_list):
-            if rom['file_path'] == file_path:
-                # 조건에 해당하는 항목을 찾았으므로 삭제합니다.
-                if action == 'remove':
-                    self.all_roms_list[index]['status'] = 'D'
-                elif action == 'except':
-                    self.all_roms_list[index]['status'] = 'E'
-                break  # 해당 항목을 찾았으면 반복문 종료
+        # 목록을 훑지 않고 색인에서 바로 찾습니다.
+        rom = self.roms_index.get(file_path)
+        if rom is None:
+            return
+        if action == 'remove':
+            rom['status'] = 'D'
+        elif action == 'except':
+            rom['status'] = 'E'
 
     def get_selected_rows(self):
         # table_view는 QTableView의 인스턴스 이름입니다. 이를 적절하게 수정해야 합니다.
@@ -636,46 +583,108 @@ class GuiBehavior:
         self.gui.file_directory_input3.setText(file_dialog.selectedFiles()[0])
 
     def save_settings(self):
-        settings = []
-        if self.gui.file_directory_input1.text():
-            set_settings('directory1',
-                         self.gui.file_directory_input1.text())
-            logging.debug('save_settings directory:' +
-                          self.gui.file_directory_input1.text())
-            settings.append(self.gui.file_directory_input1.text())
-        else:
-            set_settings('directory1', '')
-            settings.append(None)
+        # 설정 변경을 한 트랜잭션으로 기록합니다.
+        with settings_batch():
+            settings = []
+            if self.gui.file_directory_input1.text():
+                set_settings('directory1',
+                             self.gui.file_directory_input1.text())
+                logging.debug('save_settings directory:' +
+                              self.gui.file_directory_input1.text())
+                settings.append(self.gui.file_directory_input1.text())
+            else:
+                set_settings('directory1', '')
+                settings.append(None)
+
+            if self.gui.file_directory_input2.text():
+                set_settings('directory2',
+                             self.gui.file_directory_input2.text())
+                logging.debug('save_settings directory:' +
+                              self.gui.file_directory_input2.text())
+                settings.append(self.gui.file_directory_input2.text())
+            else:
+                set_settings('directory2', '')
+                settings.append(None)
+
+            if self.gui.file_directory_input3.text():
+                set_settings('directory3',
+                             self.gui.file_directory_input3.text())
+                logging.debug('save_settings directory:' +
+                              self.gui.file_directory_input3.text())
+                settings.append(self.gui.file_directory_input3.text())
+            else:
+                set_settings('directory3', '')
+                settings.append(None)
+
+            if self.gui.file_directory_except_ext.text():
+                set_settings('except_ext',
+                             self.gui.file_directory_except_ext.text())
+                logging.debug('save_settings except extension:' +
+                              self.gui.file_directory_except_ext.text())
+                settings.append(self.gui.file_directory_except_ext.text())
+            else:
+                set_settings('except_ext', '')
+                settings.append(None)
+
+            if self.gui.hash_workers_input.text():
+                set_settings('hash_workers',
+                             self.gui.hash_workers_input.text())
+                logging.debug('save_settings hash workers:' +
+                              self.gui.hash_workers_input.text())
+                settings.append(self.gui.hash_workers_input.text())
+            else:
+                set_settings('hash_workers', '')
+                settings.append(None)
+
+            hash_executor = self.gui.hash_executor_combo.currentData()
+            set_settings('hash_executor', hash_executor)
+            settings.append(hash_executor)
+
+            compare_mode = self.gui.compare_mode_combo.currentData()
+            set_settings('compare_mode', compare_mode)
+            settings.append(compare_mode)
+
+            if self.gui.walk_workers_input.text():
+                set_settings('walk_workers',
+                             self.gui.walk_workers_input.text())
+                logging.debug('save_settings walk workers:' +
+                              self.gui.walk_workers_input.text())
+                settings.append(self.gui.walk_workers_input.text())
+            else:
+                set_settings('walk_workers', '')
+                settings.append(None)
 
-        if self.gui.file_directory_input2.text():
-            set_settings('directory2',
-                         self.gui.file_directory_input2.text())
-            logging.debug('save_settings directory:' +
-                          self.gui.file_directory_input2.text())
-            settings.append(self.gui.file_directory_input2.text())
-        else:
-            set_settings('directory2', '')
-            settings.append(None)
+            output_mode = self.gui.output_mode_combo.currentData()
+            set_settings('output_mode', output_mode)
+            settings.append(output_mode)
 
-        if self.gui.file_directory_input3.text():
-            set_settings('directory3',
-                         self.gui.file_directory_input3.text())
-            logging.debug('save_settings directory:' +
-                          self.gui.file_directory_input3.text())
-            settings.append(self.gui.file_directory_input3.text())
-        else:
-            set_settings('directory3', '')
-            settings.append(None)
+            verify_copy = '1' if self.gui.verify_copy_check.isChecked() else '0'
+            set_settings('verify_copy', verify_copy)
+            settings.append(verify_copy)
 
-        if self.gui.file_directory_except_ext.text():
-            set_settings('except_ext',
-                         self.gui.file_directory_except_ext.text())
-            logging.debug('save_settings except extension:' +
-                          self.gui.file_directory_except_ext.text())
-            settings.append(self.gui.file_directory_except_ext.text())
-        else:
-            set_settings('except_ext', '')
-            settings.append(None)
+            verify_readback = '1' if self.gui.verify_readback_check.isChecked() else '0'
+            set_settings('verify_readback', verify_readback)
+            settings.append(verify_readback)
+
+            delta_mode = '1' if self.gui.delta_mode_check.isChecked() else '0'
+            set_settings('delta_mode', delta_mode)
+            settings.append(delta_mode)
+
+            output_format = self.gui.output_format_combo.currentData()
+            set_settings('output_format', output_format)
+            settings.append(output_format)
+
+            compress_level = self.gui.compress_level_input.text()
+            set_settings('compress_level', compress_level)
+            settings.append(compress_level or None)
+
+            detect_moves = '1' if self.gui.detect_moves_check.isChecked() else '0'
+            set_settings('detect_moves', detect_moves)
+            settings.append(detect_moves)
+
+            hash_backend = self.gui.hash_backend_combo.currentData()
+            set_settings('hash_backend', hash_backend)
+            settings.append(hash_backend)
 
         self.settings = settings
         self.gui.settings.hide()
@@ -693,7 +702,7 @@ class GuiBehavior:
         self.all_roms_list.sort(
             key=lambda rom: rom[column], reverse=(order == Qt.DescendingOrder))
 
-        # 현재 페이지를 다시 그립니다.
+        # 정렬된 목록으로 다시 그립니다.
         self.populate_table_with_roms()
 
     def get_file_mod_time(self, file_path, time_format='%Y-%m-%d %H:%M:%S'):
@@ -772,7 +781,8 @@ class GuiBehavior:
             logging.debug(f'소스경로: {source_path}')
             logging.debug(f'타겟경로: {target_path}')
 
-            shutil.copy2(source_path, target_path)
+            copier.copy_file(source_path, target_path)
+            self.mark_dirty(target_path)
 
             if status == "A":
                 folder_name = 'B' if file_b_path else 'output'
@@ -0,0 +1,239 @@
+"""
+A, B 폴더 비교 엔진.
+GUI(GuiBehavior) 와 명령행(core.diff) 이 같은 비교 과정을 사용하도록 Qt 에 의존하지 않는 코드만 둡니다.
+"""
+import logging
+import os
+import time
+from core.gui import hasher, scanner
+from core.gui.rules import compile_rules
+from core.gui.helpers import convert_size
+from core.gui.rows import RomRow
+
+
+class FolderDiff:
+    """A, B 폴더 비교 한번의 진행 상황과 결과 (단계별 통계, 폴더 색인)"""
+
+    def __init__(self):
+        self.compare_stats = None  # 마지막 비교의 단계별 통계
+        self.files_examined = 0  # 스캔 진행 상황: 검사한 파일 수
+        self.bytes_hashed = 0  # 스캔 진행 상황: 내용 비교로 읽은 바이트 수
+        self.scan_indexes = None  # 마지막 스캔의 (A 폴더, A 색인, B 폴더, B 색인)
+        self.hash_algorithm = 'blake2'  # 마지막 스캔에서 사용한 해시 백엔드
+        self.exclude_rules = None  # 마지막 스캔의 제외 규칙 (규칙별 건너뛴 파일 / 바이트 수)
+        # 마지막 스캔에서 먼저 돌려준 뒤 이동(M) 행으로 바뀐 B 행 (화면, 결과에서 빼야 합니다.)
+        self.replaced_rows = []
+
+    def iter_compare_folders(self, folder_a, folder_b, excluded_extensions=None, hash_compare=False,
+                             hash_workers=None, hash_executor='thread', hash_cache=None, compare_mode='auto',
+                             walk_workers=None, snapshots=None, compare_snapshot=None, incremental=False,
+                             detect_moves=False, hash_algorithm='blake2', cache_digests=False, batch_size=500,
+                             batch_interval=0.2):
+        """
+        A, B 폴더를 조회하면서 발견되는 비교 결과 행을 묶음(list) 단위로 돌려주는 제너레이터.
+        batch_size 건이 모이거나 batch_interval 초가 지나면 (빈 묶음이라도) 돌려주며,
+        진행 상황은 self.files_examined, self.bytes_hashed 로 확인할 수 있습니다.
+        detect_moves 이면 조회가 끝난 뒤 A에만 / B에만 있는 파일을 내용으로 짝지어 이동 / 이름 변경(M) 행으로 돌려줍니다.
+        B에만 있는 파일은 지금까지 본 A에만 있는 파일과 크기가 같은 것만 보류하고 나머지는 바로 돌려주며,
+        이미 돌려준 B 행이 M 행으로 바뀌면 self.replaced_rows 에 기록합니다.
+        hash_algorithm 은 hasher.HASH_BACKENDS 의 이름이며, 해시 캐시에 해시와 함께 기록됩니다.
+        excluded_extensions 는 제외 규칙 설정 문자열(또는 목록)이며, 스캔마다 한번만 ExcludeRules 로 컴파일합니다.
+        cache_digests 이면 업데이트로 저장할 B, C 행의 B 파일 전체 해시를 스캔 끝에 hash_cache 에 채웁니다. (복사 검증용)
+        """
+        exclude_rules = compile_rules(excluded_extensions)
+        self.exclude_rules = exclude_rules
+        self.hash_algorithm = hash_algorithm
+
+        self.compare_stats = hasher.CompareStats()
+        self.files_examined = 0
+        self.bytes_hashed = 0
+        index_a = {}
+        index_b = {}
+        # 해시 비교 중인 (A, B) 후보 쌍의 파일 정보
+        pair_stats = {}
+        # 한쪽에만 있는 파일 {전체 경로: FileStat} (이동 / 이름 변경 감지용)
+        a_only = {}
+        b_only = {}
+        a_only_sizes = set()
+        # 이동 짝을 찾기 전에 이미 돌려준 B 행 {전체 경로: RomRow}
+        emitted_b_rows = {}
+        self.replaced_rows = []
+        # 전체 해시를 채울 B, C 행 (cache_digests)
+        saved_rows = []
+        batch = []
+        last_yield = time.monotonic()
+
+        logging.debug(
+            f'폴더 비교 작업자 수: 조회 {walk_workers}, 해시 {hash_workers} ({hash_executor}, {hash_algorithm})')
+
+        def add_compare_results(results):
+            for file_a_path, file_b_path, is_same in results:
+                relative_path, stat_a, stat_b = pair_stats.pop(file_a_path)
+                if compare_snapshot:
+                    compare_snapshot.put(
+                        relative_path, stat_a, stat_b, is_same)
+                if not is_same:
+                    batch.append(
+                        get_row_item(file_a_path, file_b_path, "C", stat_a, stat_b))
+                    logging.debug(f'파일 내용이 다름: {file_a_path}')
+
+        def is_batch_ready():
+            return len(batch) >= batch_size or time.monotonic() - last_yield >= batch_interval
+
+        def take_batch():
+            nonlocal batch, last_yield
+            self.files_examined = len(index_a) + len(index_b)
+            self.bytes_hashed = sum(self.compare_stats.bytes_read.values())
+            last_yield = time.monotonic()
+            rows, batch = batch, []
+            if cache_digests:
+                saved_rows.extend(
+                    row for row in rows if row.status in ('B', 'C'))
+            return rows
+
+        with hasher.PairComparer(hash_algorithm, hash_workers, hash_executor, hash_cache,
+                                 self.compare_stats, compare_mode) as comparer:
+            # A, B 폴더를 동시에 조회하면서 발견된 결과를 바로 비교 단계로 넘깁니다.
+            for status, relative_path_a, relative_path_b, stat_a, stat_b in scanner.iter_tree_diff(
+                    folder_a, folder_b, index_a, index_b, exclude_rules, walk_workers,
+                    snapshots, incremental):
+                # 대소문자만 다른 경우 양쪽 파일은 각 폴더의 실제 이름을 그대로 사용합니다.
+                relative_path = relative_path_a or relative_path_b
+                file_a_path = os.path.normpath(
+                    os.path.join(folder_a, relative_path))
+                file_b_path = os.path.normpath(
+                    os.path.join(folder_b, relative_path_b or relative_path))
+
+                if status == 'A':
+                    a_only[file_a_path] = stat_a
+                    a_only_sizes.add(stat_a.size)
+                    logging.debug(f'파일 A에만 존재: {file_a_path}')
+                elif status == 'B' and detect_moves and stat_b.size:
+                    b_only[file_b_path] = stat_b
+                    if stat_b.size not in a_only_sizes:
+                        # 아직 같은 크기의 A 파일이 없으면 바로 보여주고, 나중에 이동으로 확인되면 바꿉니다.
+                        row = get_row_item(
+                            file_a_path, file_b_path, "B", stat_b=stat_b)
+                        emitted_b_rows[file_b_path] = row
+                        batch.append(row)
+                elif status == 'B':
+                    batch.append(get_row_item(
+                        file_a_path, file_b_path, "B", stat_b=stat_b))
+                    logging.debug(f'파일 B에만 존재: {file_b_path}')
+                elif hash_compare:
+                    # 양쪽 파일이 그대로라면 이전 비교 결과를 재사용합니다.
+                    is_same = compare_snapshot.get(
+                        relative_path, stat_a, stat_b) if compare_snapshot else None
+                    if is_same is not None:
+                        self.compare_stats.add(
+                            'snapshot', is_same, stat_a.size + stat_b.size)
+                        if not is_same:
+                            batch.append(
+                                get_row_item(file_a_path, file_b_path, "C", stat_a, stat_b))
+                    else:
+                        pair_stats[file_a_path] = (
+                            relative_path, stat_a, stat_b)
+                        comparer.submit(file_a_path, file_b_path,
+                                        stat_a, stat_b)
+
+                add_compare_results(comparer.poll())
+                if is_batch_ready():
+                    yield take_batch()
+
+            # 폴더 조회가 끝난 뒤 남은 내용 비교를 마무리합니다.
+            while comparer.pending:
+                add_compare_results(comparer.poll(timeout=batch_interval))
+                if is_batch_ready():
+                    yield take_batch()
+            add_compare_results(comparer.poll())
+
+        if detect_moves and b_only:
+            batch.extend(self.get_moved_rows(
+                folder_a, folder_b, a_only, b_only, hash_workers, hash_cache, emitted_b_rows))
+
+        logging.debug(
+            f'폴더 색인 완료 A: {len(index_a)} 건, B: {len(index_b)} 건')
+        if exclude_rules is not None:
+            logging.info(f'제외 규칙별 건너뛴 항목\n{exclude_rules.summary()}')
+        self.scan_indexes = (folder_a, index_a, folder_b, index_b)
+        if cache_digests and hash_cache is not None:
+            self.cache_saved_digests(
+                saved_rows + batch, hash_workers, hash_cache)
+        yield take_batch()
+
+    def get_moved_rows(self, folder_a, folder_b, a_only, b_only, hash_workers=None, hash_cache=None,
+                       emitted_b_rows=None):
+        """
+        A에만 / B에만 있는 파일을 내용으로 짝지어 이동(M) 행과 나머지 B 행을 만드는 함수.
+        emitted_b_rows 의 파일은 이미 B 행을 돌려주었으므로, 이동이면 self.replaced_rows 에 기록하고 B 행은 다시 만들지 않습니다.
+        """
+        if emitted_b_rows is None:
+            emitted_b_rows = {}
+        moved = hasher.find_moved_files(
+            a_only, b_only, self.hash_algorithm, hash_workers, hash_cache)
+        rows = []
+        for file_a_path, file_b_path in moved:
+            rows.append(get_row_item(
+                file_a_path, file_b_path, "M", a_only[file_a_path], b_only.pop(file_b_path)))
+            if file_b_path in emitted_b_rows:
+                self.replaced_rows.append(emitted_b_rows[file_b_path])
+            logging.debug(f'파일 이동 / 이름 변경: {file_a_path} -> {file_b_path}')
+        for file_b_path, stat_b in b_only.items():
+            if file_b_path in emitted_b_rows:
+                continue
+            file_a_path = os.path.normpath(os.path.join(
+                folder_a, os.path.relpath(file_b_path, folder_b)))
+            rows.append(get_row_item(
+                file_a_path, file_b_path, "B", stat_b=stat_b))
+            logging.debug(f'파일 B에만 존재: {file_b_path}')
+        logging.info(
+            f'이동 / 이름 변경 감지: {len(moved)} 건 (A에만 {len(a_only)} 건, B에만 {len(b_only) + len(moved)} 건)')
+        return rows
+
+    def cache_saved_digests(self, rows, hash_workers=None, hash_cache=None):
+        """저장할 B, C 행(이동으로 바뀐 행 제외)의 B 파일 전체 해시를 검증과 같은 백엔드로 해시 캐시에 채웁니다."""
+        replaced = {id(row) for row in self.replaced_rows}
+        file_paths = [row.file_b_path for row in rows
+                      if row.status in ('B', 'C') and id(row) not in replaced]
+        hashed = hasher.cache_file_hashes(
+            file_paths, hasher.get_identity_backend(self.hash_algorithm), hash_workers, hash_cache)
+        logging.info(
+            f'복사 검증용 해시: 저장 대상 {len(file_paths)} 건 중 {hashed} 건 계산')
+
+    def find_duplicate_clusters(self, hash_workers=None, hash_cache=None):
+        """마지막 스캔의 A, B 폴더 전체에서 내용이 같은 파일 묶음(DuplicateCluster)을 찾는 함수"""
+        folder_a, index_a, folder_b, index_b = self.scan_indexes
+        files = {}
+        for folder, index in ((folder_a, index_a), (folder_b, index_b)):
+            for relative_path, stat in index.items():
+                files[os.path.normpath(os.path.join(
+                    folder, relative_path))] = stat
+
+        clusters = hasher.find_duplicate_clusters(
+            files, self.hash_algorithm, hash_workers, hash_cache)
+        wasted_bytes = sum(cluster.wasted_bytes for cluster in clusters)
+        logging.info(
+            f'중복 분석: 파일 {len(files)} 건, 중복 묶음 {len(clusters)} 개, 낭비 {convert_size(wasted_bytes)}')
+        return clusters
+
+
+def get_row_item(file_a_path, file_b_path, type, stat_a=None, stat_b=None):
+    """비교 결과 한 행(RomRow)을 만드는 함수, stat_a, stat_b 는 폴더 색인의 FileStat (없으면 파일을 직접 조회)"""
+    def get_byte_and_time(file_path, stat):
+        if stat is not None:
+            return stat.size, stat.mtime_ns / 1e9
+        return os.path.getsize(file_path), os.path.getmtime(file_path)
+
+    file_a_byte = file_b_byte = 0
+    file_a_time = file_b_time = None
+    in_a = bool(type in ("A", "C", "M") and file_a_path)
+    in_b = bool(type in ("B", "C", "M") and file_b_path)
+
+    if in_a:
+        file_a_byte, file_a_time = get_byte_and_time(file_a_path, stat_a)
+    if in_b:
+        file_b_byte, file_b_time = get_byte_and_time(file_b_path, stat_b)
+
+    # 용량 문자열, 파일명 등 표시용 값은 RomRow 에서 읽을 때 만듭니다.
+    return RomRow(file_a_path, file_b_path, type, in_a, in_b,
+                  file_a_byte, file_b_byte, file_a_time, file_b_time)
@@ -0,0 +1,489 @@
+import errno
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from core.gui.helpers import convert_size
+from core.gui import hasher, delta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 이 크기 이상의 파일은 큰 파일 전용 작업자에서 복사합니다. (64MB)
+LARGE_FILE_SIZE = 64 * 1024 * 1024
+# 작은 파일 / 큰 파일 복사 작업자 수 기본값
+SMALL_FILE_WORKERS = 8
+LARGE_FILE_WORKERS = 2
+# 진행 상황 보고 간격 (초)
+PROGRESS_INTERVAL = 0.2
+# 패치 저장을 시도할 최소 파일 크기 (1MB), 작은 파일은 그대로 복사합니다.
+DELTA_MIN_SIZE = 1024 * 1024
+# 이동 / 이름 변경(M) 파일 목록을 기록할 파일 이름 (output 폴더 또는 압축 파일 안)
+MOVE_MANIFEST = 'moved_files.txt'
+
+# output 폴더 생성 방식: copy(복사), hardlink(하드 링크), symlink(심볼릭 링크)
+OUTPUT_MODES = ('copy', 'hardlink', 'symlink')
+
+# linux/fs.h 의 FICLONE ioctl (btrfs, xfs 등 CoW 파일시스템의 reflink 복사)
+FICLONE = 0x40049409
+# 커널 복사 방식을 시도할 순서, 모두 실패하면 shutil.copy2 로 복사합니다.
+KERNEL_COPY_BACKENDS = [backend for backend, available in (
+    ('reflink', fcntl is not None and os.name == 'posix'),
+    ('copy_file_range', hasattr(os, 'copy_file_range')),
+    ('sendfile', hasattr(os, 'sendfile') and os.name == 'posix'),
+) if available]
+# 파일시스템이 지원하지 않는 복사 방식에서 발생하는 오류 (장치 조합 전체에서 해당 방식을 사용하지 않습니다.)
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP,
+                      getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+# 특수 파일 등 해당 파일에서만 다음 복사 방식으로 넘기는 오류
+FALLBACK_ERRNOS = {errno.EINVAL, errno.ENOTTY, errno.EBADF}
+
+# (복사 방식, 원본 장치, 대상 장치) -> 지원하지 않는 것이 확인된 조합
+_unsupported_backends = set()
+# 장치 조합별로 처음 선택된 복사 방식만 로그로 남깁니다.
+_logged_backends = set()
+_backend_lock = threading.Lock()
+# 검증 복사용 버퍼를 작업 스레드마다 한번만 할당해 재사용합니다.
+_stream_buffers = threading.local()
+
+# 복사할 파일 한 건: 원본 경로, 대상 경로, 파일 크기, 패치 기준 파일(C 상태의 A 파일)
+CopyJob = namedtuple('CopyJob', ['source_path', 'target_path', 'size', 'base_path'],
+                     defaults=(None,))
+
+
+def plan_copy_jobs(roms_list, output_folder, folder_a, folder_b):
+    """
+    비교 결과 행에서 output 폴더로 복사할 작업 목록을 만드는 함수.
+    A 에만 있는 파일은 A 폴더 기준, 나머지(B, C)는 B 폴더 기준 상대 경로로 복사합니다.
+    """
+    jobs = []
+    for rom in roms_list:
+        status = rom['status']
+        base_path = None
+        if status == 'A':
+            source_path, source_folder, size = rom['file_a_path'], folder_a, rom['file_a_byte']
+        elif status in ('B', 'C'):
+            source_path, source_folder, size = rom['file_b_path'], folder_b, rom['file_b_byte']
+            if status == 'C':
+                base_path = os.path.normpath(rom['file_a_path'])
+        else:
+            continue
+        source_path = os.path.normpath(source_path)
+        relative_path = os.path.relpath(source_path, source_folder)
+        jobs.append(CopyJob(source_path, os.path.normpath(
+            os.path.join(output_folder, relative_path)), size, base_path))
+    return jobs
+
+
+def get_moved_files(roms_list, folder_a, folder_b):
+    """이동 / 이름 변경(M) 행의 (A 상대 경로, B 상대 경로) 목록을 반환하는 함수"""
+    return [(os.path.relpath(os.path.normpath(rom['file_a_path']), folder_a),
+             os.path.relpath(os.path.normpath(rom['file_b_path']), folder_b))
+            for rom in roms_list if rom['status'] == 'M']
+
+
+def format_move_manifest(moved_files):
+    """이동 목록 파일 내용: 한 줄에 'A 상대 경로<TAB>B 상대 경로' (경로 구분자는 /)"""
+    return ''.join(f"{path_a.replace(os.sep, '/')}\t{path_b.replace(os.sep, '/')}\n"
+                   for path_a, path_b in moved_files)
+
+
+def split_duplicate_jobs(jobs, clusters):
+    """
+    중복 묶음(DuplicateCluster) 기준으로 작업을 나누는 함수.
+    (내용마다 처음 한번만 기록할 작업, [(중복 작업, 먼저 기록하는 같은 내용의 작업)]) 을 반환합니다.
+    """
+    cluster_index = {file_path: i for i, cluster in enumerate(clusters)
+                     for file_path in cluster.paths}
+    primary_jobs = {}
+    unique_jobs = []
+    duplicates = []
+    for job in jobs:
+        i = cluster_index.get(job.source_path)
+        if i is None:
+            unique_jobs.append(job)
+        elif i in primary_jobs:
+            duplicates.append((job, primary_jobs[i]))
+        else:
+            primary_jobs[i] = job
+            unique_jobs.append(job)
+    return unique_jobs, duplicates
+
+
+def save_update_folder(jobs, output_folder, moved_files=(), output_mode='copy', verify=False, hash_cache=None,
+                       use_delta=False, duplicate_clusters=None, progress=None, hash_algorithm='blake2',
+                       verify_readback=False):
+    """
+    업데이트 대상 작업을 output 폴더에 기록하고 CopyStats 를 반환하는 함수. (GUI, 명령행 공통)
+    중복 묶음이 주어지면 같은 내용은 한번만 복사하고, 이동 목록은 moved_files.txt 로 남깁니다.
+    검증시에는 스캔과 같은 해시 백엔드(hash_algorithm)로 계산해야 캐시된 해시와 비교할 수 있습니다.
+    verify_readback 이면 기록한 파일을 다시 읽어서도 검증합니다.
+    """
+    duplicates = ()
+    if duplicate_clusters and output_mode == 'copy':
+        # 링크 방식은 내용을 다시 기록하지 않으므로 복사할 때만 중복을 나눕니다.
+        jobs, duplicates = split_duplicate_jobs(jobs, duplicate_clusters)
+    stats = BulkCopier(progress=progress, output_mode=output_mode, verify=verify,
+                       hash_cache=hash_cache, hash_algorithm=hash_algorithm,
+                       use_delta=use_delta, verify_readback=verify_readback).run(jobs, duplicates)
+    if moved_files:
+        # 이동 / 이름 변경 파일은 복사하지 않고 목록만 남깁니다.
+        os.makedirs(output_folder, exist_ok=True)
+        with open(os.path.join(output_folder, MOVE_MANIFEST), 'w', encoding='utf-8') as f:
+            f.write(format_move_manifest(moved_files))
+    return stats
+
+
+def make_target_dirs(jobs):
+    """복사 대상 폴더를 미리 한번씩만 생성하는 함수"""
+    target_dirs = {os.path.dirname(job.target_path) for job in jobs}
+    for target_dir in sorted(target_dirs):
+        os.makedirs(target_dir, exist_ok=True)
+    return len(target_dirs)
+
+
+def kernel_copy(backend, source_fd, target_fd, size):
+    """커널 안에서 파일 내용을 복사하는 함수, 사용자 공간 버퍼를 거치지 않습니다."""
+    if backend == 'reflink':
+        fcntl.ioctl(target_fd, FICLONE, source_fd)
+        return size
+
+    offset = 0
+    while offset < size:
+        if backend == 'copy_file_range':
+            sent = os.copy_file_range(source_fd, target_fd, size - offset)
+        else:
+            sent = os.sendfile(target_fd, source_fd, offset, size - offset)
+        if sent == 0:
+            # 복사 도중 줄어든 파일, 크기와 실제 내용이 다른 특수 파일 등 (호출한 쪽에서 일반 복사로 넘깁니다.)
+            break
+        offset += sent
+    return offset
+
+
+def copy_file(source_path, target_path):
+    """
+    파일 하나를 복사하는 함수, (복사한 바이트 수, 복사 방식) 을 반환합니다.
+    reflink -> copy_file_range -> sendfile 순서로 시도하고, 모두 지원하지 않으면 shutil.copy2 로 복사합니다.
+    어느 방식이든 수정시각 등 메타데이터는 copy2 와 같이 복사합니다.
+    """
+    source_dev = os.stat(source_path).st_dev
+    target_dev = os.stat(os.path.dirname(target_path) or '.').st_dev
+
+    with open(source_path, 'rb') as source_file:
+        size = os.fstat(source_file.fileno()).st_size
+        for backend in KERNEL_COPY_BACKENDS:
+            key = (backend, source_dev, target_dev)
+            if key in _unsupported_backends:
+                continue
+            try:
+                with open(target_path, 'wb') as target_file:
+                    copied_bytes = kernel_copy(
+                        backend, source_file.fileno(), target_file.fileno(), size)
+            except OSError as e:
+                if e.errno in UNSUPPORTED_ERRNOS:
+                    with _backend_lock:
+                        _unsupported_backends.add(key)
+                    logging.debug(f'{backend} 복사 미지원: {source_path} ({e})')
+                elif e.errno in FALLBACK_ERRNOS:
+                    logging.debug(f'{backend} 복사 실패, 다음 방식으로 복사합니다: {source_path} ({e})')
+                else:
+                    raise
+                source_file.seek(0)
+                continue
+            if copied_bytes != size:
+                # 이 파일만 일반 복사로 다시 복사합니다.
+                logging.debug(
+                    f'{backend} 복사 크기 불일치 ({copied_bytes} / {size}), 일반 복사로 복사합니다: {source_path}')
+                break
+            shutil.copystat(source_path, target_path)
+            log_backend(backend, source_dev, target_dev)
+            return copied_bytes, backend
+
+    shutil.copy2(source_path, target_path)
+    log_backend('copy2', source_dev, target_dev)
+    return os.path.getsize(target_path), 'copy2'
+
+
+def stream_copy(source_path, target_path, hash_algorithm='blake2'):
+    """
+    파일을 읽으면서 해시를 계산하고 같은 버퍼를 그대로 쓰는 복사 함수.
+    기록한 바이트의 해시를 다시 읽지 않고 얻을 수 있습니다.
+    (복사한 바이트 수, 해시, 복사 시작 시점의 원본 stat 키) 를 반환합니다.
+    """
+    buffer = getattr(_stream_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = bytearray(hasher.HASH_CHUNK_SIZE)
+        _stream_buffers.buffer = buffer
+    view = memoryview(buffer)
+    hash_obj = hasher.new_hash(hash_algorithm)
+
+    copied_bytes = 0
+    with open(source_path, 'rb', buffering=0) as source_file, open(target_path, 'wb') as target_file:
+        stat = os.fstat(source_file.fileno())
+        stat_key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        while True:
+            read = source_file.readinto(buffer)
+            if not read:
+                break
+            hash_obj.update(view[:read])
+            target_file.write(view[:read])
+            copied_bytes += read
+    shutil.copystat(source_path, target_path)
+    return copied_bytes, hash_obj.hexdigest(), stat_key
+
+
+def hash_written_file(target_path, hash_algorithm='blake2'):
+    """
+    복사한 파일을 다시 읽어 해시를 계산하는 함수 (verify_readback 검증용).
+    가능하면 기록을 디스크에 내리고 페이지 캐시에서 비워 실제로 기록된 내용을 읽도록 합니다.
+    """
+    if hasattr(os, 'posix_fadvise'):
+        with open(target_path, 'rb') as target_file:
+            os.fsync(target_file.fileno())
+            os.posix_fadvise(target_file.fileno(), 0, 0,
+                             os.POSIX_FADV_DONTNEED)
+    return hasher.calculate_file_hash(target_path, hash_algorithm)
+
+
+def link_file(source_path, target_path, output_mode='copy'):
+    """
+    output_mode 에 따라 파일을 링크하거나 복사하는 함수, (파일 크기, 사용한 방식) 을 반환합니다.
+    - hardlink: 원본과 같은 파일시스템이면 하드 링크, 아니면 복사
+    - symlink: 원본 절대 경로로 심볼릭 링크 (권한이 없는 등 생성할 수 없으면 복사)
+    """
+    if output_mode == 'hardlink':
+        source_stat = os.stat(source_path)
+        target_dev = os.stat(os.path.dirname(target_path) or '.').st_dev
+        if source_stat.st_dev == target_dev:
+            try:
+                os.link(source_path, target_path)
+                log_backend('hardlink', source_stat.st_dev, target_dev)
+                return source_stat.st_size, 'hardlink'
+            except OSError as e:
+                # FAT/exFAT 처럼 하드 링크가 없는 파일시스템, 링크 수 초과 등
+                logging.debug(f'하드 링크 생성 실패, 복사합니다: {source_path} ({e})')
+    elif output_mode == 'symlink':
+        try:
+            os.symlink(os.path.abspath(source_path), target_path)
+            return os.path.getsize(source_path), 'symlink'
+        except (OSError, NotImplementedError) as e:
+            # Windows 에서 개발자 모드나 관리자 권한이 없는 경우 등
+            logging.debug(f'심볼릭 링크 생성 실패, 복사합니다: {source_path} ({e})')
+    return copy_file(source_path, target_path)
+
+
+def log_backend(backend, source_dev, target_dev):
+    key = (backend, source_dev, target_dev)
+    if key in _logged_backends:
+        return
+    with _backend_lock:
+        _logged_backends.add(key)
+    logging.info(f'파일 복사 방식: {backend} (장치 {source_dev} -> {target_dev})')
+
+
+class CopyStats:
+    """일괄 복사의 진행 상황과 결과"""
+
+    def __init__(self, total_files=0, total_bytes=0):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.failed = []  # (원본 경로, 오류 메시지)
+        self.backends = {}  # 복사 방식 -> 파일 수
+        self.verified = 0  # 스캔 때의 해시 또는 다시 읽은 복사본과 일치한 파일 수
+        self.scan_verified = 0  # 그 중 스캔 때 캐시된 해시와 일치한 파일 수
+        self.unverified = 0  # 비교할 해시가 없어 확인하지 못한 파일 수
+        self.mismatched = []  # 복사본 또는 스캔 때의 해시와 다른 원본 경로
+        self.patched_files = 0  # 전체 파일 대신 패치로 저장한 파일 수
+        self.patch_saved_bytes = 0  # 패치로 줄어든 바이트 수
+        self.deduplicated_files = 0  # 같은 내용을 먼저 기록한 파일에 링크한 파일 수
+        self.deduplicated_bytes = 0  # 중복 제거로 다시 기록하지 않은 바이트 수
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def done_files(self):
+        return self.copied_files + len(self.failed)
+
+    def throughput(self):
+        """초당 복사한 바이트 수"""
+        elapsed = self.elapsed or time.monotonic() - self.started
+        return self.copied_bytes / elapsed if elapsed > 0 else 0
+
+    def summary(self):
+        text = (f'복사 {self.copied_files} / {self.total_files} 건, {convert_size(self.copied_bytes)}, '
+                f'{self.elapsed:.1f} 초 ({convert_size(int(self.throughput()))}/s)')
+        if self.backends:
+            text += ', 방식 ' + ', '.join(f'{backend} {count} 건' for backend,
+                                        count in self.backends.items())
+        if self.failed:
+            text += f', 실패 {len(self.failed)} 건'
+        if self.patched_files:
+            text += f'\n패치: {self.patched_files} 건, 절약 {convert_size(self.patch_saved_bytes)}'
+        if self.deduplicated_files:
+            text += f'\n중복 제거: {self.deduplicated_files} 건, 절약 {convert_size(self.deduplicated_bytes)}'
+        if self.verified or self.mismatched or self.unverified:
+            text += (f'\n검증: 일치 {self.verified} 건 (스캔 해시와 일치 {self.scan_verified} 건), '
+                     f'불일치 {len(self.mismatched)} 건')
+            if self.unverified:
+                text += f', 확인 불가 {self.unverified} 건'
+        return text
+
+
+class BulkCopier:
+    """
+    파일 목록을 작은 파일 / 큰 파일 작업자에 나누어 동시에 복사합니다.
+    큰 파일 몇 개가 작업자를 모두 차지해 수많은 작은 파일이 밀리지 않도록 두 풀을 따로 둡니다.
+    progress 가 주어지면 복사 도중 일정 간격으로 progress(CopyStats) 를 호출합니다.
+    output_mode 가 hardlink / symlink 이면 복사 대신 링크를 만듭니다. (link_file 참고)
+    verify 이면 복사하면서 원본 해시를 계산하고 hash_cache 에 있는 스캔 때의 해시와 비교합니다. (한번 읽기)
+    verify_readback 이면 기록한 파일을 다시 읽어 복사하면서 계산한 해시와도 비교합니다.
+    (이 경우 커널 복사 대신 stream_copy 를 사용하며, 링크는 원본과 같은 파일이므로 검증하지 않습니다.)
+    use_delta 이면 C 상태 파일은 A 파일 기준 패치(.sdpatch)로 저장하고, 패치가 크면 그대로 복사합니다.
+    """
+
+    def __init__(self, small_workers=SMALL_FILE_WORKERS, large_workers=LARGE_FILE_WORKERS,
+                 large_file_size=LARGE_FILE_SIZE, progress=None, progress_interval=PROGRESS_INTERVAL,
+                 output_mode='copy', verify=False, hash_cache=None, hash_algorithm='blake2', use_delta=False,
+                 verify_readback=False):
+        self.use_delta = use_delta
+        self.output_mode = output_mode if output_mode in OUTPUT_MODES else 'copy'
+        self.verify = verify or verify_readback
+        self.verify_readback = verify_readback
+        self.hash_cache = hash_cache
+        # 검증은 해시가 같으면 같은 내용으로 보므로 32비트 체크섬은 사용하지 않습니다.
+        self.hash_algorithm = hasher.get_identity_backend(hash_algorithm)
+        self.small_workers = small_workers
+        self.large_workers = large_workers
+        self.large_file_size = large_file_size
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.lock = threading.Lock()
+
+    def copy_job(self, job, stats):
+        if self.use_delta and job.base_path and job.size >= DELTA_MIN_SIZE:
+            patch_size = delta.write_patch(
+                job.base_path, job.source_path, job.target_path + delta.PATCH_SUFFIX)
+            if patch_size is not None:
+                with self.lock:
+                    stats.copied_files += 1
+                    stats.copied_bytes += patch_size
+                    stats.patched_files += 1
+                    stats.patch_saved_bytes += job.size - patch_size
+                    stats.backends['delta'] = stats.backends.get(
+                        'delta', 0) + 1
+                return job
+        if self.verify and self.output_mode == 'copy':
+            return self.verified_copy_job(job, stats)
+        copied_bytes, backend = link_file(
+            job.source_path, job.target_path, self.output_mode)
+        with self.lock:
+            stats.copied_files += 1
+            stats.copied_bytes += copied_bytes
+            stats.backends[backend] = stats.backends.get(backend, 0) + 1
+        return job
+
+    def verified_copy_job(self, job, stats):
+        copied_bytes, digest, stat_key = stream_copy(
+            job.source_path, job.target_path, self.hash_algorithm)
+        written_digest = hash_written_file(
+            job.target_path, self.hash_algorithm) if self.verify_readback else None
+        expected = None
+        if self.hash_cache is not None:
+            _, expected = self.hash_cache.lookup(
+                job.source_path, self.hash_algorithm, stat_key)
+            if expected is None:
+                # 다음 스캔에서 다시 읽지 않도록 이번에 계산한 해시를 기록합니다.
+                self.hash_cache.put(job.source_path, stat_key,
+                                    self.hash_algorithm, digest)
+
+        matched = written_digest in (None, digest) and expected in (None, digest)
+        with self.lock:
+            stats.copied_files += 1
+            stats.copied_bytes += copied_bytes
+            stats.backends['stream'] = stats.backends.get('stream', 0) + 1
+            if not matched:
+                stats.mismatched.append(job.source_path)
+            elif written_digest is None and expected is None:
+                stats.unverified += 1
+            else:
+                stats.verified += 1
+                if expected is not None:
+                    stats.scan_verified += 1
+        if written_digest not in (None, digest):
+            logging.warning(f'복사 검증 불일치 (기록된 파일이 원본과 다름): {job.source_path}')
+        elif not matched:
+            logging.warning(f'복사 검증 불일치 (스캔 때와 내용이 다름): {job.source_path}')
+        return job
+
+    def run(self, jobs, duplicates=()):
+        """
+        jobs 를 복사하고 CopyStats 를 반환합니다.
+        duplicates [(중복 작업, 같은 내용의 작업)] 는 복사가 끝난 뒤 먼저 복사한 파일에 하드 링크합니다.
+        """
+        duplicate_jobs = [job for job, _ in duplicates]
+        stats = CopyStats(len(jobs) + len(duplicate_jobs),
+                          sum(job.size for job in jobs + duplicate_jobs))
+        dir_count = make_target_dirs(jobs + duplicate_jobs)
+        logging.debug(f'복사 대상 폴더 {dir_count} 건 생성')
+
+        large_jobs = sorted((job for job in jobs if job.size >= self.large_file_size),
+                            key=lambda job: job.size, reverse=True)
+        small_jobs = [job for job in jobs if job.size < self.large_file_size]
+
+        with ThreadPoolExecutor(max_workers=self.small_workers) as small_pool, \
+                ThreadPoolExecutor(max_workers=self.large_workers) as large_pool:
+            futures = {large_pool.submit(self.copy_job, job, stats): job for job in large_jobs}
+            futures.update({small_pool.submit(self.copy_job, job, stats): job for job in small_jobs})
+
+            last_progress = time.monotonic()
+            while futures:
+                done, _ = wait(futures, timeout=self.progress_interval,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = futures.pop(future)
+                    try:
+                        future.result()
+                    except OSError as e:
+                        logging.warning(f'파일 복사 실패: {job.source_path} ({e})')
+                        with self.lock:
+                            stats.failed.append((job.source_path, str(e)))
+                if self.progress and time.monotonic() - last_progress >= self.progress_interval:
+                    last_progress = time.monotonic()
+                    self.progress(stats)
+
+        for job, primary_job in duplicates:
+            try:
+                self.link_duplicate_job(job, primary_job, stats)
+            except OSError as e:
+                logging.warning(f'파일 복사 실패: {job.source_path} ({e})')
+                stats.failed.append((job.source_path, str(e)))
+
+        stats.elapsed = time.monotonic() - stats.started
+        if self.progress:
+            self.progress(stats)
+        logging.info(stats.summary())
+        return stats
+
+    def link_duplicate_job(self, job, primary_job, stats):
+        """같은 내용을 먼저 기록한 output 파일에 하드 링크합니다. (패치로 저장되었거나 실패했으면 원본을 복사)"""
+        if os.path.isfile(primary_job.target_path):
+            _, backend = link_file(
+                primary_job.target_path, job.target_path, 'hardlink')
+        else:
+            _, backend = copy_file(job.source_path, job.target_path)
+        if backend == 'hardlink':
+            stats.deduplicated_files += 1
+            stats.deduplicated_bytes += job.size
+        else:
+            # 하드 링크를 만들지 못해 내용을 다시 기록한 경우
+            stats.copied_bytes += job.size
+        stats.copied_files += 1
+        stats.backends[backend] = stats.backends.get(backend, 0) + 1
@@ -0,0 +1,262 @@
+"""
+rsync 방식(롤링 체크섬)의 블록 단위 바이너리 패치 생성 / 적용 도구.
+A(기존) 파일을 블록 단위로 나누어 서명을 만들고, B(새) 파일에서 같은 블록을 찾아
+A에서 복사할 구간과 새로 기록할 데이터만 패치 파일에 저장합니다.
+
+패치 적용: python -m core.gui.delta apply <A 파일> <패치 파일> <결과 파일>
+(이 모듈은 표준 라이브러리만 사용하므로 파일 하나만 따로 배포해도 동작합니다.)
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+PATCH_MAGIC = b'SSDELTA1'
+PATCH_SUFFIX = '.sdpatch'
+# 헤더: A 크기, B 크기, 블록 크기, A 해시(32), B 해시(32)
+HEADER = struct.Struct('<QQI32s32s')
+COPY_OP = struct.Struct('<QQ')  # b'C' + (A 위치, 길이)
+DATA_OP = struct.Struct('<Q')  # b'D' + (길이) + 데이터
+MIN_BLOCK_SIZE = 4 * 1024
+MAX_BLOCK_SIZE = 1024 * 1024
+# 블록 수가 이 정도가 되도록 블록 크기를 정합니다. (서명 메모리 제한)
+TARGET_BLOCK_COUNT = 16 * 1024
+# 패치가 B 파일 크기의 이 비율을 넘으면 패치를 포기하고 전체 파일을 사용합니다.
+MAX_PATCH_RATIO = 0.5
+# 이만큼 진행한 뒤에도 새 데이터 비율이 MAX_PATCH_RATIO 를 넘으면 더 보지 않고 포기합니다. (관련 없는 파일)
+PROBE_SIZE = 256 * 1024
+ADLER_MOD = 65521
+# 한 바이트씩 밀면서 찾는 구간(일치하지 않는 데이터)이 이만큼을 넘으면 포기합니다. (4MB)
+# 순수 Python 으로 초당 약 1MB 를 처리하므로, 파일마다 쓰는 CPU 시간을 몇 초로 제한합니다.
+MAX_ROLLING_BYTES = 4 * 1024 * 1024
+
+
+def get_block_size(file_size):
+    block_size = MIN_BLOCK_SIZE
+    while block_size < MAX_BLOCK_SIZE and file_size // block_size > TARGET_BLOCK_COUNT:
+        block_size *= 2
+    return block_size
+
+
+def strong_hash(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def file_digest(view):
+    return hashlib.blake2b(view, digest_size=32).digest()
+
+
+def build_signature(view, block_size):
+    """A 파일의 블록 서명 {약한 체크섬: {강한 해시: A 위치}} 을 만드는 함수"""
+    signature = {}
+    for offset in range(0, len(view) - block_size + 1, block_size):
+        block = view[offset:offset + block_size]
+        signature.setdefault(zlib.adler32(block), {}).setdefault(
+            strong_hash(block), offset)
+    return signature
+
+
+class PatchTooLarge(Exception):
+    """패치가 충분히 작지 않아 전체 파일을 사용하는 편이 나은 경우"""
+
+
+class PatchWriter:
+    """연속된 복사 구간을 합치면서 패치 명령을 기록하는 클래스"""
+
+    def __init__(self, file, target_size, max_ratio=MAX_PATCH_RATIO):
+        self.file = file
+        self.max_ratio = max_ratio
+        self.max_data_bytes = int(target_size * max_ratio)
+        self.data_bytes = 0
+        self.copy = None  # 아직 기록하지 않은 (A 위치, 길이)
+
+    def add_copy(self, offset, length):
+        if self.copy and self.copy[0] + self.copy[1] == offset:
+            self.copy = (self.copy[0], self.copy[1] + length)
+            return
+        self.flush_copy()
+        self.copy = (offset, length)
+
+    def add_data(self, data):
+        if not len(data):
+            return
+        self.flush_copy()
+        self.data_bytes += len(data)
+        if self.data_bytes > self.max_data_bytes:
+            raise PatchTooLarge()
+        self.file.write(b'D' + DATA_OP.pack(len(data)))
+        self.file.write(data)
+
+    def check(self, position, pending_bytes):
+        """B 의 position 까지 진행했을 때 새 데이터가 너무 많으면 PatchTooLarge 를 발생시킵니다."""
+        data_bytes = self.data_bytes + pending_bytes
+        if data_bytes > self.max_data_bytes or (
+                position >= PROBE_SIZE and data_bytes > position * self.max_ratio):
+            raise PatchTooLarge()
+
+    def flush_copy(self):
+        if self.copy:
+            self.file.write(b'C' + COPY_OP.pack(*self.copy))
+            self.copy = None
+
+    def close(self):
+        self.flush_copy()
+        self.file.write(b'E')
+
+
+def map_file(file):
+    # 빈 파일은 mmap 할 수 없습니다.
+    if os.fstat(file.fileno()).st_size == 0:
+        return memoryview(b'')
+    return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def write_patch(source_path, target_path, patch_path, max_ratio=MAX_PATCH_RATIO, max_rolling_bytes=MAX_ROLLING_BYTES):
+    """
+    A(source_path) 를 기준으로 B(target_path) 를 만드는 패치를 patch_path 에 기록하는 함수.
+    패치 크기를 반환하며, 패치가 B 크기의 max_ratio 를 넘거나
+    한 바이트씩 찾은 구간이 max_rolling_bytes 를 넘으면 파일을 남기지 않고 None 을 반환합니다. (None 이면 제한 없음)
+    """
+    with open(source_path, 'rb') as source_file, open(target_path, 'rb') as target_file:
+        source = map_file(source_file)
+        target = map_file(target_file)
+        try:
+            block_size = get_block_size(len(source))
+            try:
+                with open(patch_path, 'wb') as patch_file:
+                    patch_file.write(PATCH_MAGIC)
+                    patch_file.write(HEADER.pack(len(source), len(target), block_size,
+                                                 file_digest(source), file_digest(target)))
+                    writer = PatchWriter(patch_file, len(target), max_ratio)
+                    diff_blocks(source, target, block_size,
+                                writer, max_rolling_bytes)
+                    writer.close()
+            except PatchTooLarge:
+                os.remove(patch_path)
+                return None
+        finally:
+            source.release()
+            target.release()
+    return os.path.getsize(patch_path)
+
+
+def diff_blocks(source, target, block_size, writer, max_rolling_bytes=None):
+    """B 를 한 바이트씩 밀면서 A 의 블록과 같은 구간을 찾아 패치 명령으로 기록하는 함수"""
+    signature = build_signature(source, block_size)
+    target_size = len(target)
+    position = 0
+    literal_start = 0
+    weak = None
+    rolled_bytes = 0
+
+    while position + block_size <= target_size:
+        offset = None
+        if (position - literal_start) % block_size == 0:
+            # 블록 크기만큼 진행할 때마다 새 데이터 비율을 확인합니다.
+            writer.check(position, position - literal_start)
+            # 같은 위치의 A 블록과 먼저 비교합니다. (일부 블록만 바뀐 파일은 롤링 없이 바로 맞춰집니다.)
+            if position + block_size <= len(source) and \
+                    target[position:position + block_size] == source[position:position + block_size]:
+                offset = position
+        if offset is None:
+            if weak is None:
+                weak = zlib.adler32(target[position:position + block_size])
+            candidates = signature.get(weak)
+            if candidates:
+                offset = candidates.get(strong_hash(
+                    target[position:position + block_size]))
+
+        if offset is not None:
+            writer.add_data(target[literal_start:position])
+            writer.add_copy(offset, block_size)
+            position += block_size
+            literal_start = position
+            weak = None
+            continue
+
+        # 한 바이트 밀어서 adler32 를 갱신합니다.
+        rolled_bytes += 1
+        if max_rolling_bytes is not None and rolled_bytes > max_rolling_bytes:
+            raise PatchTooLarge()
+        if position + block_size < target_size:
+            out_byte = target[position]
+            in_byte = target[position + block_size]
+            a = weak & 0xffff
+            b = weak >> 16
+            a = (a - out_byte + in_byte) % ADLER_MOD
+            b = (b - block_size * out_byte + a - 1) % ADLER_MOD
+            weak = (b << 16) | a
+        position += 1
+
+    writer.add_data(target[literal_start:])
+
+
+def apply_patch(source_path, patch_path, output_path):
+    """A(source_path) 에 패치를 적용해 B 를 output_path 에 만드는 함수, A / 결과 해시를 모두 검증합니다."""
+    with open(patch_path, 'rb') as patch_file, open(source_path, 'rb') as source_file:
+        if patch_file.read(len(PATCH_MAGIC)) != PATCH_MAGIC:
+            raise ValueError(f'패치 파일 형식이 아닙니다: {patch_path}')
+        source_size, target_size, _, source_digest, target_digest = HEADER.unpack(
+            patch_file.read(HEADER.size))
+        source = map_file(source_file)
+        try:
+            if len(source) != source_size or file_digest(source) != source_digest:
+                raise ValueError(f'패치의 기준 파일과 다른 파일입니다: {source_path}')
+
+            hash_obj = hashlib.blake2b(digest_size=32)
+            with open(output_path, 'wb') as output_file:
+                while True:
+                    op = patch_file.read(1)
+                    if op == b'C':
+                        offset, length = COPY_OP.unpack(
+                            patch_file.read(COPY_OP.size))
+                        data = source[offset:offset + length]
+                    elif op == b'D':
+                        length, = DATA_OP.unpack(patch_file.read(DATA_OP.size))
+                        data = patch_file.read(length)
+                    elif op == b'E':
+                        break
+                    else:
+                        raise ValueError(f'손상된 패치 파일입니다: {patch_path}')
+                    hash_obj.update(data)
+                    output_file.write(data)
+        finally:
+            source.release()
+
+    if os.path.getsize(output_path) != target_size or hash_obj.digest() != target_digest:
+        raise ValueError(f'패치 적용 결과가 원본과 다릅니다: {output_path}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m core.gui.delta', description='Sinsis Diff 바이너리 패치 도구')
+    sub_parsers = parser.add_subparsers(dest='command', required=True)
+    create_parser = sub_parsers.add_parser('create', help='패치 생성')
+    create_parser.add_argument('source', help='기존(A) 파일')
+    create_parser.add_argument('target', help='새(B) 파일')
+    create_parser.add_argument('patch', help='패치 파일')
+    apply_parser = sub_parsers.add_parser('apply', help='패치 적용')
+    apply_parser.add_argument('source', help='기존(A) 파일')
+    apply_parser.add_argument('patch', help='패치 파일')
+    apply_parser.add_argument('output', help='결과(B) 파일')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'create':
+            patch_size = write_patch(
+                args.source, args.target, args.patch, max_ratio=1.0, max_rolling_bytes=None)
+            print(f'패치 생성: {args.patch} ({patch_size} bytes)')
+        else:
+            apply_patch(args.source, args.patch, args.output)
+            print(f'패치 적용: {args.output}')
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
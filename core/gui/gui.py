@@ -8,13 +8,15 @@ import qdarktheme
 import subprocess
 import platform
 from .behavior import GuiBehavior
+from .model import RomTableModel
+from . import hasher
 from PyQt5.QtCore import Qt, QObject, QEvent, QSize
 from PyQt5.QtSvg import QSvgWidget
-from PyQt5.QtGui import QIcon, QStandardItemModel, QPixmap, QFontDatabase, QFont, QColor, QCursor, QStandardItem
+from PyQt5.QtGui import QIcon, QPixmap, QFontDatabase, QFont, QColor, QCursor
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QGridLayout, QPushButton,  QWidget,
                              QTableView,  QHBoxLayout, QVBoxLayout, QAbstractItemView, QMenu, QAction,
                              QAbstractScrollArea, QLabel, QLineEdit, QStackedWidget, QMessageBox, QTextEdit,
-                             QFormLayout, QListWidget, QComboBox, QSizePolicy, QHeaderView, QHeaderView, QStyledItemDelegate)
+                             QFormLayout, QListWidget, QComboBox, QCheckBox, QSizePolicy, QHeaderView, QHeaderView, QStyledItemDelegate)
 from .helpers import *
 
 
@@ -25,6 +27,7 @@ class Gui:
         self.font = None
         self.table_model = None
         self.msg_box = None
+        self.actions = None
 
         # Init DB
         database_init()
@@ -57,11 +60,10 @@ class Gui:
         self.settings_win()
         self.actions.handle_init()
 
-        # 셀 편집 완료 시 이벤트 연결
-        self.table_model.itemChanged.connect(self.handle_item_changed)
         # Connect the model signals to update the status bar
         self.table_model.rowsInserted.connect(self.update_titlebar)
         self.table_model.rowsRemoved.connect(self.update_titlebar)
+        self.table_model.modelReset.connect(self.update_titlebar)
 
         sys.exit(app.exec_())
 
@@ -71,6 +73,19 @@ class Gui:
 
         self.main.setWindowTitle(title_text)
 
+    def update_scan_progress(self, files_examined, bytes_hashed):
+        # 스캔 도중에는 로딩 오버레이 대신 테이블과 진행 상황을 보여줍니다.
+        self.main.loading_overlay.hide()
+        count = len(self.actions.all_roms_list)
+        title_text = f"{self.app_name} [ 비교 중: 검사 파일 {files_examined} / 읽은 용량 {convert_size(bytes_hashed)} / 비교 대상 파일 수: {count} ]"
+
+        self.main.setWindowTitle(title_text)
+
+    def update_copy_progress(self, done_files, total_files, copied_bytes, throughput):
+        title_text = f"{self.app_name} [ 업데이트 저장 중: {done_files} / {total_files} 건, {convert_size(copied_bytes)} ({convert_size(int(throughput))}/s) ]"
+
+        self.main.setWindowTitle(title_text)
+
     def main_init(self):
         # Define Main Window
         self.main = QMainWindow()
@@ -86,8 +101,6 @@ class Gui:
         # Table
         self.table = QTableView()
 
-        headers = ['상태', '상위 폴더', '파일 경로', '기준 파일 이름', '수정 일시', '파일 용량', '',
-                   '파일 경로', '수정 일시', '파일 용량', '파일 이름']
         self.table.setSizeAdjustPolicy(
             QAbstractScrollArea.AdjustToContentsOnFirstShow)
         self.table.horizontalHeader().setStretchLastSection(True)
@@ -103,9 +116,8 @@ class Gui:
         self.table.horizontalHeader().sectionClicked.connect(self.on_header_clicked)
         self.table.verticalHeader().hide()
 
-        # 테이블 간격 조정
-        self.table_model = QStandardItemModel()
-        self.table_model.setHorizontalHeaderLabels(headers)
+        # 비교 결과 목록을 그대로 읽는 테이블 모델
+        self.table_model = RomTableModel(self)
 
         # 헤더의 폰트 크기 설정
         header = self.table.horizontalHeader()
@@ -137,6 +149,8 @@ class Gui:
         self.table.setColumnHidden(3, True)
         self.table.setColumnHidden(4, True)
         self.table.setColumnHidden(5, True)
+        self.table.setColumnHidden(11, True)
+        self.table.setColumnHidden(12, True)
 
         # '원본 파일명' 열을 오름차순으로 정렬합니다.
         self.table.sortByColumn(0, Qt.AscendingOrder)
@@ -163,6 +177,9 @@ class Gui:
         self.main.save_btn = QPushButton(
             QIcon(absp('res/icon/save.svg')), ' 업데이트 저장')
 
+        self.main.dedup_btn = QPushButton(
+            QIcon(absp('res/icon/clipboard.svg')), ' 중복 분석')
+
         large_font = QFont(self.font)
         large_font.setPointSize(10)
 
@@ -170,44 +187,19 @@ class Gui:
         self.main.scan_btn.setFont(large_font)
         self.main.except_btn.setFont(large_font)
         self.main.save_btn.setFont(large_font)
+        self.main.dedup_btn.setFont(large_font)
 
         self.main.settings_btn.setStyleSheet("color: #333333;")
         self.main.scan_btn.setStyleSheet("color: #333333;")
         self.main.except_btn.setStyleSheet("color: #333333;")
         self.main.save_btn.setStyleSheet("color: #333333;")
-
-        self.main.page_label = QLabel()
-        self.main.page_prev_btn = QPushButton()
-        self.main.page_next_btn = QPushButton()
-
-        # 버튼 아이콘 설정
-        self.main.page_prev_btn.setIcon(
-            QIcon(absp('res/icon/chevron-left.svg')))
-        self.main.page_next_btn.setIcon(
-            QIcon(absp('res/icon/chevron-right.svg')))
-
-        self.main.page_label.setFont(self.font)
-        self.main.page_prev_btn.setFont(self.font)
-        self.main.page_next_btn.setFont(self.font)
-        self.main.page_prev_btn.setEnabled(False)
-        self.main.page_next_btn.setEnabled(False)
-        self.main.page_prev_btn.setStyleSheet("color: #333333;")
-        self.main.page_next_btn.setStyleSheet("color: #333333;")
+        self.main.dedup_btn.setStyleSheet("color: #333333;")
 
         # 모든 버튼에 대해 커서 설정
-        for button in [self.main.page_prev_btn, self.main.page_next_btn, self.main.settings_btn, self.main.scan_btn, self.main.except_btn, self.main.save_btn]:
+        for button in [self.main.settings_btn, self.main.scan_btn, self.main.except_btn, self.main.save_btn,
+                       self.main.dedup_btn]:
             button.setCursor(Qt.PointingHandCursor)
 
-        # 페이징 라벨 추가
-        self.main.page_label.setAlignment(Qt.AlignCenter)
-
-        # 아래에 페이지 관련 위젯을 추가
-        button_container = QWidget(self.main)
-        button_layout = QGridLayout(button_container)
-        button_layout.setContentsMargins(0, 0, 0, 0)
-        button_layout.addWidget(self.main.page_prev_btn, 1, 0)
-        button_layout.addWidget(self.main.page_next_btn, 1, 1)
-
         # self.log_textedit = QTextEdit(self.main)
         # self.log_textedit.setReadOnly(True)
         # self.log_textedit.setFixedHeight(150)  # 높이를 200 픽셀로 설정
@@ -227,8 +219,7 @@ class Gui:
         grid.addWidget(self.main.scan_btn, 3, 1)
         grid.addWidget(self.main.except_btn, 3, 2)
         grid.addWidget(self.main.save_btn, 3, 3)
-        grid.addWidget(self.main.page_label, 3, 5)
-        grid.addWidget(button_container, 3, 6)
+        grid.addWidget(self.main.dedup_btn, 3, 4)
 
         self.main.setWindowFlags(self.main.windowFlags()
                                  & Qt.CustomizeWindowHint)
@@ -254,12 +245,12 @@ class Gui:
             column = index.column()
 
             if column == 6:
-                status = self.table_model.item(row, 11).text()
+                status = self.table_model.rom(row)['status']
                 if status in ["A", "B", "C"]:
                     self.table.setCursor(QCursor(Qt.PointingHandCursor))
             else:
                 cell_text = model.data(index, Qt.DisplayRole)  # 해당 셀의 데이터 가져오기
-                if cell_text.strip():
+                if cell_text and cell_text.strip():
                     self.table.setCursor(QCursor(Qt.PointingHandCursor))
                 else:
                     self.table.setCursor(QCursor(Qt.ArrowCursor))
@@ -270,9 +261,8 @@ class Gui:
         self.main.scan_btn.clicked.connect(self.actions.set_scan_file)
         self.main.except_btn.clicked.connect(self.actions.set_except)
         self.main.save_btn.clicked.connect(self.actions.set_save_output)
-        # 페이지 이전/다음 버튼 클릭 시 해당 함수 연결
-        self.main.page_prev_btn.clicked.connect(self.actions.prev_page)
-        self.main.page_next_btn.clicked.connect(self.actions.next_page)
+        self.main.dedup_btn.clicked.connect(
+            self.actions.set_analyze_duplicates)
 
         self.table.setMouseTracking(True)
 
@@ -284,8 +274,7 @@ class Gui:
             self.main.scan_btn.setEnabled(False)
             self.main.except_btn.setEnabled(False)
             self.main.save_btn.setEnabled(False)
-            self.main.page_prev_btn.setEnabled(False)
-            self.main.page_next_btn.setEnabled(False)
+            self.main.dedup_btn.setEnabled(False)
 
     # 로딩 오버레이를 비활성화하는 메서드
     def hide_loading_overlay(self):
@@ -295,6 +284,7 @@ class Gui:
             self.main.scan_btn.setEnabled(True)
             self.main.except_btn.setEnabled(True)
             self.main.save_btn.setEnabled(True)
+            self.main.dedup_btn.setEnabled(True)
 
     def settings_win(self):
         # Define Settings Win
@@ -326,14 +316,80 @@ class Gui:
         vbox.setAlignment(Qt.AlignTop)
         form_layout = QFormLayout()
 
-        form_layout.addRow(QLabel('작업시 제외할 확장자 (,콤마로 입력)'))
+        form_layout.addRow(QLabel('작업시 제외할 확장자 / 규칙 (,콤마로 입력)'))
         self.file_directory_except_ext = QLineEdit()
+        # 폴더 규칙(끝에 /)은 폴더를 읽기 전에 통째로 건너뜁니다. (규칙 형식은 rules.py 참고)
+        self.file_directory_except_ext.setPlaceholderText(
+            '.txt, *.bak, .git/, __pycache__/, re:패턴, size>1GB, age>30d')
         if self.actions.settings is not None:
             self.file_directory_except_ext.setText(self.actions.settings[3])
             self.file_directory_except_ext.repaint()
 
         form_layout.addRow(self.file_directory_except_ext)
 
+        # 해시 비교 작업자 설정
+        form_layout.addRow(QLabel('해시 비교 작업자 수 (0 입력시 자동)'))
+        self.hash_workers_input = QLineEdit()
+        self.hash_executor_combo = QComboBox()
+        self.hash_executor_combo.addItem('스레드', 'thread')
+        self.hash_executor_combo.addItem('프로세스', 'process')
+        if self.actions.settings is not None:
+            self.hash_workers_input.setText(self.actions.settings[4])
+            self.hash_workers_input.repaint()
+
+        form_layout.addRow(self.hash_executor_combo, self.hash_workers_input)
+
+        # 내용 비교 방식
+        form_layout.addRow(QLabel('내용 비교 방식'))
+        self.compare_mode_combo = QComboBox()
+        self.compare_mode_combo.addItem('자동 (캐시된 해시가 없으면 직접 비교)', 'auto')
+        self.compare_mode_combo.addItem('해시 비교', 'hash')
+        self.compare_mode_combo.addItem('직접 비교', 'direct')
+        form_layout.addRow(self.compare_mode_combo)
+
+        # 해시 백엔드 (자동: 실행시 한번 측정하여 가장 빠른 것을 사용)
+        form_layout.addRow(QLabel('해시 방식'))
+        self.hash_backend_combo = QComboBox()
+        self.hash_backend_combo.addItem('자동 (가장 빠른 해시)', 'auto')
+        for name, backend in hasher.HASH_BACKENDS.items():
+            # 32비트 체크섬은 C 상태 변경 확인에만 쓰고, 이동 감지 / 중복 분석 / 검증은 더 긴 해시로 합니다.
+            note = ', 변경 확인 전용' if backend.digest_bits < hasher.MIN_IDENTITY_DIGEST_BITS else ''
+            self.hash_backend_combo.addItem(
+                f'{name} ({backend.digest_bits}비트{note})', name)
+        form_layout.addRow(self.hash_backend_combo)
+        self.detect_moves_check = QCheckBox(
+            'A에만 / B에만 있는 파일 중 내용이 같은 파일은 이동 / 이름 변경으로 표시')
+        form_layout.addRow(self.detect_moves_check)
+
+        # 폴더 조회 동시 작업 수 (네트워크 드라이브는 크게 설정)
+        form_layout.addRow(QLabel('폴더 조회 동시 작업 수 (기본 8)'))
+        self.walk_workers_input = QLineEdit()
+        form_layout.addRow(self.walk_workers_input)
+
+        # 업데이트 저장시 output 폴더 생성 방식
+        form_layout.addRow(QLabel('업데이트 저장 방식 (링크는 같은 드라이브에서만 사용)'))
+        self.output_mode_combo = QComboBox()
+        self.output_mode_combo.addItem('파일 복사', 'copy')
+        self.output_mode_combo.addItem('하드 링크 (다른 드라이브는 복사)', 'hardlink')
+        self.output_mode_combo.addItem('심볼릭 링크', 'symlink')
+        form_layout.addRow(self.output_mode_combo)
+        self.verify_copy_check = QCheckBox('복사하면서 스캔 때의 해시와 비교하여 검증')
+        form_layout.addRow(self.verify_copy_check)
+        self.verify_readback_check = QCheckBox('복사한 파일을 다시 읽어서도 검증 (느림)')
+        form_layout.addRow(self.verify_readback_check)
+        self.delta_mode_check = QCheckBox(
+            'Hash 불일치 파일은 바뀐 블록만 패치(.sdpatch)로 저장 (폴더 저장시)')
+        form_layout.addRow(self.delta_mode_check)
+
+        # 업데이트 저장 형식 (폴더 또는 압축 파일)
+        form_layout.addRow(QLabel('업데이트 저장 형식 / 압축 레벨 (빈 값은 기본값)'))
+        self.output_format_combo = QComboBox()
+        self.output_format_combo.addItem('output 폴더', 'folder')
+        self.output_format_combo.addItem('zip 압축 파일', 'zip')
+        self.output_format_combo.addItem('tar.zst 압축 파일', 'tar.zst')
+        self.compress_level_input = QLineEdit()
+        form_layout.addRow(self.output_format_combo, self.compress_level_input)
+
         # Folder Directory 1
         form_layout.addRow(QLabel('기준 A 폴더 경로를 선택합니다.'))
 
@@ -412,53 +468,34 @@ class Gui:
     def on_cell_clicked(self, index):
         row = index.row()
         column = index.column()
-        if column == 2:
-            # 셀의 내용을 가져옵니다.
-            file_path = self.table_model.item(row, 2).text()
-            if file_path:
-                self.open_in_explorer(file_path)
-        elif column == 7:
+        if column == 2 or column == 7:
             # 셀의 내용을 가져옵니다.
-            file_path = self.table_model.item(row, 7).text()
+            file_path = self.table_model.data(index, Qt.DisplayRole)
             if file_path:
                 self.open_in_explorer(file_path)
         elif column == 6:
-            # 셀의 내용을 가져옵니다.
-            icon = self.table_model.item(row, 6)
-            status = self.table_model.item(row, 11).text()
-            file_a_path = self.table_model.item(row, 2).text()
-            file_b_path = self.table_model.item(row, 7).text()
+            rom = self.table_model.rom(row)
+            status = rom['status']
+            file_a_path = rom['file_a_path'] if rom['file_a_name'] else ''
+            file_b_path = rom['file_b_path'] if rom['file_b_name'] else ''
 
-            if status in ['E']:
+            # 이동 / 이름 변경(M) 파일은 복사하지 않고 업데이트 저장시 목록(moved_files.txt)으로만 기록합니다.
+            if status in ['E', 'M']:
                 return
             if status == 'C':
                 self.actions.copy_file_to_target_folder(
                     file_a_path, file_b_path, status)
                 return
-            if icon and status:
+            if status:
                 self.actions.copy_file_to_target_folder(
                     file_a_path, file_b_path, status)
                 # 목록에서 예외처리
                 self.actions.update_row_from_all_roms_list(
-                    file_b_path, 'except')
-                self.actions.remove_roms_list.append(file_b_path)
-                self.table_model.item(row, 0).setText('파일 복사')
-                self.table_model.item(row, 0).setForeground(
-                    QColor(0, 204, 153))
-                self.table_model.item(row, 11).setText('E')
-
-                icon_path = absp('res/icon/check-square.svg')
-                icon = QIcon(icon_path)
-                size = QSize(32, 32)
-                pixmap = icon.pixmap(size)
-                work_icon = QIcon(pixmap)
-                file_work_item = QStandardItem()
-                file_work_item.setIcon(work_icon)
-                file_work_item.setFlags(file_work_item.flags(
-                ) & ~Qt.ItemIsEditable | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                file_work_item.setTextAlignment(
-                    Qt.AlignVCenter | Qt.AlignCenter)
-                self.table_model.setItem(row, 6, file_work_item)
+                    rom['file_path'], 'except')
+                self.actions.remove_roms_list.add(rom['file_b_path'])
+                rom['work_state'] = 'copied'
+                rom['status'] = 'E'
+                self.table_model.refresh_rows([row])
 
     def open_in_explorer(self, file_path):
         folder_path = os.path.dirname(file_path)  # 파일의 폴더 경로를 얻습니다.
@@ -492,7 +529,7 @@ class Gui:
             self.actions.all_roms_list.sort(key=lambda rom: (
                 rom[column[logical_index]] is None, rom[column[logical_index]]), reverse=(order == Qt.DescendingOrder))
 
-            # 현재 페이지를 다시 그립니다.
+            # 정렬된 목록으로 다시 그립니다.
             self.actions.populate_table_with_roms()
 
             # 정렬 방향을 토글하며 해당 열을 소팅합니다.
@@ -503,17 +540,6 @@ class Gui:
                 self.table.sortByColumn(logical_index, Qt.AscendingOrder)
                 self.table.horizontalHeader().setSortIndicator(logical_index, Qt.DescendingOrder)
 
-    def handle_item_changed(self, item):
-        # 아이템이 속한 모델을 가져옵니다.
-        # 변경된 아이템의 행과 열 번호를 얻습니다.
-        row = item.row()
-        column = item.column()
-        # 셀의 값이 변경되면 호출되는 메서드
-
-        if column == 0:
-            status = item.model().item(row, 0).text()
-            print(status)
-
 
 class QtHandler(logging.Handler):
     def __init__(self, log_append_function):
@@ -0,0 +1,646 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from core.gui.helpers import convert_size, get_worker_count
+
+try:
+    import xxhash
+except ImportError:  # xxhash 패키지가 있을 때만 xxh3 백엔드를 사용합니다.
+    xxhash = None
+
+try:
+    import blake3
+except ImportError:  # blake3 패키지가 있을 때만 blake3 백엔드를 사용합니다.
+    blake3 = None
+
+# 해시 계산시 한번에 읽어들일 크기 (1MB)
+HASH_CHUNK_SIZE = 1024 * 1024
+# 부분 해시 비교시 파일 앞/뒤에서 읽을 크기 (64KB)
+PARTIAL_CHUNK_SIZE = 64 * 1024
+# 직접 비교시 한번에 읽어들일 크기 (4MB, 페이지 크기의 배수)
+DIRECT_CHUNK_SIZE = 4 * 1024 * 1024
+# 비교 방식: auto(캐시된 해시가 없으면 직접 비교), hash(전체 해시), direct(직접 비교)
+COMPARE_MODES = ('auto', 'hash', 'direct')
+
+# 해시 백엔드 자동 선택시 측정할 데이터 크기 (2MB) 와 반복 횟수
+BENCHMARK_SIZE = 2 * 1024 * 1024
+BENCHMARK_ROUNDS = 3
+# 자동 선택 대상 백엔드의 최소 해시 길이, 32비트 체크섬은 직접 선택할 때만 사용합니다.
+MIN_AUTO_DIGEST_BITS = 64
+# 해시만 보고 같은 내용이라고 판단하는 작업(이동 감지, 중복 분석, 복사 검증)에 필요한 최소 해시 길이
+# 32비트 체크섬은 충돌을 쉽게 만들 수 있으므로 C 상태 변경 확인에만 사용합니다.
+MIN_IDENTITY_DIGEST_BITS = 64
+# 해시 캐시에 기록된 백엔드보다 이 배수 이상 빠를 때만 자동 선택 백엔드를 바꿉니다.
+# (측정 오차로 바뀌면 캐시된 해시를 모두 다시 계산해야 합니다.)
+AUTO_SWITCH_RATIO = 1.5
+
+# 직접 비교용 버퍼를 작업 스레드마다 한번만 할당해 재사용합니다.
+_direct_buffers = threading.local()
+# 자동 선택용 벤치마크 결과 {이름: 초당 바이트 수} (프로세스마다 처음 한번만 측정합니다.)
+_auto_results = None
+_auto_backend_lock = threading.Lock()
+
+
+class ChecksumHash:
+    """zlib.crc32, adler32 같은 정수 체크섬 함수를 hashlib 객체처럼 사용하기 위한 래퍼"""
+    __slots__ = ('func', 'value')
+
+    def __init__(self, func, value):
+        self.func = func
+        self.value = value
+
+    def update(self, data):
+        self.value = self.func(data, self.value)
+
+    def hexdigest(self):
+        return format(self.value, '08x')
+
+
+# 해시 백엔드: 이름, 해시 객체 생성 함수 (update / hexdigest), 해시 길이 (비트)
+HashBackend = namedtuple('HashBackend', ['name', 'factory', 'digest_bits'])
+HASH_BACKENDS = {}
+
+
+def register_hash_backend(name, factory, digest_bits):
+    """해시 백엔드를 등록하는 함수, 해시 캐시에는 이 이름이 해시와 함께 기록됩니다."""
+    HASH_BACKENDS[name] = HashBackend(name, factory, digest_bits)
+
+
+register_hash_backend('md5', hashlib.md5, 128)
+register_hash_backend('sha256', hashlib.sha256, 256)
+register_hash_backend('sha3', hashlib.sha3_256, 256)
+register_hash_backend('blake2', hashlib.blake2b, 512)
+register_hash_backend('crc32', lambda: ChecksumHash(zlib.crc32, 0), 32)
+register_hash_backend('adler32', lambda: ChecksumHash(zlib.adler32, 1), 32)
+if xxhash is not None:
+    register_hash_backend('xxh3_64', xxhash.xxh3_64, 64)
+    register_hash_backend('xxh3_128', xxhash.xxh3_128, 128)
+if blake3 is not None:
+    register_hash_backend('blake3', blake3.blake3, 256)
+
+
+def get_identity_backend(hash_algorithm):
+    """해시가 같으면 같은 내용으로 볼 수 있는 백엔드 이름을 반환하는 함수, 32비트 체크섬은 xxh3_128 또는 blake2 로 바꿉니다."""
+    backend = HASH_BACKENDS.get(hash_algorithm)
+    if backend is not None and backend.digest_bits >= MIN_IDENTITY_DIGEST_BITS:
+        return hash_algorithm
+    return 'xxh3_128' if 'xxh3_128' in HASH_BACKENDS else 'blake2'
+
+
+def new_hash(hash_algorithm='md5'):
+    """백엔드 이름에 해당하는 해시 객체를 생성하는 함수"""
+    backend = HASH_BACKENDS.get(hash_algorithm)
+    if backend is None:
+        raise ValueError("Unsupported hash algorithm")
+    return backend.factory()
+
+
+def benchmark_hash_backends(names=None, size=BENCHMARK_SIZE, rounds=BENCHMARK_ROUNDS):
+    """해시 백엔드별 처리량 {이름: 초당 바이트 수} 를 측정하는 함수 (반복 중 가장 빠른 값)"""
+    data = memoryview(os.urandom(size))
+    results = {}
+    for name in names or HASH_BACKENDS:
+        best = None
+        for _ in range(rounds):
+            started = time.perf_counter()
+            hash_obj = new_hash(name)
+            for offset in range(0, size, HASH_CHUNK_SIZE):
+                hash_obj.update(data[offset:offset + HASH_CHUNK_SIZE])
+            hash_obj.hexdigest()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = size / best if best > 0 else float('inf')
+    return results
+
+
+def select_hash_backend(value=None, preferred=None):
+    """
+    설정값에 해당하는 해시 백엔드 이름을 반환하는 함수.
+    빈 값이나 auto 이면 처음 한번 벤치마크하여 이 컴퓨터에서 가장 빠른 백엔드를 고릅니다.
+    preferred(해시 캐시에 기록된 백엔드)는 가장 빠른 백엔드보다 AUTO_SWITCH_RATIO 배 이상 느리지 않으면 계속 사용합니다.
+    """
+    global _auto_results
+    if value and value != 'auto':
+        if value in HASH_BACKENDS:
+            return value
+        logging.warning(f'사용할 수 없는 해시 백엔드입니다: {value}, 자동으로 선택합니다.')
+
+    with _auto_backend_lock:
+        if _auto_results is None:
+            names = [name for name, backend in HASH_BACKENDS.items()
+                     if backend.digest_bits >= MIN_AUTO_DIGEST_BITS]
+            _auto_results = benchmark_hash_backends(names)
+            logging.info('해시 백엔드 벤치마크: ' + ', '.join(
+                f'{name} {convert_size(int(speed))}/s' for name, speed in _auto_results.items()))
+        results = _auto_results
+
+    fastest = max(results, key=results.get)
+    if preferred in results and results[preferred] * AUTO_SWITCH_RATIO >= results[fastest]:
+        return preferred
+    if preferred:
+        logging.info(f'해시 백엔드 변경: {preferred} -> {fastest}')
+    return fastest
+
+
+def calculate_file_hash(file_path, hash_algorithm='md5'):
+    """파일의 해시 값을 계산하는 함수"""
+    hash_obj = new_hash(hash_algorithm)
+
+    # hashlib 은 큰 버퍼를 처리하는 동안 GIL 을 놓기 때문에 스레드 풀에서도 병렬로 동작합니다.
+    with open(file_path, 'rb', buffering=0) as file:
+        while True:
+            data = file.read(HASH_CHUNK_SIZE)
+            if not data:
+                break
+            hash_obj.update(data)
+    return hash_obj.hexdigest()
+
+
+def read_full(file, view):
+    """
+    버퍼를 끝까지 채우거나 파일 끝에 닿을 때까지 읽는 함수, 읽은 바이트 수를 반환합니다.
+    버퍼 없는 파일의 readinto 는 SMB/NFS 등에서 요청보다 짧게 읽힐 수 있습니다.
+    """
+    total = 0
+    while total < len(view):
+        read = file.readinto(view[total:])
+        if not read:
+            break
+        total += read
+    return total
+
+
+def direct_compare_files(file_a_path, file_b_path, chunk_size=DIRECT_CHUNK_SIZE):
+    """
+    두 파일을 같은 위치의 청크끼리 직접 비교하는 함수, 다른 청크를 만나면 즉시 중단합니다.
+    (내용 일치 여부, 읽은 바이트 수) 를 반환합니다.
+    """
+    buffers = getattr(_direct_buffers, 'buffers', None)
+    if buffers is None or len(buffers[0]) != chunk_size:
+        buffers = (bytearray(chunk_size), bytearray(chunk_size))
+        _direct_buffers.buffers = buffers
+    buffer_a, buffer_b = buffers
+    view_a, view_b = memoryview(buffer_a), memoryview(buffer_b)
+
+    bytes_read = 0
+    with open(file_a_path, 'rb', buffering=0) as file_a, open(file_b_path, 'rb', buffering=0) as file_b:
+        while True:
+            read_a = read_full(file_a, view_a)
+            read_b = read_full(file_b, view_b)
+            bytes_read += read_a + read_b
+            if read_a != read_b or view_a[:read_a] != view_b[:read_b]:
+                return False, bytes_read
+            if not read_a:
+                return True, bytes_read
+
+
+def calculate_partial_hash(file_path, file_size, hash_algorithm='blake2', chunk_size=PARTIAL_CHUNK_SIZE):
+    """
+    파일의 앞/뒤 청크만 읽어 해시 값을 계산하는 함수.
+    파일이 두 청크보다 작으면 전체 해시와 같은 값을 반환합니다.
+    """
+    if file_size <= chunk_size * 2:
+        return calculate_file_hash(file_path, hash_algorithm)
+
+    hash_obj = new_hash(hash_algorithm)
+    view = memoryview(bytearray(chunk_size))
+    with open(file_path, 'rb', buffering=0) as file:
+        hash_obj.update(view[:read_full(file, view)])
+        file.seek(file_size - chunk_size)
+        hash_obj.update(view[:read_full(file, view)])
+    return hash_obj.hexdigest()
+
+
+def get_stat_key(file_path):
+    """해시 캐시의 키로 사용할 (크기, 수정시각 ns, inode) 를 반환하는 함수"""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def compare_file_pair(file_a_path, file_b_path, file_size, hash_algorithm='blake2', hash_a=None, hash_b=None,
+                      compare_mode='auto'):
+    """
+    크기가 같은 두 파일을 부분 해시 -> 직접 비교 또는 전체 해시 순서로 비교하는 함수.
+    (판정 단계, 내용 일치 여부, A 해시, B 해시, 읽은 바이트 수) 를 반환합니다.
+    """
+    partial_limit = PARTIAL_CHUNK_SIZE * 2
+    bytes_read = 0
+
+    # 1단계: 앞/뒤 청크 해시 비교
+    partial_a = calculate_partial_hash(
+        file_a_path, file_size, hash_algorithm)
+    partial_b = calculate_partial_hash(
+        file_b_path, file_size, hash_algorithm)
+    bytes_read += min(file_size, partial_limit) * 2
+
+    if file_size <= partial_limit:
+        # 작은 파일은 부분 해시가 곧 전체 해시입니다.
+        return 'partial', partial_a == partial_b, partial_a, partial_b, bytes_read
+    if partial_a != partial_b:
+        return 'partial', False, hash_a, hash_b, bytes_read
+
+    # 2단계: 살아남은 파일만 직접 비교 또는 전체 해시 비교
+    if compare_mode == 'direct' or (compare_mode == 'auto' and hash_a is None and hash_b is None):
+        # 양쪽 모두 캐시된 해시가 없다면 해시 두 번보다 직접 비교가 유리합니다.
+        is_same, direct_bytes = direct_compare_files(file_a_path, file_b_path)
+        return 'direct', is_same, hash_a, hash_b, bytes_read + direct_bytes
+
+    if hash_a is None:
+        hash_a = calculate_file_hash(file_a_path, hash_algorithm)
+        bytes_read += file_size
+    if hash_b is None:
+        hash_b = calculate_file_hash(file_b_path, hash_algorithm)
+        bytes_read += file_size
+    return 'full', hash_a == hash_b, hash_a, hash_b, bytes_read
+
+
+class CompareStats:
+    """단계별 비교 결과와 읽은 / 절약한 바이트 수를 집계하는 클래스"""
+
+    STAGES = ('size', 'snapshot', 'cache', 'partial', 'direct', 'full')
+    STAGE_NAMES = {'size': '크기 비교', 'snapshot': '이전 비교 결과', 'cache': '해시 캐시',
+                   'partial': '부분 해시', 'direct': '직접 비교', 'full': '전체 해시'}
+
+    def __init__(self):
+        self.pairs = {stage: 0 for stage in self.STAGES}
+        self.different = {stage: 0 for stage in self.STAGES}
+        self.bytes_read = {stage: 0 for stage in self.STAGES}
+        self.bytes_saved = {stage: 0 for stage in self.STAGES}
+
+    def add(self, stage, is_same, total_bytes, bytes_read=0):
+        # total_bytes: 두 파일을 전체 해시했을 때 읽어야 했을 바이트 수
+        self.pairs[stage] += 1
+        if not is_same:
+            self.different[stage] += 1
+        self.bytes_read[stage] += bytes_read
+        self.bytes_saved[stage] += max(total_bytes - bytes_read, 0)
+
+    def summary(self):
+        lines = []
+        for stage in self.STAGES:
+            lines.append(f'{self.STAGE_NAMES[stage]}: {self.pairs[stage]} 건 판정 (불일치 {self.different[stage]} 건), '
+                         f'읽음 {convert_size(self.bytes_read[stage])}, 절약 {convert_size(self.bytes_saved[stage])}')
+        return '\n'.join(lines)
+
+
+class HashCache:
+    """
+    app/local.db 의 file_hashes 테이블에 저장되는 파일 해시 캐시.
+    (경로, 크기, 수정시각 ns, inode) 가 모두 같을 때만 저장된 해시를 재사용합니다.
+    """
+
+    def __init__(self, db_path='app/local.db'):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.entries = {}  # 경로 -> (크기, 수정시각, inode, 알고리즘, 해시)
+        self.dirty = {}  # 아직 DB에 기록하지 않은 항목
+        self.seen = set()  # 이번 스캔에서 조회된 경로
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute(
+            "SELECT file_path, file_size, mtime_ns, inode, hash_algorithm, hash_value FROM file_hashes")
+        for row in c.fetchall():
+            self.entries[row[0]] = tuple(row[1:])
+        conn.close()
+        logging.debug(f'해시 캐시 로드: {len(self.entries)} 건')
+
+    def lookup(self, file_path, hash_algorithm, stat_key=None):
+        """(stat 키, 캐시된 해시 또는 None) 을 반환합니다. stat 키가 없으면 직접 조회합니다."""
+        if stat_key is None:
+            stat_key = get_stat_key(file_path)
+        stat_key = tuple(stat_key)
+        with self.lock:
+            self.seen.add(file_path)
+            entry = self.entries.get(file_path)
+            if entry and entry[:3] == stat_key and entry[3] == hash_algorithm:
+                self.hits += 1
+                return stat_key, entry[4]
+            self.misses += 1
+        return stat_key, None
+
+    def put(self, file_path, stat_key, hash_algorithm, hash_value):
+        entry = (*stat_key, hash_algorithm, hash_value)
+        with self.lock:
+            if self.entries.get(file_path) != entry:
+                self.entries[file_path] = entry
+                self.dirty[file_path] = entry
+
+    def recorded_algorithm(self):
+        """캐시에 가장 많이 기록된 해시 백엔드 이름 (비어 있으면 None)"""
+        with self.lock:
+            counts = Counter(entry[3] for entry in self.entries.values())
+        return counts.most_common(1)[0][0] if counts else None
+
+    def evict_missing(self, roots):
+        """이번 스캔에서 조회되지 않은 루트 폴더 하위 항목 중 파일이 사라진 것을 제거합니다."""
+        roots = [os.path.join(os.path.normpath(root), '')
+                 for root in roots if root]
+        removed = []
+        with self.lock:
+            for file_path in list(self.entries):
+                if file_path in self.seen or not file_path.startswith(tuple(roots)):
+                    continue
+                if not os.path.exists(file_path):
+                    del self.entries[file_path]
+                    self.dirty.pop(file_path, None)
+                    removed.append(file_path)
+        return removed
+
+    def flush(self, roots=None):
+        """변경된 해시를 DB에 기록하고, 사라진 파일의 항목을 정리합니다."""
+        removed = self.evict_missing(roots) if roots else []
+
+        with self.lock:
+            dirty = [(file_path, *entry)
+                     for file_path, entry in self.dirty.items()]
+            self.dirty = {}
+            self.seen = set()
+
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.executemany("INSERT OR REPLACE INTO file_hashes VALUES (?,?,?,?,?,?)",
+                      dirty)
+        c.executemany("DELETE FROM file_hashes WHERE file_path=?",
+                      [(file_path,) for file_path in removed])
+        conn.commit()
+        conn.close()
+
+        logging.debug(
+            f'해시 캐시 저장: 적중 {self.hits} 건, 계산 {self.misses} 건, 기록 {len(dirty)} 건, 제거 {len(removed)} 건')
+        self.hits = 0
+        self.misses = 0
+
+
+def get_hash_workers(value):
+    """설정값(문자열)을 해시 작업자 수로 변환하는 함수, 0 또는 빈 값이면 CPU 수 기준"""
+    # 디스크 대기 시간을 감안하여 CPU 수보다 조금 넉넉하게 잡습니다.
+    return get_worker_count(value, min(32, (os.cpu_count() or 1) + 4))
+
+
+class PairComparer:
+    """
+    (file_a, file_b, stat_a, stat_b) 후보 쌍을 단계적으로 비교하는 클래스.
+    stat 은 (크기, 수정시각 ns, inode) 이며, None 이면 직접 조회합니다.
+    크기가 다르면 즉시 불일치, 양쪽 해시가 캐시에 있으면 캐시로 판정하고,
+    나머지는 스레드 또는 프로세스 풀에서 부분 해시 -> 직접 비교 또는 전체 해시 순서로 비교합니다.
+    submit() 으로 쌍을 넣고 poll() 로 완료된 (A 경로, B 경로, 내용 일치 여부) 를 가져옵니다.
+    """
+
+    def __init__(self, hash_algorithm='blake2', max_workers=None, executor_type='thread', hash_cache=None,
+                 stats=None, compare_mode='auto'):
+        self.hash_algorithm = hash_algorithm
+        self.hash_cache = hash_cache
+        self.stats = stats if stats is not None else CompareStats()
+        self.compare_mode = compare_mode
+        executor_class = ProcessPoolExecutor if executor_type == 'process' else ThreadPoolExecutor
+        self.executor = executor_class(max_workers=max_workers)
+        # 대기 중인 작업이 너무 쌓이지 않도록 작업자 수의 몇 배까지만 받습니다.
+        self.max_pending = (max_workers or os.cpu_count() or 1) * 4
+        self.futures = {}
+        self.results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def pending(self):
+        return len(self.futures)
+
+    def submit(self, file_a_path, file_b_path, stat_a=None, stat_b=None):
+        hash_a = hash_b = None
+        try:
+            if self.hash_cache is not None:
+                stat_a, hash_a = self.hash_cache.lookup(
+                    file_a_path, self.hash_algorithm, stat_a)
+                stat_b, hash_b = self.hash_cache.lookup(
+                    file_b_path, self.hash_algorithm, stat_b)
+            else:
+                stat_a = stat_a or get_stat_key(file_a_path)
+                stat_b = stat_b or get_stat_key(file_b_path)
+        except OSError as e:
+            logging.warning(
+                f'파일 정보 조회 실패: {file_a_path}, {file_b_path} ({e})')
+            return
+
+        total_bytes = stat_a[0] + stat_b[0]
+        if stat_a[0] != stat_b[0]:
+            # 크기가 다르면 파일을 읽을 필요가 없습니다.
+            self.stats.add('size', False, total_bytes)
+            self.results.append((file_a_path, file_b_path, False))
+            return
+
+        if hash_a is not None and hash_b is not None:
+            # 양쪽 모두 캐시에 있으면 파일을 읽지 않습니다.
+            self.stats.add('cache', hash_a == hash_b, total_bytes)
+            self.results.append((file_a_path, file_b_path, hash_a == hash_b))
+            return
+
+        if len(self.futures) >= self.max_pending:
+            self.collect(wait(self.futures, return_when=FIRST_COMPLETED).done)
+
+        future = self.executor.submit(compare_file_pair, file_a_path, file_b_path, stat_a[0],
+                                      self.hash_algorithm, hash_a, hash_b, self.compare_mode)
+        self.futures[future] = (file_a_path, file_b_path, stat_a, stat_b)
+
+    def collect(self, done):
+        for future in done:
+            file_a_path, file_b_path, stat_a, stat_b = self.futures.pop(future)
+            try:
+                stage, is_same, hash_a, hash_b, bytes_read = future.result()
+            except OSError as e:
+                # 스캔 도중 파일이 삭제되거나 잠긴 경우 해당 쌍만 건너뜁니다.
+                logging.warning(
+                    f'해시 계산 실패: {file_a_path}, {file_b_path} ({e})')
+                continue
+
+            if self.hash_cache is not None:
+                if hash_a is not None:
+                    self.hash_cache.put(
+                        file_a_path, stat_a, self.hash_algorithm, hash_a)
+                if hash_b is not None:
+                    self.hash_cache.put(
+                        file_b_path, stat_b, self.hash_algorithm, hash_b)
+            self.stats.add(stage, is_same, stat_a[0] + stat_b[0], bytes_read)
+            self.results.append((file_a_path, file_b_path, is_same))
+
+    def poll(self, timeout=0):
+        """
+        지금까지 완료된 결과를 돌려줍니다.
+        timeout 이 0 이 아니면 결과가 하나도 없을 때 최대 timeout 초(None 이면 무제한) 까지 기다립니다.
+        """
+        if self.futures and not self.results and timeout != 0:
+            self.collect(wait(self.futures, timeout=timeout,
+                              return_when=FIRST_COMPLETED).done)
+        else:
+            self.collect([future for future in self.futures if future.done()])
+        results, self.results = self.results, []
+        return results
+
+
+def compare_pairs(pairs, hash_algorithm='blake2', max_workers=None, executor_type='thread', hash_cache=None,
+                  stats=None, compare_mode='auto'):
+    """
+    (file_a, file_b, stat_a, stat_b) 후보 쌍을 PairComparer 로 비교합니다.
+    완료되는 순서대로 (A 경로, B 경로, 내용 일치 여부) 를 돌려줍니다.
+    """
+    with PairComparer(hash_algorithm, max_workers, executor_type, hash_cache, stats, compare_mode) as comparer:
+        for file_a_path, file_b_path, stat_a, stat_b in pairs:
+            comparer.submit(file_a_path, file_b_path, stat_a, stat_b)
+            yield from comparer.poll()
+        while comparer.pending:
+            yield from comparer.poll(timeout=None)
+        yield from comparer.poll()
+
+
+def group_same_content(files, hash_algorithm='blake2', max_workers=None, hash_cache=None, keep=None):
+    """
+    {경로: stat} 파일들을 크기 -> 부분 해시 -> 전체 해시 순서로 묶어 {(크기, 해시): [경로]} 를 반환하는 함수.
+    단계마다 keep(경로 목록) 이 참인 묶음만 다음 단계로 넘기며, 기본값은 2개 이상인 묶음입니다.
+    """
+    if keep is None:
+        def keep(paths): return len(paths) > 1
+
+    def regroup(groups, key):
+        result = {}
+        for paths in groups:
+            for file_path in paths:
+                value = key(file_path)
+                if value is not None:
+                    result.setdefault(value, []).append(file_path)
+        return {value: paths for value, paths in result.items() if keep(paths)}
+
+    def get_partial_hash(file_path):
+        try:
+            return calculate_partial_hash(file_path, files[file_path][0], hash_algorithm)
+        except OSError as e:
+            logging.warning(f'해시 계산 실패: {file_path} ({e})')
+            return None
+
+    def get_full_hash(file_path):
+        stat = files[file_path]
+        if stat[0] <= PARTIAL_CHUNK_SIZE * 2:
+            # 작은 파일은 부분 해시가 곧 전체 해시입니다.
+            return partial_hashes[file_path]
+        try:
+            digest = None
+            if hash_cache is not None:
+                stat, digest = hash_cache.lookup(
+                    file_path, hash_algorithm, stat)
+            if digest is None:
+                digest = calculate_file_hash(file_path, hash_algorithm)
+                if hash_cache is not None:
+                    hash_cache.put(file_path, stat, hash_algorithm, digest)
+            return digest
+        except OSError as e:
+            logging.warning(f'해시 계산 실패: {file_path} ({e})')
+            return None
+
+    # 빈 파일은 모두 같은 내용이므로 묶지 않습니다.
+    groups = regroup([files], lambda file_path: files[file_path][0] or None)
+    if not groups:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        candidates = [file_path for paths in groups.values()
+                      for file_path in paths]
+        partial_hashes = dict(
+            zip(candidates, executor.map(get_partial_hash, candidates)))
+        groups = regroup(groups.values(), lambda file_path: partial_hashes[file_path] and (
+            files[file_path][0], partial_hashes[file_path]))
+        candidates = [file_path for paths in groups.values()
+                      for file_path in paths]
+        full_hashes = dict(
+            zip(candidates, executor.map(get_full_hash, candidates)))
+    return regroup(groups.values(), lambda file_path: full_hashes[file_path] and (
+        files[file_path][0], full_hashes[file_path]))
+
+
+def cache_file_hashes(file_paths, hash_algorithm='blake2', max_workers=None, hash_cache=None):
+    """
+    파일들의 전체 해시를 해시 캐시에 채우는 함수, 이미 캐시에 있는 파일은 읽지 않습니다.
+    (복사 검증이 원본을 읽으면서 계산한 해시를 스캔 때의 해시와 비교할 수 있도록) 새로 계산한 파일 수를 반환합니다.
+    """
+    def cache_file_hash(file_path):
+        try:
+            stat_key, digest = hash_cache.lookup(file_path, hash_algorithm)
+            if digest is not None:
+                return 0
+            hash_cache.put(file_path, stat_key, hash_algorithm,
+                           calculate_file_hash(file_path, hash_algorithm))
+            return 1
+        except OSError as e:
+            logging.warning(f'해시 계산 실패: {file_path} ({e})')
+            return 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(cache_file_hash, file_paths))
+
+
+def find_moved_files(a_files, b_files, hash_algorithm='blake2', max_workers=None, hash_cache=None):
+    """
+    A에만 있는 파일 {경로: stat} 과 B에만 있는 파일 {경로: stat} 중 내용이 같은 파일(이동 / 이름 변경)을 찾는 함수.
+    같은 파일 이름끼리 먼저 짝지어 [(A 경로, B 경로)] 를 반환합니다.
+    해시 길이가 짧은 백엔드는 get_identity_backend 의 백엔드로 바꿔 비교합니다.
+    """
+    hash_algorithm = get_identity_backend(hash_algorithm)
+    def has_both(paths):
+        return any(file_path in a_files for file_path in paths) and any(
+            file_path not in a_files for file_path in paths)
+
+    groups = group_same_content({**b_files, **a_files}, hash_algorithm, max_workers, hash_cache,
+                                keep=has_both)
+    moved = []
+    for paths in groups.values():
+        paths_a = sorted(
+            file_path for file_path in paths if file_path in a_files)
+        paths_b = sorted(
+            file_path for file_path in paths if file_path not in a_files)
+        # 파일 이름이 같은 것(폴더 이동)을 먼저 짝짓고, 남은 것은 순서대로 짝짓습니다. (이름 변경)
+        for file_a_path in list(paths_a):
+            name = os.path.basename(file_a_path)
+            for file_b_path in paths_b:
+                if os.path.basename(file_b_path) == name:
+                    moved.append((file_a_path, file_b_path))
+                    paths_a.remove(file_a_path)
+                    paths_b.remove(file_b_path)
+                    break
+        moved.extend(zip(paths_a, paths_b))
+    return sorted(moved)
+
+
+class DuplicateCluster(namedtuple('DuplicateCluster', ['size', 'digest', 'paths'])):
+    """내용이 같은 파일 묶음, 첫 번째 경로를 원본으로 보고 나머지를 낭비된 용량으로 계산합니다."""
+    __slots__ = ()
+
+    @property
+    def wasted_bytes(self):
+        return self.size * (len(self.paths) - 1)
+
+
+def find_duplicate_clusters(files, hash_algorithm='blake2', max_workers=None, hash_cache=None):
+    """
+    {경로: stat} 파일 중 내용이 같은 파일 묶음을 낭비된 용량이 큰 순서로 반환하는 함수.
+    해시 길이가 짧은 백엔드는 get_identity_backend 의 백엔드로 바꿔 비교합니다.
+    """
+    groups = group_same_content(
+        files, get_identity_backend(hash_algorithm), max_workers, hash_cache)
+    clusters = [DuplicateCluster(size, digest, sorted(paths))
+                for (size, digest), paths in groups.items()]
+    clusters.sort(key=lambda cluster: (-cluster.wasted_bytes, cluster.paths[0]))
+    return clusters
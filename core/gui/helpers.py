@@ -2,16 +2,27 @@ import logging
 import math
 import os
 import re
+import shutil
 import sqlite3
+import string
 import sys
 import logging
 import os
+import tempfile
+import threading
 import time
-from PyQt5.QtWidgets import QMessageBox, QApplication
-import tkinter as tk
+from contextlib import contextmanager
+# PyQt5, tkinter 는 명령행(core.diff)에서도 이 모듈을 쓸 수 있도록 사용하는 함수 안에서 import 합니다.
 
 FIRST_RUN = True
 PLATFORM = os.name
+# gamelists.normalized_name 과 같은 정규화 (점, 공백 제거 후 SQLite UPPER 처럼 ASCII 만 대문자로)
+NORMALIZED_NAME_SQL = "UPPER(REPLACE(REPLACE(origin_filename,'.',''),' ',''))"
+ASCII_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+# IN (...) 조회 한번에 넘기는 이름 수 (SQLite 변수 개수 제한)
+LOOKUP_CHUNK_SIZE = 500
+# 바로가기 목록 파일의 한 줄: '번호 파일명.확장자'
+SHORTCUT_LINE_PATTERN = re.compile(r"(\d+)\s+(.+)\.(.+)$")
 
 
 def convert_size(size_bytes: int) -> str:
@@ -28,6 +39,19 @@ def convert_size(size_bytes: int) -> str:
     return '%s %s' % (s, size_name[i])
 
 
+def get_worker_count(value, default):
+    '''
+    Convert worker count setting (str) to int.
+    Empty, zero or invalid values fall back to default.
+    '''
+    try:
+        workers = int(value) if value else 0
+    except ValueError:
+        logging.warning(f'Invalid worker count setting: {value}')
+        workers = 0
+    return workers if workers > 0 else default
+
+
 def absp(path):
     '''
     Get absolute path.
@@ -69,14 +93,16 @@ def create_file(f):
 
 
 def getClipboardText():
+    import tkinter as tk
     root = tk.Tk()
     # keep the window from showing
     root.withdraw()
     return root.clipboard_get()
 
 
-def database_init():
-    conn = sqlite3.connect('app/local.db')
+def database_init(db_path='app/local.db'):
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     cursor.execute('''
@@ -96,58 +122,293 @@ def database_init():
     )
     ''')
 
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS file_hashes (
+        file_path TEXT PRIMARY KEY not null,
+        file_size INTEGER not null,
+        mtime_ns INTEGER not null,
+        inode INTEGER not null,
+        hash_algorithm TEXT not null,
+        hash_value TEXT not null
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tree_snapshots (
+        root TEXT not null,
+        relative_dir TEXT not null,
+        except_ext TEXT not null,
+        mtime_ns INTEGER not null,
+        files TEXT,
+        sub_dirs TEXT,
+        CONSTRAINT tree_snapshots_pk PRIMARY KEY (root,relative_dir)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS compare_snapshots (
+        folder_a TEXT not null,
+        folder_b TEXT not null,
+        relative_path TEXT not null,
+        size_a INTEGER,
+        mtime_a INTEGER,
+        inode_a INTEGER,
+        size_b INTEGER,
+        mtime_b INTEGER,
+        inode_b INTEGER,
+        is_same INTEGER,
+        CONSTRAINT compare_snapshots_pk PRIMARY KEY (folder_a,folder_b,relative_path)
+    )
+    ''')
+
+    # 이름 조회용 정규화 컬럼과 인덱스 (기존 DB 에도 추가합니다.)
+    # 생성 컬럼이므로 컬럼 목록 없는 INSERT 와 기존 데이터에 영향이 없고, 값은 인덱스에 저장됩니다.
+    columns = [row[1] for row in cursor.execute('PRAGMA table_xinfo(gamelists)')]
+    if 'normalized_name' not in columns:
+        cursor.execute(
+            f'ALTER TABLE gamelists ADD COLUMN normalized_name TEXT GENERATED ALWAYS AS ({NORMALIZED_NAME_SQL}) VIRTUAL')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS gamelists_normalized_idx ON gamelists (platform_name, normalized_name)')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS gamelists_kr_filename_idx ON gamelists (kr_filename)')
+
     conn.commit()
     conn.close()
 
 
+class SettingsStore:
+    '''
+    Cached access to the settings table.
+    Keeps one long-lived connection per thread (WAL mode) and a read-through cache
+    that is invalidated on write. Writes inside batch() are committed in one transaction.
+    '''
+
+    def __init__(self, db_path='app/local.db'):
+        self.db_path = db_path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.cache = {}
+        # 쓰기마다 증가, 읽는 도중에 쓰기가 있었다면 읽은 값을 캐시하지 않습니다.
+        self.generation = 0
+
+    def get_connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            # WAL 모드에서는 다른 스레드의 쓰기 중에도 설정을 읽을 수 있습니다.
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        pending = getattr(self.local, 'pending', None)
+        if pending and key in pending:
+            return pending[key]
+        with self.lock:
+            if key in self.cache:
+                return self.cache[key]
+            generation = self.generation
+        c = self.get_connection().execute(
+            "SELECT value FROM settings WHERE key=?", (key,))
+        result = c.fetchone()
+        value = result[0] if result else None
+        with self.lock:
+            if generation == self.generation:
+                self.cache[key] = value
+        return value
+
+    def set(self, key, value):
+        pending = getattr(self.local, 'pending', None)
+        if pending is not None:
+            pending[key] = value
+            return
+        self.write({key: value})
+
+    def write(self, values):
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO settings VALUES (?,?)",
+                                 values.items())
+        finally:
+            with self.lock:
+                self.generation += 1
+                for key in values:
+                    self.cache.pop(key, None)
+
+    @contextmanager
+    def batch(self):
+        '''
+        Collect set() calls of the current thread and write them in one transaction on exit.
+        '''
+        if getattr(self.local, 'pending', None) is not None:
+            # 이미 batch 안이면 바깥 batch 에서 한번에 기록합니다.
+            yield
+            return
+        self.local.pending = {}
+        try:
+            yield
+            pending = self.local.pending
+        finally:
+            self.local.pending = None
+        if pending:
+            self.write(pending)
+
+    def close(self):
+        '''
+        Close the connection of the current thread.
+        '''
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+
+settings_store = SettingsStore()
+
+
 def get_settings(key):
-    conn = sqlite3.connect('app/local.db')
-    c = conn.cursor()
-    c.execute("SELECT value FROM settings WHERE key=?", (key,))
-    result = c.fetchone()
-    conn.close()
-    if result:
-        return result[0]
-    return None
+    return settings_store.get(key)
+
+
+def settings_batch():
+    '''
+    Write settings changed inside the with block in one transaction.
+    '''
+    return settings_store.batch()
+
+
+def normalize_game_name(name):
+    '''
+    Normalize game name like gamelists.normalized_name (no dots and spaces, ASCII upper case).
+    '''
+    name = name.replace('.', '').replace(' ', '')
+    return name.upper() if name.isascii() else name.translate(ASCII_UPPER)
+
+
+class GameNameCache:
+    '''
+    In-process cache of gamelists name lookups.
+    Each platform is loaded with one indexed query, and kr_filename matches
+    from other platforms are resolved in bulk with IN (...) queries.
+    '''
+
+    def __init__(self, db_path='app/local.db'):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.platforms = {}  # 플랫폼 -> ({정규화 이름: 결과}, {한글 이름: 결과})
+        self.kr_filenames = {}  # 한글 이름 -> 결과 (없으면 None)
+
+    def get_platform(self, conn, platform_name):
+        with self.lock:
+            cached = self.platforms.get(platform_name)
+        if cached is not None:
+            return cached
+        normalized_names = {}
+        kr_filenames = {}
+        for normalized_name, kr_filename, shortcut_link in conn.execute(
+                "SELECT normalized_name, kr_filename, shortcut_link FROM gamelists WHERE platform_name=? ORDER BY rowid",
+                (platform_name,)):
+            result = {"kr_filename": kr_filename,
+                      "shortcut_link": shortcut_link}
+            normalized_names.setdefault(normalized_name, result)
+            if kr_filename:
+                kr_filenames.setdefault(kr_filename, result)
+        cached = (normalized_names, kr_filenames)
+        with self.lock:
+            self.platforms[platform_name] = cached
+        return cached
+
+    def load_kr_filenames(self, conn, names):
+        with self.lock:
+            names = [name for name in names if name not in self.kr_filenames]
+        found = {}
+        for i in range(0, len(names), LOOKUP_CHUNK_SIZE):
+            chunk = names[i:i + LOOKUP_CHUNK_SIZE]
+            for kr_filename, shortcut_link in conn.execute(
+                    f"SELECT kr_filename, shortcut_link FROM gamelists WHERE kr_filename IN ({','.join('?' * len(chunk))}) ORDER BY rowid",
+                    chunk):
+                found.setdefault(kr_filename, {
+                                 "kr_filename": kr_filename, "shortcut_link": shortcut_link})
+        with self.lock:
+            for name in names:
+                self.kr_filenames[name] = found.get(name)
+
+    def lookup(self, platform_name, names):
+        '''
+        Resolve many file names of one platform at once.
+        Returns {name: {"kr_filename", "shortcut_link"}}, empty strings when not found.
+        '''
+        conn = sqlite3.connect(self.db_path)
+        try:
+            normalized_names, kr_filenames = self.get_platform(
+                conn, platform_name)
+            results = {}
+            missing = []
+            for name in names:
+                result = normalized_names.get(
+                    normalize_game_name(name)) or kr_filenames.get(name)
+                if result is None:
+                    missing.append(name)
+                else:
+                    results[name] = dict(result)
+            # 다른 플랫폼의 한글 이름과 같은 경우 (기존 조회 조건 OR kr_filename = ?)
+            if missing:
+                self.load_kr_filenames(conn, missing)
+        finally:
+            conn.close()
+
+        with self.lock:
+            for name in missing:
+                result = self.kr_filenames.get(name)
+                results[name] = dict(result) if result else {
+                    "kr_filename": '', "shortcut_link": ''}
+        return results
+
+    def clear(self):
+        with self.lock:
+            self.platforms.clear()
+            self.kr_filenames.clear()
+
+
+game_name_cache = GameNameCache()
 
 
 # DB에서 모든 게임의 정보를 가져오는 함수
 def get_all_db_game_names(platforms):
-    conn = sqlite3.connect('app/local.db')
-    cursor = conn.cursor()
+    platforms = list(platforms)
     db_results = {}
+    if not platforms:
+        return db_results
 
-    for platform in platforms:
-        print(
-            f"SELECT origin_filename,kr_filename, shortcut_link, platform_name FROM gamelists WHERE platform_name = '{platform}'")
-        cursor.execute(
-            f"SELECT origin_filename,kr_filename, shortcut_link, platform_name FROM gamelists WHERE platform_name = '{platform}'")
-        results = cursor.fetchall()
-
-        for result in results:
-            # 오리지널 명칭 조회
-            db_results[(platform, result[0])] = {"origin_filename": result[0],
-                                                 "kr_filename": result[1], "shortcut_link": result[2], "platform_name": result[3]}
-            # 한글로 변환된 명칭 조회
-            db_results[(platform, result[1])] = {"origin_filename": result[1],
-                                                 "kr_filename": result[1], "shortcut_link": result[2], "platform_name": result[3]}
+    conn = sqlite3.connect('app/local.db')
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT origin_filename,kr_filename, shortcut_link, platform_name FROM gamelists WHERE platform_name IN ({','.join('?' * len(platforms))})",
+        platforms)
+    for result in cursor.fetchall():
+        platform = result[3]
+        # 오리지널 명칭 조회
+        db_results[(platform, result[0])] = {"origin_filename": result[0],
+                                             "kr_filename": result[1], "shortcut_link": result[2], "platform_name": result[3]}
+        # 한글로 변환된 명칭 조회
+        db_results[(platform, result[1])] = {"origin_filename": result[1],
+                                             "kr_filename": result[1], "shortcut_link": result[2], "platform_name": result[3]}
 
     conn.close()
 
     return db_results
 
 
+def get_db_game_names(platform_name, file_names):
+    '''
+    Bulk version of get_db_game_name, resolves all file names with the cached platform index.
+    '''
+    return game_name_cache.lookup(platform_name, file_names)
+
+
 def get_db_game_name(platform_name, origin_filename):
-    category = 'gamelists'
-    conn = sqlite3.connect('app/local.db')
-    c = conn.cursor()
-    c.execute("SELECT kr_filename,shortcut_link FROM gamelists WHERE platform_name=? AND UPPER(REPLACE(REPLACE(origin_filename,'.',''),' ','')) = UPPER(REPLACE(REPLACE(?,'.',''),' ','')) OR kr_filename = ?",
-              (platform_name, origin_filename, origin_filename))
-    result = c.fetchone()
-    conn.close()
-    if result:
-        return {"kr_filename": result[0], "shortcut_link": result[1]}
-    return {"kr_filename": '', "shortcut_link": ''}
+    return get_db_game_names(platform_name, [origin_filename])[origin_filename]
 
 
 def get_db_shortcut_game_name():
@@ -165,13 +426,7 @@ def get_db_shortcut_game_name():
 
 
 def set_settings(key, value):
-    category = 'settings'
-    conn = sqlite3.connect('app/local.db')
-    c = conn.cursor()
-    c.execute("INSERT OR REPLACE INTO settings VALUES (?,?)",
-              (key, value))
-    conn.commit()
-    conn.close()
+    settings_store.set(key, value)
 
 
 def get_file_name(file_path: str) -> str:
@@ -210,6 +465,7 @@ def alert(text):
     '''
     Create and show QMessageBox Alert.
     '''
+    from PyQt5.QtWidgets import QMessageBox, QApplication
     msg = QMessageBox()
     msg.setIcon(QMessageBox.Warning)
     msg.setWindowTitle('안내')
@@ -233,29 +489,77 @@ def alert(text):
     msg.exec_()
 
 
-def replace_shortcut_link(origin_name, modify_name):
-    shortcut_file_path = os.path.normpath(
-        absp(f'res/data/Resources/xfgle.hgp'))
-
-    # 파일을 열어 읽기 모드로 가져옵니다.
-    with open(shortcut_file_path, 'r') as file:
-        text = file.readlines()
-
-    # 파일을 다시 열어 쓰기 모드로 가져옵니다.
-    with open(shortcut_file_path, 'w') as file:
-        for line in text:
-            # 정규식 패턴을 사용하여 중간 문구를 추출합니다.
-            pattern = r"(\d+)\s+(.+)\..+$"
-            match = re.match(pattern, line)
+class ShortcutFile:
+    '''
+    Shortcut list file (res/data/Resources/xfgle.hgp) parsed once into a name index.
+    Any number of renames are applied in memory and save() writes the file back atomically.
+    '''
+
+    def __init__(self, path=None):
+        self.path = path or os.path.normpath(
+            absp('res/data/Resources/xfgle.hgp'))
+        with open(self.path, 'r') as file:
+            self.lines = file.readlines()
+        self.entries = {}  # 줄 번호 -> (번호, 확장자)
+        self.index = {}  # 파일명 -> [줄 번호]
+        self.changed = False
+        for line_no, line in enumerate(self.lines):
+            match = SHORTCUT_LINE_PATTERN.match(line)
             if match:
                 prefix, middle_text, extension = match.groups()
+                self.entries[line_no] = (prefix, extension)
+                self.index.setdefault(middle_text, []).append(line_no)
+
+    def rename(self, origin_name, modify_name):
+        '''
+        Rename all entries named origin_name, returns the number of changed lines.
+        '''
+        if origin_name == modify_name:
+            return 0
+        line_nos = self.index.pop(origin_name, None)
+        if not line_nos:
+            return 0
+        for line_no in line_nos:
+            prefix, extension = self.entries[line_no]
+            self.lines[line_no] = f'{prefix} {modify_name}.{extension}\n'
+        self.index.setdefault(modify_name, []).extend(line_nos)
+        self.changed = True
+        return len(line_nos)
+
+    def save(self):
+        '''
+        Write the file to a temp file in the same folder and replace the original,
+        so a crash never leaves a half-written shortcut file.
+        '''
+        if not self.changed:
+            return
+        folder = os.path.dirname(self.path)
+        fd, temp_path = tempfile.mkstemp(
+            prefix='.xfgle-', suffix='.tmp', dir=folder)
+        try:
+            with os.fdopen(fd, 'w') as file:
+                file.writelines(self.lines)
+                file.flush()
+                os.fsync(file.fileno())
+            shutil.copymode(self.path, temp_path)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self.changed = False
+
+
+def replace_shortcut_links(renames, shortcut_file_path=None):
+    '''
+    Apply (origin_name, modify_name) renames with one read and one atomic write.
+    Returns the number of changed lines.
+    '''
+    shortcut_file = ShortcutFile(shortcut_file_path)
+    changed = sum(shortcut_file.rename(origin_name, modify_name)
+                  for origin_name, modify_name in renames)
+    shortcut_file.save()
+    return changed
 
-                # 파일명이 수정되었다면 중간 문구를 수정합니다.
-                if origin_name != modify_name and origin_name == middle_text:
-                    modified_line = f'{prefix} {modify_name}.{extension}\n'
-                else:
-                    modified_line = line
-                file.write(modified_line)
-            else:
-                # 정규식과 일치하지 않는 라인은 그대로 유지합니다.
-                file.write(line)
+
+def replace_shortcut_link(origin_name, modify_name):
+    return replace_shortcut_links([(origin_name, modify_name)])
@@ -0,0 +1,143 @@
+import datetime
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSize
+from PyQt5.QtGui import QColor, QIcon
+from .helpers import absp
+
+# 테이블 컬럼 순서 (11, 12 는 숨김 컬럼)
+HEADERS = ['상태', '상위 폴더', '파일 경로', '기준 파일 이름', '수정 일시', '파일 용량', '',
+           '파일 경로', '수정 일시', '파일 용량', '파일 이름', '', '']
+
+# 단건 작업 / 작업 제외 이후 행의 표시 상태: (상태명, 글자색, 아이콘)
+WORK_STATES = {
+    'copied': ('파일 복사', QColor(0, 204, 153), 'check-square'),
+    'except': ('작업 제외', QColor(255, 153, 0), 'alert-triangle'),
+    'remove': ('작업 제외', QColor(255, 102, 102), 'alert-triangle'),
+}
+
+CENTER_COLUMNS = (0, 1, 4, 6, 8, 11, 12)
+RIGHT_COLUMNS = (5, 9)
+
+
+def format_mod_time(timestamp, time_format='%Y-%m-%d %H:%M:%S'):
+    """수정 시각(초)을 지정된 형식으로 포맷하여 반환하는 함수"""
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp).strftime(time_format)
+
+
+class RomTableModel(QAbstractTableModel):
+    """
+    GuiBehavior.all_roms_list 를 그대로 읽어 보여주는 테이블 모델.
+    셀 아이템을 미리 만들지 않고 화면에 보이는 셀만 data() 에서 그때그때 읽습니다.
+    """
+
+    def __init__(self, gui):
+        super().__init__()
+        self.gui = gui
+        self.icons = {}  # 아이콘 이름 -> QIcon, 상태별로 한번만 로드합니다.
+
+    def roms_list(self):
+        if self.gui.actions is None:
+            return []
+        return self.gui.actions.all_roms_list
+
+    def rom(self, row):
+        return self.roms_list()[row]
+
+    def get_icon(self, name):
+        icon = self.icons.get(name)
+        if icon is None:
+            pixmap = QIcon(absp(f'res/icon/{name}.svg')).pixmap(QSize(32, 32))
+            icon = QIcon(pixmap)
+            self.icons[name] = icon
+        return icon
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.roms_list())
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        rom = self.rom(index.row())
+        column = index.column()
+        work_state = WORK_STATES.get(rom.get('work_state'))
+
+        if role == Qt.DisplayRole:
+            return self.display_text(rom, column, work_state)
+        elif role == Qt.DecorationRole and column == 6:
+            if work_state:
+                return self.get_icon(work_state[2])
+            if rom.get('status'):
+                return self.get_icon(rom['status'])
+        elif role == Qt.ForegroundRole and column == 0 and work_state:
+            return work_state[1]
+        elif role == Qt.TextAlignmentRole:
+            if column in CENTER_COLUMNS:
+                return Qt.AlignVCenter | Qt.AlignCenter
+            if column in RIGHT_COLUMNS:
+                return Qt.AlignVCenter | Qt.AlignRight
+            return Qt.AlignVCenter | Qt.AlignLeft
+        return None
+
+    def display_text(self, rom, column, work_state):
+        if column == 0:
+            return work_state[0] if work_state else rom.get('status_name')
+        elif column == 1:
+            return rom.get('platform_name')
+        elif column == 2:
+            # B에만 있는 파일은 A 경로를 표시하지 않습니다.
+            return rom.get('file_a_path') if rom.get('file_a_name') else None
+        elif column == 3:
+            return rom.get('file_a_name')
+        elif column == 4:
+            return format_mod_time(rom.get('file_a_time'))
+        elif column == 5:
+            return rom.get('file_a_size')
+        elif column == 7:
+            # A에만 있는 파일은 B 경로를 표시하지 않습니다.
+            return rom.get('file_b_path') if rom.get('file_b_name') else None
+        elif column == 8:
+            return format_mod_time(rom.get('file_b_time'))
+        elif column == 9:
+            return rom.get('file_b_size')
+        elif column == 10:
+            return rom.get('file_b_name')
+        elif column == 11:
+            return rom.get('status')
+        elif column == 12:
+            return rom.get('file_path')
+        return None
+
+    def append_roms(self, roms_list):
+        """목록 끝에 행을 추가합니다."""
+        if not roms_list:
+            return
+        roms = self.roms_list()
+        self.beginInsertRows(QModelIndex(), len(roms),
+                             len(roms) + len(roms_list) - 1)
+        roms.extend(roms_list)
+        self.endInsertRows()
+
+    def refresh(self):
+        """목록이 교체되거나 정렬된 뒤 전체를 다시 그립니다."""
+        self.beginResetModel()
+        self.endResetModel()
+
+    def refresh_rows(self, rows):
+        """상태가 바뀐 행만 다시 그립니다. 여러 행이면 한번의 dataChanged 로 알립니다."""
+        if not rows:
+            return
+        self.dataChanged.emit(self.index(min(rows), 0),
+                              self.index(max(rows), len(HEADERS) - 1))
@@ -0,0 +1,138 @@
+import os
+import sys
+
+from core.gui.helpers import convert_size
+
+# 비교 결과 행의 상태명 (행이 만들어질 때의 상태 기준)
+STATUS_NAMES = {'A': 'A에만 존재', 'B': '추가 파일', 'C': 'Hash 불일치', 'M': '이동 / 이름 변경'}
+
+
+class RomRow:
+    """
+    비교 결과 한 행을 담는 작은 레코드.
+    폴더 경로는 intern 하여 같은 폴더의 행끼리 공유하고, 파일 이름은 A, B 가 같으면 한번만 저장합니다.
+    용량 문자열, 파일명, 상위 폴더명, 전체 경로 같은 표시용 값은 저장하지 않고 읽을 때 만듭니다.
+    기존 코드와 호환되도록 rom['file_a_path'], rom.get('status') 처럼 dict 방식으로도 읽을 수 있습니다.
+    """
+    __slots__ = ('dir_a', 'base_a', 'dir_b', 'base_b', 'byte_a', 'byte_b', 'time_a', 'time_b',
+                 'in_a', 'in_b', 'kind', 'status', 'work_state')
+
+    KEYS = frozenset(('file_a_path', 'file_a_size', 'file_a_byte', 'file_a_name', 'file_a_platform_name',
+                      'file_a_time', 'file_b_path', 'file_b_size', 'file_b_byte', 'file_b_name',
+                      'file_b_platform_name', 'file_b_time', 'status', 'status_name', 'file_path',
+                      'platform_name', 'work_state'))
+    WRITABLE_KEYS = frozenset(('status', 'work_state'))
+
+    def __init__(self, file_a_path, file_b_path, status, in_a, in_b, byte_a=0, byte_b=0, time_a=None,
+                 time_b=None):
+        self.dir_a, self.base_a = split_path(file_a_path)
+        self.dir_b, self.base_b = split_path(file_b_path)
+        if self.base_b == self.base_a:
+            self.base_b = self.base_a
+        self.in_a = in_a
+        self.in_b = in_b
+        self.byte_a = byte_a
+        self.byte_b = byte_b
+        self.time_a = time_a
+        self.time_b = time_b
+        self.kind = status
+        self.status = status
+        self.work_state = None
+
+    @property
+    def file_a_path(self):
+        return join_path(self.dir_a, self.base_a)
+
+    @property
+    def file_b_path(self):
+        return join_path(self.dir_b, self.base_b)
+
+    @property
+    def file_a_size(self):
+        return convert_size(self.byte_a) if self.in_a else None
+
+    @property
+    def file_b_size(self):
+        return convert_size(self.byte_b) if self.in_b else None
+
+    @property
+    def file_a_byte(self):
+        return self.byte_a if self.in_a else 0
+
+    @property
+    def file_b_byte(self):
+        return self.byte_b if self.in_b else 0
+
+    @property
+    def file_a_name(self):
+        return os.path.splitext(self.base_a)[0] if self.in_a else None
+
+    @property
+    def file_b_name(self):
+        return os.path.splitext(self.base_b)[0] if self.in_b else None
+
+    @property
+    def file_a_platform_name(self):
+        return os.path.basename(self.dir_a) if self.in_a else None
+
+    @property
+    def file_b_platform_name(self):
+        return os.path.basename(self.dir_b) if self.in_b else None
+
+    @property
+    def file_a_time(self):
+        return self.time_a if self.in_a else None
+
+    @property
+    def file_b_time(self):
+        return self.time_b if self.in_b else None
+
+    @property
+    def status_name(self):
+        return STATUS_NAMES.get(self.kind)
+
+    @property
+    def file_path(self):
+        return self.file_a_path or self.file_b_path
+
+    @property
+    def platform_name(self):
+        return self.file_a_platform_name or self.file_b_platform_name
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.WRITABLE_KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        if key not in self.KEYS:
+            return default
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def __repr__(self):
+        return f'RomRow({self.status}, {self.file_path!r})'
+
+
+def split_path(file_path):
+    """경로를 (intern 된 폴더 경로, 파일 이름) 으로 나누는 함수"""
+    if not file_path:
+        return None, None
+    directory, base_name = os.path.split(file_path)
+    return sys.intern(directory), base_name
+
+
+def join_path(directory, base_name):
+    if base_name is None:
+        return None
+    return os.path.join(directory, base_name)
@@ -0,0 +1,187 @@
+"""
+작업 제외 규칙. 설정의 '작업시 제외할 확장자' 값을 스캔마다 한번만 해석해서 사용합니다.
+콤마로 구분해 아래 규칙을 섞어 쓸 수 있습니다.
+- .txt                    확장자 (대소문자 구분 없음)
+- .git/  build/           폴더 이름 (/ 가 있으면 상대 경로), 폴더를 읽기 전에 통째로 건너뜁니다.
+- *.bak  Thumbs.db        파일 이름 와일드카드 (/ 가 있으면 상대 경로, 예: docs/*.pdf)
+- re:패턴                 상대 경로(구분자 /) 정규식
+- size>100MB  size<1KB    파일 크기 (B, KB, MB, GB, TB)
+- age>30d  age<12h        수정된 뒤 지난 시간 (s, m, h, d)
+"""
+import fnmatch
+import logging
+import os
+import re
+import threading
+import time
+
+from core.gui.helpers import convert_size
+
+SIZE_UNITS = {'': 1, 'b': 1, 'kb': 1024, 'mb': 1024 ** 2,
+              'gb': 1024 ** 3, 'tb': 1024 ** 4}
+AGE_UNITS = {'': 86400, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+LIMIT_PATTERN = re.compile(
+    r'^(size|age)\s*([<>])\s*(\d+(?:\.\d+)?)\s*([a-z]*)$', re.IGNORECASE)
+WILDCARD_CHARS = ('*', '?', '[')
+
+
+class ExcludeRule:
+    """제외 규칙 하나와 이번 스캔에서 건너뛴 파일 수 / 바이트 수 / 폴더 수"""
+    __slots__ = ('text', 'kind', 'pattern', 'on_path', 'files', 'bytes', 'dirs')
+
+    def __init__(self, text, kind, pattern=None, on_path=False):
+        self.text = text
+        self.kind = kind  # ext, dir, name, regex, size, age
+        self.pattern = pattern
+        self.on_path = on_path  # 파일 이름 대신 상대 경로에 적용
+        self.files = 0
+        self.bytes = 0
+        self.dirs = 0
+
+
+class ExcludeRules:
+    """
+    제외 규칙 목록을 한번만 컴파일해 두고 폴더 / 파일마다 확인하는 클래스.
+    폴더 규칙은 하위 폴더를 조회 목록에 넣기 전에 확인하므로 제외된 폴더는 아예 읽지 않습니다.
+    여러 조회 스레드에서 함께 사용하며, 규칙별로 건너뛴 파일 수와 바이트 수를 집계합니다.
+    """
+
+    def __init__(self, text, now=None):
+        self.text = text or ''
+        self.lock = threading.Lock()
+        self.now = time.time() if now is None else now
+        self.rules = []
+        self.extensions = {}  # 소문자 확장자 -> 규칙
+        self.dir_rules = []
+        self.name_rules = []  # 파일 이름 / 상대 경로 규칙 (와일드카드, 정규식)
+        self.stat_rules = []  # 크기 / 수정시각 규칙
+        for token in self.text.split(','):
+            token = token.strip()
+            if token:
+                self.add_rule(token)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def add_rule(self, token):
+        try:
+            rule = parse_rule(token, self.now)
+        except (ValueError, re.error) as e:
+            logging.warning(f'제외 규칙을 해석할 수 없습니다: {token} ({e})')
+            return
+        self.rules.append(rule)
+        if rule.kind == 'ext':
+            self.extensions[rule.pattern] = rule
+        elif rule.kind == 'dir':
+            self.dir_rules.append(rule)
+        elif rule.kind in ('name', 'regex'):
+            self.name_rules.append(rule)
+        else:
+            self.stat_rules.append(rule)
+
+    def match_dir(self, relative_dir, name):
+        """하위 폴더를 건너뛸지 확인하는 함수"""
+        for rule in self.dir_rules:
+            target = to_rule_path(relative_dir) if rule.on_path else name
+            if rule.pattern.match(target):
+                with self.lock:
+                    rule.dirs += 1
+                return True
+        return False
+
+    def match_name(self, relative_path, name, entry=None):
+        """이름 / 경로 규칙으로 파일을 건너뛸지 확인하는 함수, 건너뛴 바이트 수는 entry 의 stat 으로 집계합니다."""
+        rule = None
+        if self.extensions:
+            lower_name = name.lower()
+            for extension, ext_rule in self.extensions.items():
+                if lower_name.endswith(extension):
+                    rule = ext_rule
+                    break
+        if rule is None:
+            for name_rule in self.name_rules:
+                target = to_rule_path(
+                    relative_path) if name_rule.on_path else name
+                if (name_rule.pattern.search if name_rule.kind == 'regex' else name_rule.pattern.match)(target):
+                    rule = name_rule
+                    break
+        if rule is None:
+            return False
+
+        try:
+            size = entry.stat().st_size if entry is not None else 0
+        except OSError:
+            size = 0
+        self.record(rule, size)
+        return True
+
+    def match_stat(self, stat):
+        """크기 / 수정시각 규칙으로 파일을 건너뛸지 확인하는 함수 (stat: FileStat)"""
+        for rule in self.stat_rules:
+            operator, limit = rule.pattern
+            value = stat.size if rule.kind == 'size' else self.now - \
+                stat.mtime_ns / 1e9
+            if (value > limit) if operator == '>' else (value < limit):
+                self.record(rule, stat.size)
+                return True
+        return False
+
+    def record(self, rule, size):
+        with self.lock:
+            rule.files += 1
+            rule.bytes += size
+
+    def summary(self):
+        lines = []
+        for rule in self.rules:
+            text = f'{rule.text}: 파일 {rule.files} 건, {convert_size(rule.bytes)}'
+            if rule.kind == 'dir':
+                text += f', 폴더 {rule.dirs} 개'
+            lines.append(text)
+        return '\n'.join(lines)
+
+
+def parse_rule(token, now):
+    """규칙 문자열 하나를 ExcludeRule 로 변환하는 함수, 해석할 수 없으면 ValueError"""
+    if token.lower().startswith('re:'):
+        return ExcludeRule(token, 'regex', re.compile(token[3:]), on_path=True)
+
+    limit = LIMIT_PATTERN.match(token)
+    if limit:
+        kind, operator, number, unit = limit.groups()
+        units = SIZE_UNITS if kind.lower() == 'size' else AGE_UNITS
+        if unit.lower() not in units:
+            raise ValueError(f'알 수 없는 단위: {unit}')
+        return ExcludeRule(token, kind.lower(), (operator, float(number) * units[unit.lower()]))
+
+    if token.endswith(('/', '\\')):
+        pattern = token.rstrip('/\\').replace('\\', '/')
+        return ExcludeRule(token, 'dir', compile_glob(pattern), on_path='/' in pattern)
+
+    pattern = token.replace('\\', '/')
+    if '/' not in pattern and not any(char in token for char in WILDCARD_CHARS):
+        if token.startswith('.'):
+            return ExcludeRule(token, 'ext', token.lower())
+        if '.' not in token:
+            # 점 없이 입력한 확장자 (예: txt)
+            return ExcludeRule(token, 'ext', '.' + token.lower())
+    return ExcludeRule(token, 'name', compile_glob(pattern), on_path='/' in pattern)
+
+
+def compile_glob(pattern):
+    return re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+
+
+def to_rule_path(relative_path):
+    # 규칙의 경로 구분자는 운영체제와 상관없이 / 를 사용합니다.
+    return relative_path.replace(os.sep, '/') if os.sep != '/' else relative_path
+
+
+def compile_rules(value):
+    """설정값(콤마 문자열 또는 목록)을 ExcludeRules 로 변환하는 함수, 규칙이 없으면 None"""
+    if value is None or isinstance(value, ExcludeRules):
+        return value or None
+    if not isinstance(value, str):
+        value = ','.join(value)
+    rules = ExcludeRules(value)
+    return rules or None
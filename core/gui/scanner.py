@@ -0,0 +1,259 @@
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# 폴더 색인에 저장되는 파일 정보 (해시 캐시 키와 같은 순서)
+FileStat = namedtuple('FileStat', ['size', 'mtime_ns', 'inode'])
+
+
+def get_file_stat(entry):
+    """DirEntry 의 캐시된 stat 결과로 FileStat 을 만드는 함수"""
+    stat = entry.stat()
+    return FileStat(stat.st_size, stat.st_mtime_ns, entry.inode())
+
+
+def scan_directory(root, relative_dir, exclude_rules=None, stat_rules=True):
+    """
+    폴더 하나를 os.scandir 로 한번만 읽어 ({상대 경로: FileStat}, [하위 폴더 상대 경로]) 를 반환하는 함수.
+    os.walk 와 마찬가지로 심볼릭 링크 폴더는 따라가지 않습니다.
+    exclude_rules(rules.ExcludeRules) 의 폴더 규칙에 해당하는 하위 폴더는 목록에 넣지 않으므로 아예 읽지 않습니다.
+    stat_rules 가 False 이면 크기 / 수정시각 규칙은 적용하지 않습니다. (apply_stat_rules 참고)
+    """
+    files = {}
+    sub_dirs = []
+    try:
+        with os.scandir(os.path.join(root, relative_dir)) as it:
+            for entry in it:
+                relative_path = os.path.join(
+                    relative_dir, entry.name) if relative_dir else entry.name
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink() and not (
+                                exclude_rules is not None and exclude_rules.match_dir(relative_path, entry.name)):
+                            sub_dirs.append(relative_path)
+                        continue
+                    if exclude_rules is not None and exclude_rules.match_name(relative_path, entry.name, entry):
+                        continue
+                    stat = get_file_stat(entry)
+                    if stat_rules and exclude_rules is not None and exclude_rules.match_stat(stat):
+                        continue
+                    files[relative_path] = stat
+                except OSError as e:
+                    logging.warning(f'파일 정보 조회 실패: {entry.path} ({e})')
+    except OSError as e:
+        logging.warning(f'폴더 조회 실패: {os.path.join(root, relative_dir)} ({e})')
+    return files, sub_dirs
+
+
+def index_tree(root, exclude_rules=None):
+    """폴더 전체를 한번씩만 읽어 {상대 경로: FileStat} 색인을 만드는 함수"""
+    index = {}
+    pending = ['']
+    while pending:
+        files, sub_dirs = scan_directory(
+            root, pending.pop(), exclude_rules)
+        index.update(files)
+        pending.extend(sub_dirs)
+    return index
+
+
+def path_key(relative_path):
+    """
+    A, B 폴더의 같은 파일을 찾을 때 쓰는 상대 경로 키.
+    Windows 처럼 대소문자를 구분하지 않는 환경에서는 Game.zip 과 game.zip 을 같은 파일로 봅니다.
+    """
+    return os.path.normcase(relative_path)
+
+
+def diff_indexes(index_a, index_b):
+    """
+    두 폴더 색인을 비교하여 (내용 비교가 필요한 상대 경로, B에만 있는 상대 경로, A에만 있는 상대 경로) 를 반환합니다.
+    크기와 수정시각이 모두 같은 파일은 동일한 파일로 간주합니다.
+    상대 경로는 path_key 로 짝짓고, 양쪽에 있는 파일은 A 의 상대 경로로 반환합니다.
+    """
+    keys_a = {path_key(relative_path): relative_path for relative_path in index_a}
+    keys_b = {path_key(relative_path): relative_path for relative_path in index_b}
+    changed = []
+    for key in keys_a.keys() & keys_b.keys():
+        stat_a = index_a[keys_a[key]]
+        stat_b = index_b[keys_b[key]]
+        if stat_a.size == stat_b.size and stat_a.mtime_ns == stat_b.mtime_ns:
+            continue
+        changed.append(keys_a[key])
+
+    b_only = [keys_b[key] for key in keys_b.keys() - keys_a.keys()]
+    a_only = [keys_a[key] for key in keys_a.keys() - keys_b.keys()]
+    return sorted(changed), sorted(b_only), sorted(a_only)
+
+
+def scan_directory_with_snapshot(root, relative_dir, exclude_rules=None, snapshot=None, incremental=False):
+    """
+    폴더를 조회하고 결과를 스냅샷에 기록하는 함수.
+    incremental 이면 폴더 수정시각이 스냅샷과 같을 때 폴더를 다시 읽지 않고 스냅샷을 재사용합니다.
+    """
+    if snapshot is None:
+        return scan_directory(root, relative_dir, exclude_rules)
+
+    try:
+        # 조회 도중 바뀐 내용을 놓치지 않도록 목록을 읽기 전에 수정시각을 먼저 확인합니다.
+        mtime_ns = os.stat(os.path.join(root, relative_dir)).st_mtime_ns
+    except OSError:
+        return scan_directory(root, relative_dir, exclude_rules)
+
+    if incremental:
+        cached = snapshot.get(relative_dir, mtime_ns)
+        if cached is not None:
+            files, sub_dirs = cached
+            return apply_stat_rules(files, exclude_rules), sub_dirs
+
+    # 스냅샷에는 시간에 따라 결과가 달라지는 수정시각(age) 규칙을 적용하기 전의 목록을 기록합니다.
+    files, sub_dirs = scan_directory(
+        root, relative_dir, exclude_rules, stat_rules=False)
+    snapshot.put(relative_dir, mtime_ns, files, sub_dirs)
+    return apply_stat_rules(files, exclude_rules), sub_dirs
+
+
+def apply_stat_rules(files, exclude_rules=None):
+    """크기 / 수정시각 규칙에 해당하는 파일을 뺀 {상대 경로: FileStat} 을 반환하는 함수"""
+    if exclude_rules is None or not exclude_rules.stat_rules:
+        return files
+    return {relative_path: stat for relative_path, stat in files.items()
+            if not exclude_rules.match_stat(stat)}
+
+
+def walk_trees_parallel(roots, exclude_rules=None, max_workers=None, snapshots=None, incremental=False):
+    """
+    여러 루트 폴더를 동시에, 하위 폴더 단위로 병렬 조회합니다.
+    네트워크 드라이브처럼 폴더 조회마다 왕복 지연이 있는 경우 조회 대기를 겹쳐서 줄여줍니다.
+    snapshots 가 주어지면 루트 폴더별 TreeSnapshot 에 조회 결과를 기록하고, incremental 이면 재사용합니다.
+    조회가 끝나는 순서대로 (루트 번호, 폴더 상대 경로, {상대 경로: FileStat}, [하위 폴더]) 를 돌려줍니다.
+    """
+    if snapshots is None:
+        snapshots = [None] * len(roots)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit(side, relative_dir):
+            future = executor.submit(scan_directory_with_snapshot, roots[side], relative_dir, exclude_rules,
+                                     snapshots[side], incremental)
+            futures[future] = (side, relative_dir)
+
+        futures = {}
+        for side in range(len(roots)):
+            submit(side, '')
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                side, relative_dir = futures.pop(future)
+                files, sub_dirs = future.result()
+                for sub_dir in sub_dirs:
+                    submit(side, sub_dir)
+                yield side, relative_dir, files, sub_dirs
+
+
+def iter_tree_diff(folder_a, folder_b, index_a, index_b, exclude_rules=None, max_workers=None,
+                   snapshots=None, incremental=False):
+    """
+    A, B 폴더를 동시에 병렬 조회하면서 비교 결과를 발견 즉시
+    (상태, A 상대 경로, B 상대 경로, A FileStat, B FileStat) 로 돌려줍니다. (없는 쪽은 None)
+    - 'pair': 양쪽에 모두 있고 크기나 수정시각이 다른 파일 (내용 비교 필요)
+    - 'A' / 'B': 한쪽에만 있는 파일, 반대쪽 폴더의 조회가 끝나 없다는 것이 확인되는 즉시 돌려줍니다.
+    양쪽 파일과 폴더는 path_key 로 짝지으며, 상대 경로는 각 폴더의 실제 이름 그대로 돌려줍니다.
+    조회한 파일 정보는 index_a, index_b 에 {실제 상대 경로: FileStat} 로 채워집니다.
+    """
+    indexes = (index_a, index_b)
+    keys = ({}, {})  # path_key -> 실제 상대 경로
+    # 아래 폴더 상태는 모두 path_key 로 기록합니다.
+    listed = (set(), set())  # 조회가 끝난 폴더
+    absent = (set(), set())  # 존재하지 않는 것이 확인된 폴더
+    sub_dir_names = ({}, {})  # 폴더 -> 하위 폴더 이름
+    deferred = ({}, {})  # 반대쪽 폴더 조회를 기다리는 파일 {폴더: [상대 경로]}
+    # 해당 쪽에서 조회를 기다리는 폴더 -> 그 조회로 존재 여부를 더 확인할 수 있는 반대쪽 deferred 폴더
+    waiting = ({}, {})
+    only_status = ('A', 'B')
+
+    def pending_dir(side, dir_key):
+        """
+        해당 쪽에서 폴더의 존재 여부가 확인되었으면 None,
+        아니면 확인을 위해 조회가 끝나기를 기다려야 하는 폴더(자신 또는 상위 폴더)를 반환합니다.
+        """
+        if dir_key in listed[side] or dir_key in absent[side]:
+            return None
+        if not dir_key:
+            return dir_key
+        parent = os.path.dirname(dir_key)
+        pending = pending_dir(side, parent)
+        if pending is not None:
+            return pending
+        if parent in absent[side] or os.path.basename(dir_key) not in sub_dir_names[side][parent]:
+            absent[side].add(dir_key)
+            return None
+        return dir_key
+
+    def defer(side, dir_key, relative_path):
+        # 폴더마다 처음 한번만 반대쪽의 기다릴 폴더에 등록합니다.
+        if dir_key not in deferred[side]:
+            deferred[side][dir_key] = []
+            waiting[1 - side].setdefault(
+                pending_dir(1 - side, dir_key), []).append(dir_key)
+        deferred[side][dir_key].append(relative_path)
+
+    def only_event(side, relative_path):
+        stat = indexes[side][relative_path]
+        if side == 0:
+            return only_status[side], relative_path, None, stat, None
+        return only_status[side], None, relative_path, None, stat
+
+    def resolve(side, listed_dir):
+        """
+        side 쪽에서 listed_dir 조회가 끝났을 때, 이 폴더를 기다리던 반대쪽 파일만 정리합니다.
+        아직 확인할 수 없는 폴더는 더 깊은 하위 폴더의 조회를 기다리도록 다시 등록합니다. (폴더 수에 비례)
+        """
+        other = 1 - side
+        for dir_key in waiting[side].pop(listed_dir, ()):
+            pending = pending_dir(side, dir_key)
+            if pending is not None:
+                waiting[side].setdefault(pending, []).append(dir_key)
+                continue
+            for relative_path in deferred[other].pop(dir_key):
+                if path_key(relative_path) not in keys[side]:
+                    yield only_event(other, relative_path)
+
+    for side, relative_dir, files, sub_dirs in walk_trees_parallel((folder_a, folder_b), exclude_rules,
+                                                                   max_workers, snapshots, incremental):
+        other = 1 - side
+        own_index, other_index = indexes[side], indexes[other]
+        own_index.update(files)
+        dir_key = path_key(relative_dir)
+        listed[side].add(dir_key)
+        sub_dir_names[side][dir_key] = {
+            path_key(os.path.basename(sub_dir)) for sub_dir in sub_dirs}
+
+        other_known = pending_dir(other, dir_key) is None
+        for relative_path, stat in files.items():
+            key = path_key(relative_path)
+            keys[side][key] = relative_path
+            other_path = keys[other].get(key)
+            if other_path is None:
+                if other_known:
+                    yield only_event(side, relative_path)
+                else:
+                    defer(side, dir_key, relative_path)
+                continue
+            other_stat = other_index[other_path]
+            if side == 0:
+                path_a, path_b, stat_a, stat_b = relative_path, other_path, stat, other_stat
+            else:
+                path_a, path_b, stat_a, stat_b = other_path, relative_path, other_stat, stat
+            if stat_a.size == stat_b.size and stat_a.mtime_ns == stat_b.mtime_ns:
+                continue
+            yield 'pair', path_a, path_b, stat_a, stat_b
+
+        yield from resolve(side, dir_key)
+
+    # 조회가 모두 끝났으므로 남은 파일은 한쪽에만 있는 파일입니다.
+    for side in (0, 1):
+        for relative_paths in deferred[side].values():
+            for relative_path in relative_paths:
+                if path_key(relative_path) not in keys[1 - side]:
+                    yield only_event(side, relative_path)
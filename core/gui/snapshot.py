@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from core.gui.scanner import FileStat
+
+
+class TreeSnapshot:
+    """
+    app/local.db 의 tree_snapshots 테이블에 저장되는 폴더 조회 결과 스냅샷.
+    폴더의 수정시각이 그대로인 경우 이전 조회 결과(파일 목록, 하위 폴더)를 재사용합니다.
+    [note] 폴더 수정시각은 하위 파일 내용만 바뀐 경우에는 바뀌지 않으므로 재조회(rescan)에서만 사용합니다.
+    """
+
+    def __init__(self, root, except_ext='', db_path='app/local.db'):
+        self.root = os.path.normpath(root)
+        self.except_ext = except_ext or ''
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.dirs = {}  # 폴더 상대 경로 -> (수정시각 ns, {상대 경로: FileStat}, [하위 폴더])
+        self.updated = set()  # 이번 조회에서 새로 읽은 폴더
+        self.seen = set()  # 이번 조회에서 확인된 폴더
+        self.dirty = set()  # 수정시각과 상관없이 다시 읽어야 할 폴더
+        self.reused = 0
+        self.load()
+
+    def load(self):
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT relative_dir, mtime_ns, files, sub_dirs FROM tree_snapshots WHERE root=? AND except_ext=?",
+                  (self.root, self.except_ext))
+        for relative_dir, mtime_ns, files, sub_dirs in c.fetchall():
+            files = {os.path.join(relative_dir, name) if relative_dir else name: FileStat(*stat)
+                     for name, stat in json.loads(files).items()}
+            self.dirs[relative_dir] = (mtime_ns, files, json.loads(sub_dirs))
+        conn.close()
+        logging.debug(f'폴더 스냅샷 로드: {self.root} {len(self.dirs)} 건')
+
+    def mark_dirty(self, file_path):
+        """방금 복사한 파일처럼 다시 읽어야 할 파일이 속한 폴더를 표시합니다."""
+        relative_path = os.path.relpath(
+            os.path.normpath(file_path), self.root)
+        if relative_path.startswith(os.pardir):
+            return False
+        with self.lock:
+            self.dirty.add(os.path.dirname(relative_path))
+        return True
+
+    def get(self, relative_dir, mtime_ns):
+        with self.lock:
+            self.seen.add(relative_dir)
+            entry = self.dirs.get(relative_dir)
+            if entry is None or entry[0] != mtime_ns or relative_dir in self.dirty:
+                return None
+            self.reused += 1
+            return entry[1], entry[2]
+
+    def put(self, relative_dir, mtime_ns, files, sub_dirs):
+        with self.lock:
+            self.seen.add(relative_dir)
+            self.dirs[relative_dir] = (mtime_ns, files, sub_dirs)
+            self.updated.add(relative_dir)
+
+    def save(self):
+        """새로 읽은 폴더를 기록하고, 사라진 폴더는 스냅샷에서 제거합니다."""
+        with self.lock:
+            removed = [relative_dir for relative_dir in self.dirs
+                       if relative_dir not in self.seen]
+            for relative_dir in removed:
+                del self.dirs[relative_dir]
+            rows = []
+            for relative_dir in self.updated:
+                mtime_ns, files, sub_dirs = self.dirs[relative_dir]
+                files = {os.path.basename(relative_path): list(stat)
+                         for relative_path, stat in files.items()}
+                rows.append((self.root, relative_dir, self.except_ext, mtime_ns,
+                             json.dumps(files), json.dumps(sub_dirs)))
+            reused = self.reused
+            self.updated = set()
+            self.seen = set()
+            self.dirty = set()
+            self.reused = 0
+
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        # 제외 확장자 설정이 바뀐 이전 스냅샷은 더 이상 쓸 수 없으므로 정리합니다.
+        c.execute("DELETE FROM tree_snapshots WHERE root=? AND except_ext!=?",
+                  (self.root, self.except_ext))
+        c.executemany("DELETE FROM tree_snapshots WHERE root=? AND relative_dir=?",
+                      [(self.root, relative_dir) for relative_dir in removed])
+        c.executemany("INSERT OR REPLACE INTO tree_snapshots VALUES (?,?,?,?,?,?)",
+                      rows)
+        conn.commit()
+        conn.close()
+
+        logging.debug(
+            f'폴더 스냅샷 저장: {self.root} 재사용 {reused} 건, 조회 {len(rows)} 건, 제거 {len(removed)} 건')
+
+
+class CompareSnapshot:
+    """
+    app/local.db 의 compare_snapshots 테이블에 저장되는 파일 쌍의 내용 비교 결과.
+    양쪽 파일의 (크기, 수정시각 ns, inode) 가 모두 같으면 이전 비교 결과를 재사용합니다.
+    """
+
+    def __init__(self, folder_a, folder_b, db_path='app/local.db'):
+        self.folder_a = os.path.normpath(folder_a)
+        self.folder_b = os.path.normpath(folder_b)
+        self.db_path = db_path
+        self.results = {}  # 상대 경로 -> (A FileStat, B FileStat, 내용 일치 여부)
+        self.current = {}  # 이번 비교에서 확인된 결과
+        self.load()
+
+    def load(self):
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT relative_path, size_a, mtime_a, inode_a, size_b, mtime_b, inode_b, is_same "
+                  "FROM compare_snapshots WHERE folder_a=? AND folder_b=?",
+                  (self.folder_a, self.folder_b))
+        for row in c.fetchall():
+            self.results[row[0]] = (FileStat(*row[1:4]),
+                                    FileStat(*row[4:7]), bool(row[7]))
+        conn.close()
+
+    def get(self, relative_path, stat_a, stat_b):
+        """저장된 비교 결과(내용 일치 여부)를 반환합니다. 파일이 바뀌었다면 None"""
+        result = self.results.get(relative_path)
+        if result is None or tuple(result[0]) != tuple(stat_a) or tuple(result[1]) != tuple(stat_b):
+            return None
+        self.current[relative_path] = result
+        return result[2]
+
+    def put(self, relative_path, stat_a, stat_b, is_same):
+        self.current[relative_path] = (
+            FileStat(*stat_a), FileStat(*stat_b), is_same)
+
+    def save(self):
+        """이번 비교 결과로 스냅샷을 교체합니다."""
+        self.results = self.current
+        self.current = {}
+
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("DELETE FROM compare_snapshots WHERE folder_a=? AND folder_b=?",
+                  (self.folder_a, self.folder_b))
+        c.executemany("INSERT INTO compare_snapshots VALUES (?,?,?,?,?,?,?,?,?,?)",
+                      [(self.folder_a, self.folder_b, relative_path, *stat_a, *stat_b, int(is_same))
+                       for relative_path, (stat_a, stat_b, is_same) in self.results.items()])
+        conn.commit()
+        conn.close()
@@ -7,13 +7,19 @@ from core.gui.helpers import get_platform_name, absp, get_settings, replace_shor
 
 class RomScannerWorkerSignals(QObject):
     romsListReady = pyqtSignal()
-    changePage = pyqtSignal()
+    romsListReset = pyqtSignal()  # 새 스캔 시작시 목록 초기화
+    romsBatchReady = pyqtSignal(list)  # 스캔 도중 발견된 비교 결과 묶음
+    romsReplaced = pyqtSignal(list)  # 먼저 전달한 뒤 이동(M) 행으로 바뀐 B 행
+    scanProgress = pyqtSignal(object, object)  # 검사한 파일 수, 읽은 바이트 수
     romsRemoved = pyqtSignal()  # 삭제 작업을 알리기 위한 신호 추가
     rowsToRemove = pyqtSignal(list, str)  # 삭제완료 시그널
     showLoading = pyqtSignal()  # 로딩 오버레이 보여주기 위한 신호
     hideLoading = pyqtSignal()  # 로딩 오버레이 숨기기 위한 신호
     resourcesCopyCompleted = pyqtSignal(int)
+    saveFailed = pyqtSignal(str)  # 업데이트 저장 실패 (메인 스레드에서 알림창 표시)
     resourcesCopy = pyqtSignal(str, str, str, bool)
+    copyProgress = pyqtSignal(object, object, object, object)  # 완료 파일 수, 전체 파일 수, 복사한 바이트 수, 초당 바이트 수
+    duplicatesReady = pyqtSignal(list)  # 중복 분석 결과 (DuplicateCluster 목록)
 
 
 class RomScannerWorker(QRunnable):
@@ -29,31 +35,20 @@ class RomScannerWorker(QRunnable):
         # 로딩 오버레이
         self.signals.showLoading.emit()
 
-        if self.action == 'scan':
-            # 롬 파일 목록 얻기
-            self.gui_behavior.page = 1
-            self.gui_behavior.get_files_list(action='scan')
-            self.current_roms_list = self.gui_behavior.get_current_page_roms()
+        if self.action in ('scan', 'rescan'):
+            # 롬 파일 목록 얻기 (rescan: 바뀐 폴더만 다시 읽기)
+            self.signals.romsListReset.emit()
+            # 발견되는 결과를 묶음 단위로 메인 스레드에 전달
+            for batch in self.gui_behavior.iter_files_list(action=self.action):
+                if batch:
+                    self.signals.romsBatchReady.emit(batch)
+                self.signals.scanProgress.emit(self.gui_behavior.files_examined,
+                                               self.gui_behavior.bytes_hashed)
+            replaced_rows = self.gui_behavior.folder_diff.replaced_rows
+            if replaced_rows:
+                self.signals.romsReplaced.emit(replaced_rows)
             # 롬 목록이 준비되면 메인 스레드에 알리기
             self.signals.romsListReady.emit()
-        elif self.action == 'next':
-            # 다음 페이지로 이동
-            if self.gui_behavior.page < self.gui_behavior.get_total_pages():
-                self.gui_behavior.page += 1
-            # 롬 목록이 준비되면 메인 스레드에 알리기
-            self.current_roms_list = self.gui_behavior.get_current_page_roms()
-            self.signals.changePage.emit()
-        elif self.action == 'prev':
-            # 이전 페이지로 이동
-            if self.gui_behavior.page > 1:
-                self.gui_behavior.page -= 1
-            # 롬 목록이 준비되면 메인 스레드에 알리기
-            self.current_roms_list = self.gui_behavior.get_current_page_roms()
-            self.signals.changePage.emit()
-        elif self.action == 'update':
-            # 롬 목록이 준비되면 메인 스레드에 알리기
-            self.current_roms_list = self.gui_behavior.get_current_page_roms()
-            self.signals.romsListReady.emit()
         elif self.action == 'remove' or self.action == 'except':
             rows_to_remove = self.rows  # 여기에서 삭제하려는 행의 인덱스 목록을 생성합니다.
             self.signals.rowsToRemove.emit(rows_to_remove, self.action)
@@ -61,9 +56,29 @@ class RomScannerWorker(QRunnable):
             rows_to_remove = self.rows  # 여기에서 삭제하려는 행의 인덱스 목록을 생성합니다.
             self.signals.resourcesCopy.emit(self.gui_behavior.current_file_a_path,
                                             self.gui_behavior.current_file_b_path, self.gui_behavior.current_status, False)
+        elif self.action == 'dedup':
+            clusters = self.gui_behavior.analyze_duplicates()
+            self.signals.duplicatesReady.emit(clusters)
         elif self.action == 'save':
             # 저장 폴더 경로
             directory3 = get_settings('directory3')
+            output_format = get_settings('output_format') or 'folder'
+
+            def emit_copy_progress(stats):
+                self.signals.copyProgress.emit(
+                    stats.done_files, stats.total_files, stats.copied_bytes, stats.throughput())
+
+            if output_format != 'folder':
+                # output 폴더 대신 압축 파일 하나로 바로 기록
+                copy_stats, error = self.gui_behavior.save_output_archive(
+                    directory3, output_format, progress=emit_copy_progress)
+                if error:
+                    self.signals.saveFailed.emit(error)
+                else:
+                    self.signals.resourcesCopyCompleted.emit(
+                        copy_stats.copied_files)
+                self.signals.hideLoading.emit()
+                return
 
             folder_name = "output"  # 새로 생성하려는 폴더명
             new_folder_name = ""
@@ -83,27 +98,10 @@ class RomScannerWorker(QRunnable):
                         break
                     i += 1
 
-            work_cnt = 0
-
-            for fileRow in self.gui_behavior.all_roms_list:
-                # 파일 상태
-                status = fileRow['status']
-
-                current_path = ''
-                if status in ('A', 'B', 'C'):
-                    if status == 'A':
-                        current_path = fileRow.get('file_a_path')
-                    else:
-                        status = 'B'  # A 가 아니면 모두 추가폴더 기준
-                        current_path = fileRow.get('file_b_path')
-
-                    file_path = os.path.normpath(current_path)
-
-                    logging.debug(f'copy target path: {new_folder_path}')
-
-                    self.gui_behavior.copy_file_to_target_folder_works(
-                        new_folder_path, file_path, status, refresh=False)
-                    work_cnt = work_cnt+1
+            # A, B, C 파일을 output 폴더로 일괄 복사 (진행 상황은 메인 스레드에 전달)
+            copy_stats = self.gui_behavior.save_output_files(
+                new_folder_path, progress=emit_copy_progress)
+            work_cnt = copy_stats.copied_files
 
             self.signals.resourcesCopyCompleted.emit(work_cnt)
 
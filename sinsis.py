@@ -2,7 +2,7 @@
 import os
 import sys
 import logging
-from core.gui import gui
+import multiprocessing
 
 log_level = logging.DEBUG
 if getattr(sys, 'frozen', False):
@@ -14,6 +14,14 @@ else:
     log_dir = os.path.join(os.path.dirname(__file__), 'app')
 
 if __name__ == '__main__':
+    # PyInstaller 빌드에서 해시 프로세스 풀을 사용할 수 있도록 설정
+    multiprocessing.freeze_support()
+    if sys.argv[1:2] == ['--cli']:
+        # 화면 없이 비교만 실행합니다. (python sinsis.py --cli <A 폴더> <B 폴더> ...)
+        from core import diff
+        sys.exit(diff.main(sys.argv[2:]))
+
+    from core.gui import gui
     try:
         # Check if the log directory exists, and if not, create it
         if not os.path.exists(log_dir):
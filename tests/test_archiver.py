@@ -0,0 +1,73 @@
+import errno
+import os
+import zipfile
+
+import pytest
+
+from core.gui import archiver, copier
+
+
+def make_jobs(tmp_path):
+    source = tmp_path / 'src'
+    source.mkdir()
+    jobs = []
+    for name in ('a.bin', 'b.bin'):
+        (source / name).write_bytes(name.encode() * 1000)
+        jobs.append(copier.CopyJob(str(source / name), name, 5000))
+    return jobs
+
+
+def test_unreadable_source_is_skipped(tmp_path):
+    jobs = make_jobs(tmp_path)
+    jobs.insert(1, copier.CopyJob(str(tmp_path / 'missing.bin'), 'missing.bin', 1))
+    archive_path = tmp_path / 'output.zip'
+    stats = archiver.write_archive(jobs, str(archive_path))
+    assert stats.copied_files == 2
+    assert [path for path, _ in stats.failed] == [str(tmp_path / 'missing.bin')]
+    with zipfile.ZipFile(archive_path) as archive:
+        assert archive.namelist() == ['a.bin', 'b.bin']
+
+
+def test_write_error_aborts_archive(tmp_path, monkeypatch):
+    jobs = make_jobs(tmp_path)
+    archive_path = tmp_path / 'output.zip'
+
+    def fail_copy(source, target, length=0):
+        target.write(source.read(100))
+        raise OSError(errno.EIO, 'read error')
+
+    # 항목을 기록하는 도중 오류가 나면 깨진 항목이 남지 않도록 압축 파일을 지웁니다.
+    monkeypatch.setattr(zipfile.shutil, 'copyfileobj', fail_copy)
+    with pytest.raises(archiver.ArchiveAborted):
+        archiver.write_archive(jobs, str(archive_path))
+    assert not archive_path.exists()
+
+
+def test_tar_zst_stores_compressed_members_in_fast_frames(tmp_path, monkeypatch):
+    zstandard = pytest.importorskip('zstandard')
+    import tarfile
+
+    source = tmp_path / 'src'
+    source.mkdir()
+    (source / 'game.chd').write_bytes(bytes(range(256)) * 400)
+    (source / 'game.cue').write_bytes(b'TRACK 01 MODE2/2352\n' * 400)
+    jobs = [copier.CopyJob(str(source / name), name, os.path.getsize(source / name))
+            for name in ('game.chd', 'game.cue')]
+    levels = []
+    real_compressor = zstandard.ZstdCompressor
+
+    def record_compressor(level=3, **kwargs):
+        levels.append(level)
+        return real_compressor(level=level, **kwargs)
+
+    # 이미 압축된 확장자 구간만 빠른 레벨의 프레임으로 기록합니다.
+    monkeypatch.setattr(zstandard, 'ZstdCompressor', record_compressor)
+    archive_path = tmp_path / 'output.tar.zst'
+    archiver.write_archive(jobs, str(archive_path), 'tar.zst', 19)
+    assert levels == [archiver.STORED_ZSTD_LEVEL, 19]
+
+    with open(archive_path, 'rb') as file:
+        reader = zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True)
+        with tarfile.open(fileobj=reader, mode='r|') as archive:
+            contents = {member.name: archive.extractfile(member).read() for member in archive}
+    assert contents == {name: (source / name).read_bytes() for name in ('game.chd', 'game.cue')}
@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+from core import diff
+from core.gui import scanner
+from core.gui.compare import FolderDiff
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+
+def walk_in_order(first_side):
+    def walk_trees(roots, exclude_rules=None, max_workers=None, snapshots=None, incremental=False):
+        # 한쪽 조회가 모두 끝난 뒤에 반대쪽을 조회합니다.
+        for side in (first_side, 1 - first_side):
+            pending = ['']
+            while pending:
+                relative_dir = pending.pop()
+                files, sub_dirs = scanner.scan_directory(roots[side], relative_dir)
+                pending.extend(sub_dirs)
+                yield side, relative_dir, files, sub_dirs
+    return walk_trees
+
+
+def compare(folder_a, folder_b):
+    folder_diff = FolderDiff()
+    batches = list(folder_diff.iter_compare_folders(
+        folder_a, folder_b, hash_compare=True, detect_moves=True))
+    return folder_diff, batches
+
+
+def test_b_row_seen_before_move_match_is_replaced(tmp_path, monkeypatch):
+    folder_a = str(tmp_path / 'A')
+    folder_b = str(tmp_path / 'B')
+    write_file(os.path.join(folder_a, 'old', 'x.bin'), b'moved content')
+    write_file(os.path.join(folder_b, 'new', 'x.bin'), b'moved content')
+    write_file(os.path.join(folder_a, 'keep.bin'), b'keep')
+    write_file(os.path.join(folder_b, 'keep.bin'), b'keep')
+
+    # B 파일이 A에만 있는 같은 크기의 파일보다 먼저 확인되므로 B 행을 바로 돌려줍니다.
+    monkeypatch.setattr(scanner, 'walk_trees_parallel', walk_in_order(1))
+    folder_diff, batches = compare(folder_a, folder_b)
+    rows = [row for batch in batches for row in batch]
+    b_path = os.path.join(folder_b, 'new', 'x.bin')
+    assert [row.status for row in rows] == ['B', 'M']
+    assert folder_diff.replaced_rows == [rows[0]]
+    assert rows[0].file_b_path == rows[1].file_b_path == b_path
+    assert rows[1].file_a_path == os.path.join(folder_a, 'old', 'x.bin')
+
+
+@pytest.mark.parametrize('first_side', [0, 1])
+def test_held_back_b_row_without_match_is_emitted_once(tmp_path, monkeypatch, first_side):
+    folder_a = str(tmp_path / 'A')
+    folder_b = str(tmp_path / 'B')
+    write_file(os.path.join(folder_a, 'old', 'y.bin'), b'aaaa')
+    write_file(os.path.join(folder_b, 'new', 'z.bin'), b'bbbb')
+
+    monkeypatch.setattr(scanner, 'walk_trees_parallel', walk_in_order(first_side))
+    folder_diff, batches = compare(folder_a, folder_b)
+    rows = [row for batch in batches for row in batch]
+    assert [(row.status, row.file_b_path) for row in rows] == [
+        ('B', os.path.join(folder_b, 'new', 'z.bin'))]
+    assert folder_diff.replaced_rows == []
+
+
+def test_cli_report_has_no_b_row_for_moved_file(tmp_path, monkeypatch):
+    folder_a = str(tmp_path / 'A')
+    folder_b = str(tmp_path / 'B')
+    write_file(os.path.join(folder_a, 'old', 'x.bin'), b'moved content')
+    write_file(os.path.join(folder_b, 'new', 'x.bin'), b'moved content')
+    write_file(os.path.join(folder_b, 'new', 'added.bin'), b'added content')
+
+    monkeypatch.setattr(scanner, 'walk_trees_parallel', walk_in_order(1))
+    report = tmp_path / 'report.jsonl'
+    assert diff.main([folder_a, folder_b, '--no-cache', '-r', str(report)]) == 1
+    rows = [json.loads(line) for line in report.read_text(encoding='utf-8').splitlines()]
+    assert sorted((row['status'], row['file_b_path']) for row in rows) == [
+        ('B', os.path.join(folder_b, 'new', 'added.bin')),
+        ('M', os.path.join(folder_b, 'new', 'x.bin')),
+    ]
@@ -0,0 +1,84 @@
+import os
+
+from core.gui import copier, hasher
+from core.gui.compare import FolderDiff
+from core.gui.helpers import database_init
+
+
+def test_duplicate_counted_only_when_hardlinked(tmp_path, monkeypatch):
+    source = tmp_path / 'src'
+    source.mkdir()
+    (source / 'a.bin').write_bytes(b'same')
+    (source / 'b.bin').write_bytes(b'same')
+    output = tmp_path / 'out'
+    primary = copier.CopyJob(str(source / 'a.bin'), str(output / 'a.bin'), 4)
+    duplicate = copier.CopyJob(str(source / 'b.bin'), str(output / 'b.bin'), 4)
+
+    def fail_link(source_path, target_path):
+        raise OSError('hard links are not supported')
+
+    # 하드 링크를 만들 수 없는 파일시스템에서는 복사하고 중복 제거로 세지 않습니다.
+    monkeypatch.setattr(copier.os, 'link', fail_link)
+    stats = copier.BulkCopier().run([primary], [(duplicate, primary)])
+    assert (output / 'b.bin').read_bytes() == b'same'
+    assert stats.deduplicated_files == 0
+    assert stats.copied_bytes == 8
+    monkeypatch.undo()
+
+    os.remove(output / 'b.bin')
+    stats = copier.BulkCopier().run([], [(duplicate, primary)])
+    assert stats.deduplicated_files == 1
+    assert os.path.samefile(output / 'a.bin', output / 'b.bin')
+
+
+def test_short_kernel_copy_falls_back_for_one_file(tmp_path, monkeypatch):
+    source = tmp_path / 'a.bin'
+    source.write_bytes(b'x' * 1000)
+
+    def short_copy(backend, source_fd, target_fd, size):
+        return 0
+
+    # 복사 크기가 다르면 이 파일만 일반 복사로 다시 복사하고, 복사 방식은 미지원으로 기록하지 않습니다.
+    monkeypatch.setattr(copier, 'kernel_copy', short_copy)
+    monkeypatch.setattr(copier, '_unsupported_backends', set())
+    monkeypatch.setattr(copier, 'KERNEL_COPY_BACKENDS', ['copy_file_range'])
+    copied_bytes, backend = copier.copy_file(str(source), str(tmp_path / 'b.bin'))
+    assert (copied_bytes, backend) == (1000, 'copy2')
+    assert (tmp_path / 'b.bin').read_bytes() == b'x' * 1000
+    assert not copier._unsupported_backends
+
+
+def test_verify_uses_scan_digest_without_readback(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'local.db')
+    database_init(db_path)
+    hash_cache = hasher.HashCache(db_path)
+    folder_a = tmp_path / 'A'
+    folder_b = tmp_path / 'B'
+    folder_a.mkdir()
+    folder_b.mkdir()
+    (folder_a / 'changed.bin').write_bytes(b'a' * 300000)
+    (folder_b / 'changed.bin').write_bytes(b'b' * 300000)
+    (folder_b / 'added.bin').write_bytes(b'c' * 300000)
+
+    # 스캔 때 저장할 B, C 행의 해시를 채워 두므로 복사는 원본을 한번만 읽고 검증합니다.
+    folder_diff = FolderDiff()
+    rows = [row for batch in folder_diff.iter_compare_folders(
+        str(folder_a), str(folder_b), hash_compare=True, hash_cache=hash_cache, cache_digests=True)
+        for row in batch]
+    assert sorted(row.status for row in rows) == ['B', 'C']
+
+    def fail_readback(target_path, hash_algorithm='blake2'):
+        raise AssertionError('readback is opt-in')
+
+    monkeypatch.setattr(copier, 'hash_written_file', fail_readback)
+    jobs = copier.plan_copy_jobs(rows, str(tmp_path / 'out'), str(folder_a), str(folder_b))
+    stats = copier.save_update_folder(jobs, str(tmp_path / 'out'), verify=True, hash_cache=hash_cache)
+    assert (stats.verified, stats.scan_verified, stats.unverified) == (2, 2, 0)
+    assert not stats.mismatched
+
+    # 스캔 뒤 원본이 바뀌지 않았는데 스캔 해시와 다르면 불일치로 기록합니다.
+    source_path = str(folder_b / 'added.bin')
+    stat_key, digest = hash_cache.lookup(source_path, 'blake2')
+    hash_cache.put(source_path, stat_key, 'blake2', '0' * len(digest))
+    stats = copier.save_update_folder(jobs, str(tmp_path / 'out'), verify=True, hash_cache=hash_cache)
+    assert stats.mismatched == [source_path]
@@ -0,0 +1,25 @@
+import os
+
+from core.gui import delta
+
+
+def test_write_patch_gives_up_after_rolling_limit(tmp_path):
+    block_size = delta.get_block_size(1024 * 1024)
+    source = os.urandom(1024 * 1024)
+    # 블록마다 앞부분만 바뀐 파일: 새 데이터 비율은 낮지만 한 바이트씩 찾는 구간이 깁니다.
+    target = bytearray(source)
+    for offset in range(0, len(target), block_size):
+        target[offset:offset + 16] = os.urandom(16)
+    (tmp_path / 'a').write_bytes(source)
+    (tmp_path / 'b').write_bytes(bytes(target))
+
+    patch_path = str(tmp_path / 'b.sdpatch')
+    assert delta.write_patch(str(tmp_path / 'a'), str(tmp_path / 'b'), patch_path,
+                             max_rolling_bytes=64 * 1024) is None
+    assert not os.path.exists(patch_path)
+
+    # 제한이 없으면 패치를 만들고, 적용 결과는 B 와 같습니다.
+    assert delta.write_patch(str(tmp_path / 'a'), str(tmp_path / 'b'), patch_path,
+                             max_ratio=1.0, max_rolling_bytes=None) is not None
+    delta.apply_patch(str(tmp_path / 'a'), patch_path, str(tmp_path / 'out'))
+    assert (tmp_path / 'out').read_bytes() == bytes(target)
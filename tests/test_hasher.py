@@ -0,0 +1,66 @@
+import io
+import zlib
+
+from core.gui import hasher
+
+
+class ShortReadFile(io.RawIOBase):
+    """요청보다 짧게 읽히는 raw 파일 (SMB/NFS 흉내)"""
+
+    def __init__(self, data, max_read):
+        self.data = data
+        self.position = 0
+        self.max_read = max_read
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.max_read, len(self.data) - self.position)
+        buffer[:size] = self.data[self.position:self.position + size]
+        self.position += size
+        return size
+
+
+def test_direct_compare_files_with_short_reads(tmp_path, monkeypatch):
+    data = bytes(range(256)) * 4096
+    file_a = tmp_path / 'a.bin'
+    file_b = tmp_path / 'b.bin'
+    file_a.write_bytes(data)
+    file_b.write_bytes(data)
+
+    max_reads = {str(file_a): 1000, str(file_b): 4096}
+    monkeypatch.setattr(hasher, 'open', lambda path, *args, **kwargs: ShortReadFile(
+        data, max_reads[str(path)]), raising=False)
+
+    is_same, bytes_read = hasher.direct_compare_files(
+        str(file_a), str(file_b), chunk_size=64 * 1024)
+    assert is_same
+    assert bytes_read == len(data) * 2
+
+
+def test_select_hash_backend_keeps_recorded_backend(monkeypatch):
+    monkeypatch.setattr(hasher, '_auto_results', {'md5': 1.0, 'sha256': 10.0, 'blake2': 11.0})
+    # 측정 오차 수준의 차이로는 캐시에 기록된 백엔드를 바꾸지 않습니다.
+    assert hasher.select_hash_backend('auto', 'sha256') == 'sha256'
+    assert hasher.select_hash_backend('auto', 'md5') == 'blake2'
+    assert hasher.select_hash_backend('auto') == 'blake2'
+    assert hasher.select_hash_backend('md5', 'sha256') == 'md5'
+
+
+def test_moves_and_duplicates_ignore_checksum_collisions(tmp_path):
+    # 앞뒤 바이트를 +1 / -1 씩 바꾸면 adler32 값은 그대로입니다. (32비트 체크섬 충돌)
+    file_a = tmp_path / 'A' / 'x.bin'
+    file_b = tmp_path / 'B' / 'new' / 'x.bin'
+    file_a.parent.mkdir()
+    file_b.parent.mkdir(parents=True)
+    file_a.write_bytes(b'\x10\x10\x10\x10')
+    file_b.write_bytes(b'\x11\x0f\x0f\x11')
+    assert zlib.adler32(file_a.read_bytes()) == zlib.adler32(file_b.read_bytes())
+
+    a_files = {str(file_a): (4, 0, 0)}
+    b_files = {str(file_b): (4, 0, 0)}
+    assert hasher.find_moved_files(a_files, b_files, 'adler32') == []
+    assert hasher.find_duplicate_clusters({**a_files, **b_files}, 'crc32') == []
+    assert hasher.get_identity_backend('crc32') in ('xxh3_128', 'blake2')
+    assert hasher.get_identity_backend('md5') == 'md5'
@@ -0,0 +1,136 @@
+import os
+
+import pytest
+
+from core.gui import scanner
+from core.gui.rules import ExcludeRules
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(data)
+
+
+def build_wide_tree(root):
+    """하위 폴더가 많은 A, B 폴더 (공통 / 한쪽에만 있는 폴더, 깊은 폴더, 내용이 다른 파일)"""
+    folder_a = os.path.join(root, 'A')
+    folder_b = os.path.join(root, 'B')
+    for i in range(300):
+        name = f'dir{i:03d}'
+        write_file(os.path.join(folder_a, name, 'same.bin'), 'same')
+        write_file(os.path.join(folder_b, name, 'same.bin'), 'same')
+        if i % 3 == 0:
+            write_file(os.path.join(folder_a, name, 'changed.bin'), 'a')
+            write_file(os.path.join(folder_b, name, 'changed.bin'), 'bb')
+        if i % 5 == 0:
+            write_file(os.path.join(folder_a, name,
+                       'deep', 'er', 'a_only.bin'), 'a')
+        if i % 7 == 0:
+            write_file(os.path.join(folder_b, name,
+                       'deep', 'er', 'b_only.bin'), 'b')
+            write_file(os.path.join(folder_b, f'new{i:03d}', 'x', 'b_only.bin'), 'b')
+        if i % 11 == 0:
+            write_file(os.path.join(folder_a, f'old{i:03d}', 'a_only.bin'), 'a')
+    return folder_a, folder_b
+
+
+@pytest.mark.parametrize('max_workers', [1, 8])
+def test_iter_tree_diff_matches_diff_indexes(tmp_path, max_workers):
+    folder_a, folder_b = build_wide_tree(str(tmp_path))
+    index_a = {}
+    index_b = {}
+    events = list(scanner.iter_tree_diff(
+        folder_a, folder_b, index_a, index_b, max_workers=max_workers))
+
+    changed, b_only, a_only = scanner.diff_indexes(
+        scanner.index_tree(folder_a), scanner.index_tree(folder_b))
+    assert index_a == scanner.index_tree(folder_a)
+    assert index_b == scanner.index_tree(folder_b)
+    assert sorted(path_a or path_b for status, path_a, path_b, _, _ in events if status == 'pair') == changed
+    assert sorted(path_a or path_b for status, path_a, path_b, _, _ in events if status == 'B') == b_only
+    assert sorted(path_a or path_b for status, path_a, path_b, _, _ in events if status == 'A') == a_only
+    # 한 파일은 한번만 보고됩니다.
+    assert len(events) == len(changed) + len(b_only) + len(a_only)
+
+
+@pytest.mark.parametrize('lagging_side', [0, 1])
+def test_iter_tree_diff_with_lagging_side(tmp_path, monkeypatch, lagging_side):
+    folder_a, folder_b = build_wide_tree(str(tmp_path))
+
+    def walk_one_side_first(roots, exclude_rules=None, max_workers=None, snapshots=None, incremental=False):
+        # 한쪽 조회가 모두 끝난 뒤에 반대쪽을 조회합니다. (반대쪽 파일이 모두 대기하는 경우)
+        for side in (1 - lagging_side, lagging_side):
+            pending = ['']
+            while pending:
+                relative_dir = pending.pop()
+                files, sub_dirs = scanner.scan_directory(
+                    roots[side], relative_dir)
+                pending.extend(sub_dirs)
+                yield side, relative_dir, files, sub_dirs
+
+    monkeypatch.setattr(scanner, 'walk_trees_parallel', walk_one_side_first)
+    events = list(scanner.iter_tree_diff(folder_a, folder_b, {}, {}))
+
+    changed, b_only, a_only = scanner.diff_indexes(
+        scanner.index_tree(folder_a), scanner.index_tree(folder_b))
+    assert sorted(path_a or path_b for status, path_a, path_b, _, _ in events if status == 'pair') == changed
+    assert sorted(path_a or path_b for status, path_a, path_b, _, _ in events if status == 'B') == b_only
+    assert sorted(path_a or path_b for status, path_a, path_b, _, _ in events if status == 'A') == a_only
+
+
+class MemorySnapshot:
+    """TreeSnapshot 과 같은 get / put 을 가진 메모리 스냅샷"""
+
+    def __init__(self):
+        self.dirs = {}
+
+    def get(self, relative_dir, mtime_ns):
+        entry = self.dirs.get(relative_dir)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        return entry[1], entry[2]
+
+    def put(self, relative_dir, mtime_ns, files, sub_dirs):
+        self.dirs[relative_dir] = (mtime_ns, files, sub_dirs)
+
+
+def test_reused_snapshot_applies_age_rules_at_current_time(tmp_path):
+    write_file(str(tmp_path / 'old.bin'), 'old')
+    write_file(str(tmp_path / 'new.bin'), 'new')
+    mtime = os.stat(tmp_path / 'old.bin').st_mtime
+    os.utime(tmp_path / 'old.bin', (mtime - 20 * 86400, mtime - 20 * 86400))
+    snapshot = MemorySnapshot()
+
+    files, _ = scanner.scan_directory_with_snapshot(
+        str(tmp_path), '', ExcludeRules('age>30d', now=mtime), snapshot)
+    assert sorted(files) == ['new.bin', 'old.bin']
+
+    # 폴더가 그대로여도 시간이 지나 규칙에 해당하게 된 파일은 제외됩니다.
+    files, _ = scanner.scan_directory_with_snapshot(
+        str(tmp_path), '', ExcludeRules('age>30d', now=mtime + 15 * 86400), snapshot, incremental=True)
+    assert sorted(files) == ['new.bin']
+
+
+@pytest.mark.parametrize('max_workers', [1, 8])
+def test_case_only_rename_is_compared_pair(tmp_path, monkeypatch, max_workers):
+    # Windows 와 같이 대소문자를 구분하지 않는 경로 키로 짝짓습니다.
+    monkeypatch.setattr(scanner, 'path_key', str.lower)
+    folder_a = str(tmp_path / 'A')
+    folder_b = str(tmp_path / 'B')
+    write_file(os.path.join(folder_a, 'Game.zip'), 'a')
+    write_file(os.path.join(folder_b, 'game.zip'), 'bb')
+    write_file(os.path.join(folder_a, 'Roms', 'deep', 'x.bin'), 'a')
+    write_file(os.path.join(folder_b, 'roms', 'DEEP', 'X.bin'), 'bb')
+    write_file(os.path.join(folder_b, 'roms', 'new.bin'), 'b')
+
+    events = list(scanner.iter_tree_diff(folder_a, folder_b, {}, {}, max_workers=max_workers))
+    assert sorted((status, path_a, path_b) for status, path_a, path_b, _, _ in events) == [
+        ('B', None, os.path.join('roms', 'new.bin')),
+        ('pair', 'Game.zip', 'game.zip'),
+        ('pair', os.path.join('Roms', 'deep', 'x.bin'), os.path.join('roms', 'DEEP', 'X.bin')),
+    ]
+    changed, b_only, a_only = scanner.diff_indexes(
+        scanner.index_tree(folder_a), scanner.index_tree(folder_b))
+    assert changed == ['Game.zip', os.path.join('Roms', 'deep', 'x.bin')]
+    assert (b_only, a_only) == ([os.path.join('roms', 'new.bin')], [])